@@ -0,0 +1 @@
+"""Shared prediction code used by the Streamlit app and the headless tools."""
@@ -0,0 +1,155 @@
+"""Bulk scoring of CSV and Parquet files against the saved models.
+
+The input is read in fixed-size chunks and each chunk is scored with a
+single vectorized ``predict`` call, so memory use does not grow with the
+size of the file. With a ``threshold`` each row also gets the calibrated
+``probability`` from ``health_assistant.scoring`` and is labeled positive
+when that probability reaches the threshold.
+
+Usage::
+
+    python -m health_assistant.batch diabetes Datasets/diabetes.csv -o scored.csv
+    python -m health_assistant.batch heart Datasets/heart_disease_data.csv --threshold 0.3
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from health_assistant.models import FEATURE_COLUMNS, LazyModels
+from health_assistant.schema import SCHEMAS
+
+DEFAULT_CHUNKSIZE = 10_000
+
+
+class BatchStats:
+    def __init__(self):
+        self.rows = 0
+        self.positives = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def seconds(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self):
+        return (f"{self.rows} rows in {self.seconds:.3f}s "
+                f"({self.rows_per_second:,.0f} rows/s, {self.positives} positive)")
+
+
+def is_parquet(source):
+    return str(getattr(source, 'name', source)).lower().endswith(('.parquet', '.pq'))
+
+
+def read_chunks(source, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    """Yield DataFrames of at most ``chunksize`` rows from a CSV or Parquet file."""
+    if is_parquet(source):
+        import pyarrow.parquet as pq
+
+        # Pre-buffering keeps every row group read so far alive; without it memory stays at one batch
+        for batch in pq.ParquetFile(source, pre_buffer=False).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    import pandas as pd
+
+    # utf-8-sig strips the BOM that heart_disease_data.csv starts with
+    yield from pd.read_csv(source, chunksize=chunksize, encoding='utf-8-sig', usecols=columns)
+
+
+def score_chunk(model, name, chunk, profile=None, threshold=None):
+    """Label ``chunk``; with a ``scoring.ModelProfile`` also add its probabilities and apply ``threshold``."""
+    schema = SCHEMAS[name]
+    X = schema.assemble(chunk)
+    # Duplicate rows are scored once and the labels broadcast back
+    unique, inverse = np.unique(X, axis=0, return_inverse=True)
+    deduplicated = len(unique) < len(X)
+    frame = schema.frame(unique if deduplicated else X)
+    broadcast = (lambda values: values[inverse.ravel()]) if deduplicated else (lambda values: values)
+    scored = chunk.copy()
+    if profile is None:
+        predictions = model.predict(frame)
+    else:
+        decision = model.decision_function(frame)
+        probability = profile.probability(decision)
+        predictions = (decision > 0 if threshold is None else probability >= threshold).astype(np.int64)
+        scored['probability'] = broadcast(probability)
+    scored['prediction'] = broadcast(predictions)
+    scored['result'] = scored['prediction'].map({1: 'Positive', 0: 'Negative'})
+    return scored
+
+
+def iter_scored(name, source, model=None, chunksize=DEFAULT_CHUNKSIZE, stats=None, threshold=None):
+    """Yield labeled DataFrame chunks for ``source`` scored by model ``name``."""
+    models = LazyModels(names=[name]) if model is None else {name: model}
+    if stats is None:
+        stats = BatchStats()
+    profile = None
+    if threshold is not None:
+        from health_assistant.scoring import ScoringEngine
+
+        # A registry handle is pinned to one version for the whole file
+        model, profile = ScoringEngine(models).snapshot(name)
+    else:
+        model = models[name]
+    stats.started = time.perf_counter()
+
+    for chunk in read_chunks(source, chunksize):
+        scored = score_chunk(model, name, chunk, profile, threshold)
+        stats.rows += len(scored)
+        stats.positives += int((scored['prediction'] == 1).sum())
+        stats.chunks += 1
+        yield scored
+    stats.finished = time.perf_counter()
+
+
+def score_csv(name, source, dest, model=None, chunksize=DEFAULT_CHUNKSIZE, progress=None, threshold=None):
+    """Score ``source`` and write the labeled rows to ``dest`` chunk by chunk.
+
+    ``progress`` is called with the running ``BatchStats`` after every chunk.
+    """
+    stats = BatchStats()
+    header = True
+    for scored in iter_scored(name, source, model, chunksize, stats, threshold):
+        scored.to_csv(dest, index=False, header=header)
+        header = False
+        if progress is not None:
+            progress(stats)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV file with one of the saved models.")
+    parser.add_argument('model', choices=sorted(FEATURE_COLUMNS))
+    parser.add_argument('input', help="CSV or Parquet file with the same columns as the model's dataset")
+    parser.add_argument('-o', '--output', help="where to write the labeled CSV (default: stdout)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--threshold', type=float,
+                        help="add a probability column and label rows whose probability reaches this value")
+    args = parser.parse_args(argv)
+
+    def report(stats):
+        print(f"\r{stats!r}", end='', file=sys.stderr, flush=True)
+
+    try:
+        if args.output:
+            with open(args.output, 'w', newline='') as dest:
+                stats = score_csv(args.model, args.input, dest, chunksize=args.chunksize, progress=report,
+                                  threshold=args.threshold)
+        else:
+            stats = score_csv(args.model, args.input, sys.stdout, chunksize=args.chunksize,
+                              threshold=args.threshold)
+    except ValueError as e:
+        sys.exit(f"\nerror: {e}")
+    print(f"\r{stats!r}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Micro-batching of concurrent single-row predictions.
+
+Callers on different threads (Streamlit sessions, threaded HTTP workers)
+submit one row at a time. A background thread per model collects the
+pending rows into one matrix, flushing when ``max_batch_size`` rows are
+waiting or the oldest row has waited ``max_wait_ms``, runs a single
+``predict`` and hands each caller its own label.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from health_assistant.models import FEATURE_COLUMNS
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+class BatchingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch = 0
+        self.wait_seconds = 0.0
+        self.predict_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def record(self, size, wait_seconds, predict_seconds, failed=False):
+        with self._lock:
+            self.requests += size
+            self.batches += 1
+            self.errors += size if failed else 0
+            self.max_batch = max(self.max_batch, size)
+            self.wait_seconds += wait_seconds
+            self.predict_seconds += predict_seconds
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch,
+                'mean_queue_wait_ms': 1e3 * self.wait_seconds / self.requests if self.requests else 0.0,
+                'mean_predict_ms': 1e3 * self.predict_seconds / self.batches if self.batches else 0.0,
+                'requests_per_second': self.requests / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class MicroBatcher:
+    """Coalesce single-row ``predict`` calls for one model."""
+
+    def __init__(self, model, columns, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.columns = list(columns)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchingStats()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one feature row and return a ``Future`` for its label."""
+        if self._closed:
+            raise RuntimeError("batcher is closed")
+        if len(row) != len(self.columns):
+            raise ValueError(f"expected {len(self.columns)} feature values, got {len(row)}")
+        future = Future()
+        self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        pending = [first]
+        deadline = first[2] + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            pending.append(item)
+        return pending
+
+    def _run(self):
+        # Imported by the worker, so pages that never predict do not load pandas
+        import pandas as pd
+
+        while True:
+            pending = self._collect()
+            if pending is None:
+                return
+
+            started = time.perf_counter()
+            wait = sum(started - queued for _, _, queued in pending)
+            try:
+                matrix = np.asarray([row for row, _, _ in pending], dtype=np.float64)
+                labels = self.model.predict(pd.DataFrame(matrix, columns=self.columns))
+            except Exception as e:
+                self.stats.record(len(pending), wait, time.perf_counter() - started, failed=True)
+                for _, future, _ in pending:
+                    future.set_exception(e)
+                continue
+
+            self.stats.record(len(pending), wait, time.perf_counter() - started)
+            for (_, future, _), label in zip(pending, labels):
+                future.set_result(label)
+
+
+class BatchingPredictor:
+    """One ``MicroBatcher`` per model behind a ``predict(name, row)`` call."""
+
+    def __init__(self, models, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.models = models
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batchers = {}
+        self._lock = threading.Lock()
+
+    def _batcher(self, name):
+        # Created on first use so lazily loaded models stay unloaded until needed
+        batcher = self.batchers.get(name)
+        if batcher is None:
+            with self._lock:
+                batcher = self.batchers.get(name)
+                if batcher is None:
+                    batcher = MicroBatcher(self.models[name], FEATURE_COLUMNS[name],
+                                           self.max_batch_size, self.max_wait_ms)
+                    self.batchers[name] = batcher
+        return batcher
+
+    def submit(self, name, row):
+        return self._batcher(name).submit(row)
+
+    def predict(self, name, row, timeout=None):
+        return self._batcher(name).predict(row, timeout)
+
+    def stats(self):
+        return {name: batcher.stats.snapshot() for name, batcher in list(self.batchers.items())}
+
+    def close(self):
+        for batcher in list(self.batchers.values()):
+            batcher.close()
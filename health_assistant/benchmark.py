@@ -0,0 +1,288 @@
+"""Offline performance benchmarks.
+
+Measures, against ``Datasets/*.csv`` and ``saved models/*.sav``:
+
+* model load time for the pickles and the NumPy exports,
+* ``predict`` latency per model and batch size for both, and the time to
+  validate and assemble that many JSON-style records,
+* building the Patient History DataFrame and figures from 10^3 to 10^6
+  synthetic records, the old in-memory way and from ``HistoryStore``,
+* end-to-end page script time with Streamlit's ``AppTest``,
+* voice feature extraction per second of synthetic WAV audio, the inverse
+  of the real-time factor ``python -m health_assistant.voice --bench``
+  prints.
+
+Every metric is a duration in seconds, so lower is always better. Results
+are written as JSON, and ``compare`` flags metrics that got slower.
+
+Usage::
+
+    python -m health_assistant.benchmark run -o bench.json
+    python -m health_assistant.benchmark compare base.json bench.json --threshold 0.2
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from health_assistant.models import DATASET_FILES, FEATURE_COLUMNS, MODEL_FILES, ROOT, load_model
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+HISTORY_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PAGES = ['Home', 'Diabetes Prediction', 'Heart Disease Prediction', 'Parkinsons Prediction', 'Patient History',
+         'Admin']
+DISEASES = ['Diabetes', 'Heart Disease', 'Parkinsons']
+VOICE_SECONDS = [5, 60]
+
+
+def timeit(fn, repeat=5, number=1):
+    """Return the median and best wall time of ``fn`` in seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return float(np.median(samples)), float(min(samples))
+
+
+def bench_models(results, repeat):
+    from health_assistant.fastpath import load_fast_model
+
+    for name in MODEL_FILES:
+        results[f'load.{name}.sklearn'] = timeit(lambda: load_model(name), repeat)[0]
+        results[f'load.{name}.numpy'] = timeit(lambda: load_fast_model(name), repeat)[0]
+        results[f'load.{name}.numpy_mmap'] = timeit(lambda: load_fast_model(name, mmap=True), repeat)[0]
+
+
+def bench_predict(results, repeat, batch_sizes=BATCH_SIZES):
+    from health_assistant.fastpath import load_fast_model
+    from health_assistant.schema import SCHEMAS
+
+    rng = np.random.default_rng(0)
+    for name in MODEL_FILES:
+        data = pd.read_csv(DATASET_FILES[name], encoding='utf-8-sig')[FEATURE_COLUMNS[name]]
+        predictors = {'sklearn': load_model(name), 'numpy': load_fast_model(name)}
+        for size in batch_sizes:
+            X = data.iloc[rng.integers(0, len(data), size)].reset_index(drop=True)
+            number = max(1, 1000 // size)
+            records = X.to_dict('records')
+            results[f'assemble.{name}.records_{size}'] = timeit(lambda: SCHEMAS[name].assemble(records), repeat,
+                                                                number)[0]
+            for kind, model in predictors.items():
+                results[f'predict.{name}.{kind}.batch_{size}'] = timeit(lambda: model.predict(X), repeat, number)[0]
+
+
+def synthetic_history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime(2024, 1, 1)
+    seconds = np.sort(rng.integers(0, 365 * 24 * 3600, n))
+    diseases = rng.integers(0, len(DISEASES), n)
+    positives = rng.random(n) < 0.3
+    return [
+        {'timestamp': (start + datetime.timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S"),
+         'disease': DISEASES[d], 'result': 'Positive' if p else 'Negative', 'details': {'age': 50}}
+        for s, d, p in zip(seconds, diseases, positives)
+    ]
+
+
+def bench_history(results, repeat, sizes=HISTORY_SIZES):
+    import plotly.express as px
+
+    from health_assistant import figures
+    from health_assistant.history import HistoryStore
+
+    def legacy_page(records):
+        # What the Patient History page did with st.session_state.patient_history
+        history_df = pd.DataFrame(records)
+        (history_df['result'] == 'Positive').mean()
+        len(history_df['disease'].unique())
+        history_df['timestamp'] = pd.to_datetime(history_df['timestamp'])
+        px.line(history_df, x='timestamp', y=history_df['result'].map({'Positive': 1, 'Negative': 0}),
+                color='disease').to_json()
+        px.pie(history_df, names='disease').to_json()
+        history_df.sort_values('timestamp', ascending=False)
+
+    def store_page(store):
+        # What the page does on a figure cache miss: aggregates, downsampled timeline, one table page
+        total = store.count()
+        store.count(result='Positive') / total
+        disease_counts = store.count_by('disease')
+        figures.timeline(*store.timeline()).to_json()
+        figures.pie('history_pie', disease_counts).to_json()
+        store.rows(limit=50, offset=(total // 2) // 50 * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, 'history.db'))
+        loaded = 0
+        for size in sizes:
+            records = synthetic_history(size)
+            store.extend(records[loaded:])
+            loaded = size
+            # The legacy path is O(n) per rerun; a single run is enough at the larger sizes
+            results[f'history.legacy.rows_{size}'] = timeit(lambda: legacy_page(records), 1 if size > 10_000 else repeat)[0]
+            results[f'history.store.rows_{size}'] = timeit(lambda: store_page(store), repeat)[0]
+
+
+def _page_probe(history_rows):
+    from streamlit.testing.v1 import AppTest
+
+    from health_assistant.history import HistoryStore
+
+    if history_rows:
+        HistoryStore().extend(synthetic_history(history_rows))
+    with open(ROOT / "app.py", encoding='utf-8') as f:
+        source = f.read()
+    timings = {}
+    for page in PAGES:
+        # AppTest cannot click the sidebar links, so open each page as the default one
+        app = AppTest.from_string(source.replace("DEFAULT_PAGE = 'Home'", f"DEFAULT_PAGE = {page!r}"),
+                                  default_timeout=300)
+        started = time.perf_counter()
+        app.run()
+        first = time.perf_counter() - started
+        started = time.perf_counter()
+        app.run()
+        timings[page] = {'first_run': first, 'rerun': time.perf_counter() - started,
+                         'error': bool(app.exception)}
+    return timings
+
+
+def bench_pages(results, history_rows=1000):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   HEALTH_ASSISTANT_HISTORY=os.path.join(tmp, 'history.db'),
+                   HEALTH_ASSISTANT_CACHE=os.path.join(tmp, 'cache.db'))
+        out = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-m', 'health_assistant.benchmark', 'page-probe',
+             '--history-rows', str(history_rows)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+    for page, timing in json.loads(out.stdout.strip().splitlines()[-1]).items():
+        if timing['error']:
+            raise RuntimeError(f"page '{page}' raised an exception under AppTest")
+        key = page.lower().replace(' ', '_')
+        results[f'page.{key}.first_run'] = timing['first_run']
+        results[f'page.{key}.rerun'] = timing['rerun']
+
+
+def bench_voice(results, repeat, lengths=VOICE_SECONDS):
+    from health_assistant import voice
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in lengths:
+            path = os.path.join(tmp, f'voice_{seconds}.wav')
+            voice.write_wav(path, voice.synthetic_voice(seconds), 44100)
+            elapsed = timeit(lambda: voice.extract(path), repeat if seconds <= 10 else 1)[0]
+            results[f'voice.extract.per_audio_second.audio_{seconds}s'] = elapsed / seconds
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import sklearn
+
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def run(suites, repeat=5, history_sizes=HISTORY_SIZES, page_history_rows=1000):
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if 'models' in suites:
+            bench_models(results, repeat)
+        if 'predict' in suites:
+            bench_predict(results, repeat)
+        if 'history' in suites:
+            bench_history(results, repeat, history_sizes)
+        if 'pages' in suites:
+            bench_pages(results, page_history_rows)
+        if 'voice' in suites:
+            bench_voice(results, repeat)
+    return {'meta': metadata(), 'results': results}
+
+
+def compare(base, new, threshold=0.10):
+    """Return ``(metric, base, new, ratio)`` for metrics more than ``threshold`` slower."""
+    regressions = []
+    for metric, new_value in sorted(new['results'].items()):
+        base_value = base['results'].get(metric)
+        if base_value is None or base_value <= 0:
+            continue
+        ratio = new_value / base_value
+        if ratio > 1 + threshold:
+            regressions.append((metric, base_value, new_value, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run or compare the offline benchmarks.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and write JSON")
+    run_parser.add_argument('-o', '--output', help="JSON file to write (default: stdout)")
+    run_parser.add_argument('--suite', action='append', choices=['models', 'predict', 'history', 'pages', 'voice'],
+                            help="suite to run; repeat for several (default: all)")
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--history-sizes', type=int, nargs='+', default=HISTORY_SIZES)
+    run_parser.add_argument('--page-history-rows', type=int, default=1000,
+                            help="records in the history database while timing pages")
+
+    compare_parser = commands.add_parser('compare', help="flag metrics that regressed between two runs")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="relative slowdown that counts as a regression")
+
+    probe_parser = commands.add_parser('page-probe')
+    probe_parser.add_argument('--history-rows', type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == 'page-probe':
+        print(json.dumps(_page_probe(args.history_rows)))
+    elif args.command == 'run':
+        report = run(args.suite or ['models', 'predict', 'history', 'pages', 'voice'], args.repeat,
+                     args.history_sizes, args.page_history_rows)
+        text = json.dumps(report, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.threshold)
+        for metric, base_value, new_value, ratio in regressions:
+            print(f"REGRESSION {metric}: {1e3 * base_value:.3f} ms -> {1e3 * new_value:.3f} ms ({ratio:.2f}x)")
+        compared = len(set(base['results']) & set(new['results']))
+        print(f"{len(regressions)} regressions over {compared} metrics present in both runs "
+              f"(threshold {args.threshold:.0%})")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
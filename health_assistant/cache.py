@@ -0,0 +1,207 @@
+"""Bounded cache of prediction results.
+
+Entries are keyed on the model name, the SHA-256 of the bytes the model in
+memory was loaded from and the canonical float64 bytes of the feature
+vector, so a resubmitted form or a repeated row skips the model call
+entirely. The hash comes from ``fingerprints``, normally the ``digests``
+of a ``LazyModels`` or a ``ModelRegistry``, not from the file as it is on
+disk now. A worker still running a replaced model therefore never stores
+its labels under the new file's hash. When a worker loads a new model, a
+``MemoryBackend`` drops the entries made with other versions. A
+``SQLiteBackend`` keeps them, because workers that have not reloaded yet
+still read them, and leaves them to LRU and TTL eviction.
+
+Two backends are provided: ``MemoryBackend`` for a single process and
+``SQLiteBackend`` for sharing one cache between worker processes on a
+host. Both evict least-recently-used entries past ``maxsize`` and expire
+entries older than ``ttl`` seconds.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from health_assistant.models import ROOT
+
+DEFAULT_PATH = os.environ.get('HEALTH_ASSISTANT_CACHE', str(ROOT / "prediction_cache.db"))
+DEFAULT_MAXSIZE = 100_000
+DEFAULT_TTL = 24 * 3600
+
+
+def canonical_key(name, model_hash, row):
+    # float64 bytes with -0.0 folded into 0.0, so 5, 5.0 and np.int64(5) share an entry
+    vector = np.asarray(row, dtype=np.float64).ravel() + 0.0
+    digest = hashlib.blake2b(vector.tobytes(), digest_size=16).hexdigest()
+    return f"{name}:{model_hash[:16]}:{digest}"
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, 0
+            value, expires = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None, 1
+            self._entries.move_to_end(key)
+            return value, 0
+
+    def put(self, key, value):
+        """Store ``value`` and return how many entries were evicted to make room."""
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def drop_model(self, name, keep_hash):
+        prefix, keep = f"{name}:", f"{name}:{keep_hash[:16]}:"
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix) and not key.startswith(keep)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Cache table in a local SQLite file, shared by every process that opens it."""
+
+    # Trimming to maxsize is a range delete, so it runs every few hundred inserts
+    TRIM_EVERY = 256
+
+    def __init__(self, path=DEFAULT_PATH, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.path = str(path)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._inserts = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value INTEGER NOT NULL, "
+                         "expires REAL NOT NULL, used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache (used)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, 0
+        now = time.time()
+        if row[1] < now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None, 1
+        conn.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+        return row[0], 0
+
+    def put(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                     (key, int(value), now + self.ttl, now))
+        self._inserts += 1
+        if self._inserts % self.TRIM_EVERY:
+            return 0
+        evicted = conn.execute("DELETE FROM cache WHERE expires < ?", (now,)).rowcount
+        excess = len(self) - self.maxsize
+        if excess > 0:
+            evicted += conn.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used LIMIT ?)",
+                                    (excess,)).rowcount
+        return evicted
+
+    def drop_model(self, name, keep_hash):
+        # Other workers may still serve the old version from this table; its entries age out instead
+        return 0
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class PredictionCache:
+    def __init__(self, backend, fingerprints):
+        self.backend = backend
+        self.fingerprints = fingerprints
+        self.stats = CacheStats()
+        self._seen_hashes = {}
+
+    def _model_hash(self, name):
+        model_hash = self.fingerprints.get(name)
+        if self._seen_hashes.get(name) != model_hash:
+            self.stats.add(invalidations=self.backend.drop_model(name, model_hash))
+            self._seen_hashes[name] = model_hash
+        return model_hash
+
+    def get_or_compute(self, name, row, compute):
+        """Return the cached label for ``row``, calling ``compute()`` on a miss."""
+        key = canonical_key(name, self._model_hash(name), row)
+        value, expired = self.backend.get(key)
+        if value is not None:
+            self.stats.add(hits=1)
+            return value
+        value = compute()
+        self.stats.add(misses=1, evictions=expired + self.backend.put(key, value))
+        return value
+
+
+class CachingPredictor:
+    """Wrap anything with ``predict(name, row)`` so repeated rows are served from a cache."""
+
+    def __init__(self, predictor, cache):
+        self.predictor = predictor
+        self.cache = cache
+
+    def predict(self, name, row, timeout=None):
+        return self.cache.get_or_compute(name, row, lambda: int(self.predictor.predict(name, row, timeout)))
+
+    def stats(self):
+        return self.cache.stats.snapshot()
@@ -0,0 +1,55 @@
+"""Extreme-preserving downsampling of time series for the dashboard charts.
+
+A line chart cannot show more points than the screen has pixels, so sending
+every bucket of a long history only costs bandwidth and browser time.
+``minmax_indices`` splits the time axis into equal-width bins and keeps the
+lowest and the highest point of each bin. The spikes and dips that plain
+averaging would smooth away stay on the chart, and the kept points are real
+observations, so their hover values stay exact.
+"""
+import numpy as np
+
+
+def minmax_indices(times, values, max_points):
+    """Return sorted indices of at most ``max_points`` points keeping each bin's extremes.
+
+    ``times`` must be ascending numbers or datetime64 values. Two points are
+    kept per bin, so ``max_points // 2`` bins are used.
+    """
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype('datetime64[s]').astype(np.int64)
+    times = times.astype(np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    n_bins = max(max_points // 2, 1)
+    span = times[-1] - times[0]
+    if span > 0:
+        bins = np.minimum(((times - times[0]) * n_bins / span).astype(np.int64), n_bins - 1)
+    else:
+        bins = np.zeros(n, dtype=np.int64)
+    # Sorted by bin, then value: each bin's first entry is its minimum, its last its maximum
+    order = np.lexsort((values, bins))
+    sorted_bins = bins[order]
+    starts = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def downsample_rollup(rows, max_points):
+    """Downsample ``HistoryStore.rollup`` rows to at most ``max_points`` per disease, by positive rate."""
+    series = {}
+    for row in rows:
+        series.setdefault(row[1], []).append(row)
+    kept = []
+    for disease_rows in series.values():
+        if len(disease_rows) <= max_points:
+            kept.extend(disease_rows)
+            continue
+        times = np.array([row[0] for row in disease_rows], dtype='datetime64[m]')
+        rates = np.array([row[2] / row[3] for row in disease_rows])
+        kept.extend(disease_rows[i] for i in minmax_indices(times, rates, max_points))
+    kept.sort(key=lambda row: (row[0], row[1]))
+    return kept
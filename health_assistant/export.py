@@ -0,0 +1,261 @@
+"""Streamed export of the patient history to CSV, Parquet or gzipped JSON lines.
+
+Rows are read from ``HistoryStore.iter_rows`` in chunks, with the date,
+disease and result filters applied in SQL, and each chunk is written
+straight to the output file. Memory use does not depend on how much
+history is exported. ``ExportManager`` runs exports on a background
+thread pool and keeps their progress, so the Streamlit page only polls
+a job and offers the finished file for download.
+
+Usage::
+
+    python -m health_assistant.export -f parquet -o history.parquet --disease Diabetes --start 2024-01-01
+"""
+import argparse
+import gzip
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from health_assistant.history import COLUMNS, HistoryStore
+
+DEFAULT_CHUNKSIZE = 10_000
+
+# Format -> (file suffix, MIME type)
+FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'jsonl.gz': ('.jsonl.gz', 'application/gzip'),
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        import csv
+
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(col, pa.string()) for col in COLUMNS])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+
+    def write(self, rows):
+        # One row group per chunk; columns are transposed without going through pandas
+        columns = [list(col) for col in zip(*rows)]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class _JsonlWriter:
+    def __init__(self, path):
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+
+    def write(self, rows):
+        # details is stored as JSON text, so it is spliced in rather than re-parsed
+        self._file.writelines(
+            f'{{"timestamp": {json.dumps(ts)}, "disease": {json.dumps(disease)}, '
+            f'"result": {json.dumps(result)}, "details": {details}}}\n'
+            for ts, disease, result, details in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+
+WRITERS = {
+    'csv': _CsvWriter,
+    'parquet': _ParquetWriter,
+    'jsonl.gz': _JsonlWriter,
+}
+
+
+def export_history(store, path, fmt='csv', chunksize=DEFAULT_CHUNKSIZE, progress=None, cancelled=None,
+                   **filters):
+    """Write the matching history to ``path`` chunk by chunk and return the row count.
+
+    ``filters`` are ``start``, ``end``, ``disease`` and ``result`` as in
+    ``HistoryStore.rows``. ``progress`` is called with the rows written so
+    far after every chunk. If ``cancelled()`` turns true the export stops
+    with ``ExportCancelled``. The file appears at ``path`` only once it is
+    complete.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format '{fmt}'")
+    filters = {key: value for key, value in filters.items() if value is not None}
+    partial = f"{path}.part"
+    writer = WRITERS[fmt](partial)
+    written = 0
+    try:
+        for rows in store.iter_rows(COLUMNS, chunksize, **filters):
+            if cancelled is not None and cancelled():
+                raise ExportCancelled()
+            writer.write(rows)
+            written += len(rows)
+            if progress is not None:
+                progress(written)
+    except BaseException:
+        writer.close()
+        os.remove(partial)
+        raise
+    writer.close()
+    os.replace(partial, path)
+    return written
+
+
+class ExportJob:
+    def __init__(self, job_id, fmt, path, filters, total):
+        self.id = job_id
+        self.format = fmt
+        self.path = path
+        self.filters = filters
+        self.total = total
+        self.rows = 0
+        self.state = 'queued'
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def file_name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def mime(self):
+        return FORMATS[self.format][1]
+
+    @property
+    def progress(self):
+        if self.state == 'done':
+            return 1.0
+        return min(self.rows / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def active(self):
+        return self.state in ('queued', 'running')
+
+    def cancel(self):
+        self._cancel.set()
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def __repr__(self):
+        return f"{self.format} export {self.state}: {self.rows:,} of {self.total:,} rows"
+
+
+class ExportManager:
+    """Run history exports on background threads and keep the finished files for a while."""
+
+    def __init__(self, store, directory=None, max_workers=2, keep_seconds=3600, chunksize=DEFAULT_CHUNKSIZE):
+        self.store = store
+        self.directory = directory or tempfile.mkdtemp(prefix='health-assistant-export-')
+        self.keep_seconds = keep_seconds
+        self.chunksize = chunksize
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='history-export')
+
+    def submit(self, fmt='csv', **filters):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown export format '{fmt}'")
+        self._expire()
+        filters = {key: value for key, value in filters.items() if value is not None}
+        with self._lock:
+            job_id = next(self._ids)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"health_assistant_history-{stamp}-{job_id}{FORMATS[fmt][0]}")
+        job = ExportJob(job_id, fmt, path, filters, self.store.count(**filters))
+        with self._lock:
+            self.jobs[job_id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _run(self, job):
+        job.state = 'running'
+
+        def progress(rows):
+            job.rows = rows
+
+        try:
+            job.rows = export_history(self.store, job.path, job.format, self.chunksize, progress,
+                                      job._cancel.is_set, **job.filters)
+            job.state = 'done'
+        except ExportCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+        job.finished = time.time()
+
+    def _expire(self):
+        cutoff = time.time() - self.keep_seconds
+        with self._lock:
+            expired = [job for job in self.jobs.values() if job.finished is not None and job.finished < cutoff]
+            for job in expired:
+                del self.jobs[job.id]
+        for job in expired:
+            if os.path.exists(job.path):
+                os.remove(job.path)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the patient history in chunks.")
+    parser.add_argument('-f', '--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('-o', '--output', required=True)
+    parser.add_argument('--start', help="earliest timestamp, e.g. 2024-01-01")
+    parser.add_argument('--end', help="latest timestamp, inclusive, e.g. 2024-12-31 for the whole day")
+    parser.add_argument('--disease', choices=['Diabetes', 'Heart Disease', 'Parkinsons'])
+    parser.add_argument('--result', choices=['Positive', 'Negative'])
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    store = HistoryStore()
+    filters = dict(start=args.start, end=args.end, disease=args.disease, result=args.result)
+    total = store.count(**{key: value for key, value in filters.items() if value is not None})
+    started = time.perf_counter()
+
+    def report(rows):
+        print(f"\r{rows:,} of {total:,} rows", end='', file=sys.stderr, flush=True)
+
+    rows = export_history(store, args.output, args.format, args.chunksize, report, **filters)
+    print(f"\r{rows:,} rows written to {args.output} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
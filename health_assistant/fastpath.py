@@ -0,0 +1,265 @@
+"""NumPy-only predictors exported from the pickled scikit-learn models.
+
+``export`` pulls the fitted parameters out of a ``.sav`` pickle into a
+compact ``.npz`` next to it. ``NumpyPredictor`` loads that file and
+reproduces ``predict``/``decision_function`` without importing
+scikit-learn, which keeps worker start-up and memory small.
+
+The same parameters can also be unpacked into a directory of ``.npy``
+files that are memory-mapped read-only, so every worker process on a host
+shares one copy of the support vectors in the page cache.
+
+Usage::
+
+    python -m health_assistant.fastpath export
+    python -m health_assistant.fastpath verify
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from health_assistant.metrics import span
+from health_assistant.models import MODEL_FILES, LazyModels
+
+
+# Estimators whose decision function is ``X @ coef.T + intercept``
+LINEAR_KINDS = ('LogisticRegression', 'SGDClassifier')
+
+# Preprocessing steps, in order, that may precede the estimator in a pipeline
+PIPELINE_STEPS = ([], ['StandardScaler'], ['RBFSampler'], ['StandardScaler', 'RBFSampler'])
+
+
+def artifact_path(name):
+    return MODEL_FILES[name].with_suffix('.npz')
+
+
+def mmap_dir(name):
+    return MODEL_FILES[name].with_suffix('')
+
+
+def extract_params(model):
+    """Return the arrays needed to rebuild ``model.predict`` with NumPy.
+
+    Besides bare estimators this accepts the pipelines written by
+    ``health_assistant.training`` and ``health_assistant.streaming``: an
+    optional ``StandardScaler``, an optional ``RBFSampler``, then the
+    estimator.
+    """
+    feature_names = getattr(model, 'feature_names_in_', [])
+    preprocessing = {}
+    if type(model).__name__ == 'Pipeline':
+        *steps, model = [step for _, step in model.steps]
+        if [type(step).__name__ for step in steps] not in PIPELINE_STEPS:
+            raise ValueError("only StandardScaler/RBFSampler pipelines can be exported")
+        for step in steps:
+            if type(step).__name__ == 'StandardScaler':
+                preprocessing['scale_mean'] = np.asarray(step.mean_ if step.with_mean else 0.0, dtype=np.float64)
+                preprocessing['scale_scale'] = np.asarray(step.scale_ if step.with_std else 1.0, dtype=np.float64)
+            else:
+                preprocessing['rff_weights'] = np.ascontiguousarray(step.random_weights_, dtype=np.float64)
+                preprocessing['rff_offset'] = np.asarray(step.random_offset_, dtype=np.float64)
+    kind = type(model).__name__
+    params = {
+        'kind': np.array(kind),
+        'classes': np.asarray(model.classes_),
+        'feature_names': np.asarray(feature_names, dtype=str),
+        **preprocessing,
+    }
+    if kind in LINEAR_KINDS:
+        if len(model.classes_) != 2:
+            raise ValueError(f"only binary {kind} models can be exported")
+        params['coef'] = np.ascontiguousarray(model.coef_, dtype=np.float64)
+        params['intercept'] = np.asarray(model.intercept_, dtype=np.float64)
+    elif kind == 'SVC':
+        if len(model.classes_) != 2:
+            raise ValueError("only binary SVC models can be exported")
+        # libsvm's own sign convention; the public dual_coef_/intercept_ are negated for binary models
+        params['support_vectors'] = np.ascontiguousarray(model.support_vectors_, dtype=np.float64)
+        params['dual_coef'] = np.ascontiguousarray(model._dual_coef_, dtype=np.float64)
+        params['intercept'] = np.asarray(model._intercept_, dtype=np.float64)
+        params['kernel'] = np.array(model.kernel)
+        params['gamma'] = np.float64(model._gamma)
+        params['coef0'] = np.float64(model.coef0)
+        params['degree'] = np.int64(model.degree)
+    else:
+        raise ValueError(f"cannot export {kind} models")
+    return params
+
+
+def params_digest(params):
+    """SHA-256 over the names, dtypes, shapes and bytes of ``params``."""
+    digest = hashlib.sha256()
+    for key in sorted(params):
+        value = np.ascontiguousarray(params[key])
+        digest.update(f"{key}:{value.dtype.str}:{value.shape};".encode())
+        digest.update(value.tobytes())
+    return digest.hexdigest()
+
+
+def _kernel(X, params):
+    kernel = str(params['kernel'])
+    sv = params['support_vectors']
+    if kernel == 'linear':
+        return X @ sv.T
+    if kernel == 'rbf':
+        sq_dist = (X * X).sum(axis=1)[:, None] - 2 * (X @ sv.T) + (sv * sv).sum(axis=1)[None, :]
+        return np.exp(-params['gamma'] * np.maximum(sq_dist, 0))
+    if kernel == 'poly':
+        return (params['gamma'] * (X @ sv.T) + params['coef0']) ** params['degree']
+    if kernel == 'sigmoid':
+        return np.tanh(params['gamma'] * (X @ sv.T) + params['coef0'])
+    raise ValueError(f"unsupported SVC kernel '{kernel}'")
+
+
+class NumpyPredictor:
+    """Drop-in replacement for the ``predict`` side of a fitted binary classifier."""
+
+    def __init__(self, params):
+        self.params = params
+        self.kind = str(params['kind'])
+        self.classes_ = params['classes']
+        self.feature_names_in_ = params['feature_names']
+        self.n_features_in_ = len(self.feature_names_in_)
+        # Identifies the arrays actually loaded, for keying PredictionCache
+        self.sha256 = params_digest(params)
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(extract_params(model))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, **self.params)
+
+    @classmethod
+    def load_dir(cls, path):
+        """Load a directory written by ``save_dir``, memory-mapping every array."""
+        params = {}
+        for entry in os.scandir(path):
+            if entry.name.endswith('.npy'):
+                value = np.load(entry.path, mmap_mode='r', allow_pickle=False)
+                params[entry.name[:-4]] = value[()] if value.ndim == 0 else value
+        return cls(params)
+
+    def save_dir(self, path, overwrite=True):
+        """Write one ``.npy`` per parameter into ``path``, swapping the directory in atomically."""
+        path = os.fspath(path)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(path))
+        for key, value in self.params.items():
+            np.save(os.path.join(tmp, key + '.npy'), np.asarray(value), allow_pickle=False)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            if not overwrite:
+                # Another worker unpacked it first; readers may already have it mapped
+                shutil.rmtree(tmp)
+                return
+            shutil.rmtree(path)
+            os.rename(tmp, path)
+
+    def _as_matrix(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"expected {self.n_features_in_} features, got {X.shape[1]}")
+        if 'scale_mean' in self.params:
+            X = (X - self.params['scale_mean']) / self.params['scale_scale']
+        if 'rff_weights' in self.params:
+            # Random Fourier features, as RBFSampler.transform computes them
+            weights = self.params['rff_weights']
+            X = np.cos(X @ weights + self.params['rff_offset']) * np.sqrt(2.0 / weights.shape[1])
+        return X
+
+    def decision_function(self, X):
+        """Signed distance to the boundary; positive means ``classes_[1]``, as in scikit-learn."""
+        X = self._as_matrix(X)
+        if self.kind in LINEAR_KINDS:
+            return X @ self.params['coef'][0] + self.params['intercept'][0]
+        return -(_kernel(X, self.params) @ self.params['dual_coef'][0] + self.params['intercept'][0])
+
+    def predict(self, X):
+        X = self._as_matrix(X)
+        if self.kind in LINEAR_KINDS:
+            scores = X @ self.params['coef'].T + self.params['intercept']
+            return self.classes_[(scores.ravel() > 0).astype(int)]
+        # libsvm picks classes_[0] only for strictly positive internal decision values
+        internal = _kernel(X, self.params) @ self.params['dual_coef'][0] + self.params['intercept'][0]
+        return self.classes_[(internal <= 0).astype(int)]
+
+
+def export(name):
+    from health_assistant.models import load_model
+
+    path = artifact_path(name)
+    predictor = NumpyPredictor.from_model(load_model(name))
+    predictor.save(path)
+    predictor.save_dir(mmap_dir(name))
+    return path
+
+
+def load_fast_model(name, mmap=False):
+    with span('model_load', model=name, format='mmap' if mmap else 'npz'):
+        if not mmap:
+            return NumpyPredictor.load(artifact_path(name))
+        path = mmap_dir(name)
+        if not path.is_dir():
+            NumpyPredictor.load(artifact_path(name)).save_dir(path, overwrite=False)
+        return NumpyPredictor.load_dir(path)
+
+
+def _with_digest(predictor):
+    return predictor, predictor.sha256
+
+
+def load_fast_models(mmap=False, lazy=True):
+    if lazy:
+        return LazyModels(lambda name: _with_digest(load_fast_model(name, mmap)))
+    return {name: load_fast_model(name, mmap) for name in MODEL_FILES}
+
+
+def verify(name):
+    """Compare the exported predictor with the pickle on every row of the dataset.
+
+    Returns the number of rows checked and the number of label mismatches.
+    """
+    import pandas as pd
+
+    from health_assistant.models import DATASET_FILES, FEATURE_COLUMNS, load_model
+
+    X = pd.read_csv(DATASET_FILES[name], encoding='utf-8-sig')[FEATURE_COLUMNS[name]]
+    expected = load_model(name).predict(X)
+    actual = load_fast_model(name).predict(X)
+    return len(X), int((expected != actual).sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and check NumPy-only model artifacts.")
+    parser.add_argument('command', choices=['export', 'verify'])
+    parser.add_argument('models', nargs='*', default=sorted(MODEL_FILES))
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.models:
+        if args.command == 'export':
+            print(f"{name}: wrote {export(name)}")
+        else:
+            rows, mismatches = verify(name)
+            failed = failed or mismatches > 0
+            print(f"{name}: {rows} rows, {mismatches} mismatches")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
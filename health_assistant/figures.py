@@ -0,0 +1,186 @@
+"""Pre-serialized Plotly figures for the dashboard charts.
+
+The charts used to be rebuilt from scratch with ``plotly.express`` on every
+rerun, and most of that time went into layout and template validation, not
+into the data. Here the static part of each chart type (titles, axes,
+legend, trace styling) is built and serialized once per process, and each
+draw only fills the trace data into a copy of that spec:
+
+* The history charts depend only on the stored history, so ``FIGURES``
+  memoizes their specs by chart and ``HistoryStore.version()``. A redraw
+  with an unchanged history returns the same spec without querying the
+  aggregates again. A changed history queries the aggregates of the
+  affected chart and swaps them into the trace x/y/values; the layout is
+  not rebuilt.
+* The per-assessment radar charts keep one template spec per chart type.
+  ``RadarTemplate.figure`` returns a new spec with the patient's values and
+  axis range, so concurrent sessions never draw a shared object.
+
+``st.plotly_chart`` deep-copies a ``go.Figure`` through ``to_dict`` and
+validates a plain dict by building a ``go.Figure`` from it, which costs
+more than drawing the chart. ``SerializedFigure`` hands it the spec
+directly. Cached specs are shared between sessions and must not be
+modified.
+"""
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+from health_assistant import metrics
+from health_assistant.cache import CacheStats
+
+DEFAULT_MAXSIZE = 32
+
+# Static layout of each chart type; only the traces change between draws
+LAYOUTS = {
+    'home_pie': dict(title=dict(text='Predictions by Disease Type'), legend=dict(tracegroupgap=0)),
+    'history_pie': dict(title=dict(text='Assessments by Disease Type'), legend=dict(tracegroupgap=0)),
+    'history_timeline': dict(
+        # Rollup buckets are timestamp prefixes, which plotly.js parses as dates
+        xaxis=dict(title=dict(text='timestamp'), type='date'),
+        yaxis=dict(title=dict(text='positive_rate')),
+        legend=dict(title=dict(text='disease'), tracegroupgap=0),
+        hovermode='closest',
+    ),
+    'heart_radar': dict(polar=dict(radialaxis=dict(visible=True, range=[0, 1])), showlegend=False),
+    'parkinsons_radar': dict(polar=dict(radialaxis=dict(visible=True, range=[0, 1])), showlegend=False),
+}
+
+TIMELINE_HOVER = ("disease=%{fullData.name}<br>timestamp=%{x}<br>positive_rate=%{y:.3f}"
+                  "<br>positives=%{customdata[0]}<br>assessments=%{customdata[1]}<extra></extra>")
+
+
+class SerializedFigure(go.Figure):
+    """A figure that serializes to a prebuilt spec without building any graph objects.
+
+    Only the serialization entry points (``to_dict``, ``to_plotly_json`` and
+    ``to_json``) are supported, which is all ``st.plotly_chart`` uses.
+    """
+
+    def __init__(self, spec):  # pylint: disable=super-init-not-called
+        # go.Figure.__init__ validates the whole spec, which is the cost this class avoids
+        self._spec = spec
+
+    @property
+    def spec(self):
+        return self._spec
+
+    def to_dict(self):
+        return self._spec
+
+    def to_plotly_json(self):
+        return self._spec
+
+    def __repr__(self):
+        return f'SerializedFigure({self._spec!r})'
+
+
+_TEMPLATES = {}
+_templates_lock = threading.Lock()
+
+
+def _template(chart, trace):
+    """Serialized layout of ``chart`` and of its ``trace`` type, built once per process."""
+    with _templates_lock:
+        template = _TEMPLATES.get(chart)
+        if template is None:
+            spec = go.Figure(trace, layout=LAYOUTS[chart]).to_plotly_json()
+            template = _TEMPLATES[chart] = (spec['data'][0], spec['layout'])
+    return template
+
+
+def pie(chart, counts):
+    """Pie of ``{label: count}`` with the layout of ``chart``."""
+    trace, layout = _template(chart, go.Pie(hovertemplate='label=%{label}<br>value=%{value}<extra></extra>'))
+    return SerializedFigure({'data': [dict(trace, labels=list(counts), values=list(counts.values()))],
+                             'layout': layout})
+
+
+def timeline(granularity, rows):
+    """Positive rate per disease from ``HistoryStore.rollup`` rows, one line per disease."""
+    trace, layout = _template('history_timeline', go.Scatter(mode='lines+markers', hovertemplate=TIMELINE_HOVER))
+    series = {}
+    for bucket, disease, positives, total in rows:
+        x, y, custom = series.setdefault(disease, ([], [], []))
+        x.append(bucket)
+        y.append(positives / total)
+        custom.append((positives, total))
+    traces = [
+        dict(trace, x=x, y=y, customdata=custom, name=disease, legendgroup=disease)
+        for disease, (x, y, custom) in series.items()
+    ]
+    layout = dict(layout, title=dict(text=f'Positive Rate Over Time (per {granularity})'))
+    return SerializedFigure({'data': traces, 'layout': layout})
+
+
+class RadarTemplate:
+    """One radar spec per chart type whose trace data is filled in for each draw."""
+
+    def __init__(self, chart, name):
+        self.chart = chart
+        self.name = name
+
+    def figure(self, theta, r, radial_range=None):
+        """The radar showing ``r`` over ``theta``, optionally with its own radial axis range."""
+        trace, layout = _template(self.chart, go.Scatterpolar(fill='toself', name=self.name))
+        polar = layout['polar']
+        if radial_range is not None:
+            polar = dict(polar, radialaxis=dict(polar['radialaxis'], range=list(radial_range)))
+        return SerializedFigure({'data': [dict(trace, theta=list(theta), r=list(r))],
+                                 'layout': dict(layout, polar=polar)})
+
+
+RADARS = {
+    'heart_radar': RadarTemplate('heart_radar', 'Patient Metrics'),
+    'parkinsons_radar': RadarTemplate('parkinsons_radar', 'Voice Metrics'),
+}
+
+
+class FigureCache:
+    """LRU of serialized figures keyed on the chart and the version of the data behind it."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            fig = self._entries.get(key)
+            if fig is not None:
+                self._entries.move_to_end(key)
+        if fig is not None:
+            self.stats.add(hits=1)
+            return fig
+        fig = build()
+        with self._lock:
+            self._entries[key] = fig
+            evicted = 0
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self.stats.add(misses=1, evictions=evicted)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by every session in this process
+FIGURES = FigureCache()
+metrics.REGISTRY.register_collector('figures', metrics.figure_cache_collector(FIGURES))
+
+
+def history_pie(chart, store):
+    return FIGURES.get_or_build((chart, store.path, store.version()), lambda: pie(chart, store.count_by('disease')))
+
+
+def history_timeline(store, max_points=500, start=None, end=None):
+    return FIGURES.get_or_build(('history_timeline', store.path, store.version(), max_points, start, end),
+                                lambda: timeline(*store.timeline(max_points, start, end)))
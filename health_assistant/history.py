@@ -0,0 +1,304 @@
+"""Durable patient history backed by SQLite.
+
+Every assessment is one row in ``predictions``, indexed on timestamp,
+disease and result, so the dashboard pages can ask for just the rows and
+counts they display instead of rebuilding the whole history each rerun.
+Appends also bump per-disease/result totals and per-minute, per-hour and
+per-day rollups in the same transaction, so dashboard counts and timelines
+are read from a handful of aggregate rows instead of the raw records.
+Every write transaction also bumps a version number, so derived views
+such as the dashboard figures can tell whether they are still current.
+The database lives at ``$HEALTH_ASSISTANT_HISTORY`` (default
+``patient_history.db`` in the repository root) and is opened in WAL mode
+so several worker processes can read while one writes.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from health_assistant.models import ROOT
+
+DEFAULT_PATH = os.environ.get('HEALTH_ASSISTANT_HISTORY', str(ROOT / "patient_history.db"))
+
+COLUMNS = ['timestamp', 'disease', 'result', 'details']
+
+# Rollup granularity -> length of the timestamp prefix that names its bucket
+GRANULARITIES = {
+    'minute': 16,
+    'hour': 13,
+    'day': 10,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    result TEXT NOT NULL,
+    details TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS predictions_timestamp ON predictions (timestamp);
+CREATE INDEX IF NOT EXISTS predictions_disease ON predictions (disease, timestamp);
+CREATE INDEX IF NOT EXISTS predictions_result ON predictions (result, timestamp);
+CREATE TABLE IF NOT EXISTS totals (
+    disease TEXT NOT NULL,
+    result TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (disease, result)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    result TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, disease, result)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+UPSERT_TOTAL = """
+INSERT INTO totals (disease, result, count) VALUES (?, ?, 1)
+ON CONFLICT (disease, result) DO UPDATE SET count = count + 1
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (granularity, bucket, disease, result, count) VALUES (?, ?, ?, ?, 1)
+ON CONFLICT (granularity, bucket, disease, result) DO UPDATE SET count = count + 1
+"""
+
+BUMP_VERSION = """
+INSERT INTO meta (key, value) VALUES ('version', 1)
+ON CONFLICT (key) DO UPDATE SET value = value + 1
+"""
+
+
+def _where(start=None, end=None, disease=None, result=None):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(str(start))
+    if end is not None:
+        # ``end`` is inclusive at its own precision: '2024-01-01' keeps every row of that day
+        clauses.append("timestamp <= ?")
+        params.append(str(end) + '\uffff')
+    if disease is not None:
+        clauses.append("disease = ?")
+        params.append(disease)
+    if result is not None:
+        clauses.append("result = ?")
+        params.append(result)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class HistoryStore:
+    """Append-only store of prediction records.
+
+    Records are dicts with ``timestamp`` (``YYYY-MM-DD HH:MM:SS``),
+    ``disease``, ``result`` and an optional ``details`` dict. Each thread
+    gets its own SQLite connection.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = str(path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        if self.count() == 0 and self._connect().execute("SELECT 1 FROM predictions LIMIT 1").fetchone():
+            # Database written before the aggregate tables existed
+            self.rebuild_aggregates()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, record):
+        conn = self._connect()
+        with conn:
+            self._insert(conn, record)
+            conn.execute(BUMP_VERSION)
+
+    def extend(self, records):
+        conn = self._connect()
+        with conn:
+            for record in records:
+                self._insert(conn, record)
+            conn.execute(BUMP_VERSION)
+
+    def _insert(self, conn, record):
+        timestamp, disease, result = record['timestamp'], record['disease'], record['result']
+        conn.execute(
+            "INSERT INTO predictions (timestamp, disease, result, details) VALUES (?, ?, ?, ?)",
+            (timestamp, disease, result, json.dumps(record.get('details', {}), default=float)),
+        )
+        conn.execute(UPSERT_TOTAL, (disease, result))
+        conn.executemany(UPSERT_ROLLUP, [
+            (granularity, timestamp[:width], disease, result)
+            for granularity, width in GRANULARITIES.items()
+        ])
+
+    def rebuild_aggregates(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM totals")
+            conn.execute("DELETE FROM rollups")
+            conn.execute(BUMP_VERSION)
+            conn.execute("INSERT INTO totals SELECT disease, result, COUNT(*) FROM predictions "
+                         "GROUP BY disease, result")
+            for granularity, width in GRANULARITIES.items():
+                conn.execute(
+                    "INSERT INTO rollups SELECT ?, substr(timestamp, 1, ?) AS bucket, disease, result, COUNT(*) "
+                    "FROM predictions GROUP BY bucket, disease, result",
+                    (granularity, width),
+                )
+            conn.execute(BUMP_VERSION)
+
+    def version(self):
+        """Number that changes whenever any process writes to the history."""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def count(self, **filters):
+        if filters.get('start') is None and filters.get('end') is None:
+            # Answered from the running totals
+            where, params = _where(disease=filters.get('disease'), result=filters.get('result'))
+            sql = f"SELECT COALESCE(SUM(count), 0) FROM totals{where}"
+        else:
+            where, params = _where(**filters)
+            sql = f"SELECT COUNT(*) FROM predictions{where}"
+        return self._connect().execute(sql, params).fetchone()[0]
+
+    def count_by(self, column, **filters):
+        """Return ``{value: count}`` for ``column`` (``disease`` or ``result``)."""
+        if column not in ('disease', 'result'):
+            raise ValueError(f"cannot group by '{column}'")
+        if filters.get('start') is None and filters.get('end') is None:
+            where, params = _where(disease=filters.get('disease'), result=filters.get('result'))
+            sql = f"SELECT {column}, SUM(count) AS n FROM totals{where} GROUP BY {column} ORDER BY n DESC"
+        else:
+            where, params = _where(**filters)
+            sql = f"SELECT {column}, COUNT(*) AS n FROM predictions{where} GROUP BY {column} ORDER BY n DESC"
+        return dict(self._connect().execute(sql, params).fetchall())
+
+    def rollup(self, granularity, start=None, end=None, disease=None):
+        """Return ``(bucket, disease, positives, total)`` rows, oldest bucket first.
+
+        ``bucket`` is the timestamp truncated to ``granularity``
+        (``minute``, ``hour`` or ``day``).
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown granularity '{granularity}'")
+        clauses, params = ["granularity = ?"], [granularity]
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(str(start)[:GRANULARITIES[granularity]])
+        if end is not None:
+            clauses.append("bucket <= ?")
+            params.append(str(end)[:GRANULARITIES[granularity]])
+        if disease is not None:
+            clauses.append("disease = ?")
+            params.append(disease)
+        return self._connect().execute(
+            "SELECT bucket, disease, SUM(CASE WHEN result = 'Positive' THEN count ELSE 0 END), SUM(count) "
+            f"FROM rollups WHERE {' AND '.join(clauses)} GROUP BY bucket, disease ORDER BY bucket, disease",
+            params,
+        ).fetchall()
+
+    def bucket_count(self, granularity, start=None, end=None, limit=None):
+        """Number of distinct buckets in the window; counting stops past ``limit``."""
+        clauses, params = ["granularity = ?"], [granularity]
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(str(start)[:GRANULARITIES[granularity]])
+        if end is not None:
+            clauses.append("bucket <= ?")
+            params.append(str(end)[:GRANULARITIES[granularity]])
+        sql = f"SELECT DISTINCT bucket FROM rollups WHERE {' AND '.join(clauses)}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit) + 1)
+        return self._connect().execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+
+    def time_range(self):
+        """Return the first and last minute with records, or ``(None, None)`` for an empty history."""
+        return self._connect().execute(
+            "SELECT MIN(bucket), MAX(bucket) FROM rollups WHERE granularity = 'minute'"
+        ).fetchone()
+
+    def timeline(self, max_points=500, start=None, end=None, oversample=4):
+        """Return ``(granularity, rows)`` for a chart of at most ``max_points`` points per disease.
+
+        The finest granularity with at most ``oversample * max_points``
+        buckets between ``start`` and ``end`` is read, and the rollup is
+        reduced to ``max_points`` per disease keeping each bin's lowest and
+        highest positive rate. A narrower window therefore gets finer
+        buckets, down to single minutes.
+        """
+        from health_assistant.downsample import downsample_rollup
+
+        budget = oversample * max_points
+        for granularity in GRANULARITIES:
+            if self.bucket_count(granularity, start, end, limit=budget) <= budget:
+                break
+        return granularity, downsample_rollup(self.rollup(granularity, start, end), max_points)
+
+    def rows(self, columns=COLUMNS, limit=None, offset=0, newest_first=True, **filters):
+        """Return matching records as tuples of ``columns``."""
+        if any(col not in COLUMNS for col in columns):
+            raise ValueError(f"unknown column in {columns}")
+        where, params = _where(**filters)
+        sql = (f"SELECT {', '.join(columns)} FROM predictions{where} "
+               f"ORDER BY timestamp {'DESC' if newest_first else 'ASC'}, id {'DESC' if newest_first else 'ASC'}")
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        return self._connect().execute(sql, params).fetchall()
+
+    def iter_rows(self, columns=COLUMNS, chunksize=10_000, newest_first=False, **filters):
+        """Yield lists of at most ``chunksize`` matching records from one query.
+
+        The rows come from a single read snapshot, so appends made while
+        iterating are not included.
+        """
+        if any(col not in COLUMNS for col in columns):
+            raise ValueError(f"unknown column in {columns}")
+        where, params = _where(**filters)
+        order = 'DESC' if newest_first else 'ASC'
+        # A dedicated connection keeps the read transaction open across yields
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(
+                f"SELECT {', '.join(columns)} FROM predictions{where} ORDER BY timestamp {order}, id {order}", params
+            )
+            while True:
+                chunk = cursor.fetchmany(chunksize)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            conn.close()
+
+    def recent(self, n=5):
+        return [dict(zip(COLUMNS, row)) for row in self.rows(limit=n)]
+
+    def frame(self, columns=COLUMNS, **kwargs):
+        import pandas as pd
+
+        return pd.DataFrame(self.rows(columns, **kwargs), columns=list(columns))
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM predictions")
+            conn.execute("DELETE FROM totals")
+            conn.execute("DELETE FROM rollups")
+            conn.execute(BUMP_VERSION)
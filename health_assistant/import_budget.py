@@ -0,0 +1,122 @@
+"""Cold-start import budget of the Streamlit app.
+
+Each page is rendered once in a fresh interpreter started with
+``python -X importtime``. ``app.py`` runs under Streamlit's ``AppTest``, with
+the page made the default one, since ``AppTest`` cannot click the sidebar
+links. ``AppTest`` itself imports neither pandas nor Plotly. The report is
+checked against the page's budget: the total import time of the process,
+and modules the page must not import at all. The history is an empty
+temporary database and no form is submitted, so this is what a new worker
+pays before anyone has predicted or drawn a chart. The command exits with
+status 1 when a page is over budget.
+
+Usage::
+
+    python -m health_assistant.import_budget
+    python -m health_assistant.import_budget --page Home --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from health_assistant.models import ROOT
+
+# Total import time allowed per cold page render; streamlit itself accounts for most of it
+DEFAULT_BUDGET_MS = 1500
+
+# Imported only when a prediction, chart or table needs them
+HEAVY = ('sklearn', 'scipy', 'pandas', 'pyarrow', 'plotly.express', 'health_assistant.figures')
+
+# Page -> heavy modules it may import on a cold render with an empty history
+ALLOWED = {
+    'Home': (),
+    'Diabetes Prediction': (),
+    'Heart Disease Prediction': (),
+    'Parkinsons Prediction': (),
+    'Patient History': (),
+    # The stage latency table
+    'Admin': ('pandas', 'pyarrow'),
+}
+
+PROBE = """
+from streamlit.testing.v1 import AppTest
+with open({app!r}, encoding='utf-8') as f:
+    source = f.read().replace("DEFAULT_PAGE = 'Home'", "DEFAULT_PAGE = {page!r}")
+app = AppTest.from_string(source, default_timeout=120).run()
+if app.exception:
+    raise SystemExit(app.exception[0].message)
+"""
+
+
+def parse_importtime(report):
+    """Return ``{module: (self_us, cumulative_us, depth)}`` from ``-X importtime`` output."""
+    modules = {}
+    for line in report.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def probe(page):
+    """Render ``page`` cold in a subprocess and return its parsed import report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   HEALTH_ASSISTANT_HISTORY=os.path.join(tmp, 'history.db'),
+                   HEALTH_ASSISTANT_CACHE=os.path.join(tmp, 'cache.db'),
+                   HEALTH_ASSISTANT_METRICS_PORT='0')
+        out = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c',
+             PROBE.format(app=str(ROOT / "app.py"), page=page)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if out.returncode:
+        raise RuntimeError(f"rendering '{page}' failed:\n{out.stderr[-2000:]}")
+    return parse_importtime(out.stderr)
+
+
+def check(page, modules, budget_ms=DEFAULT_BUDGET_MS):
+    """Return ``(total_ms, problems)`` for one page's import report."""
+    total_ms = sum(self_us for self_us, _, _ in modules.values()) / 1e3
+    problems = []
+    if total_ms > budget_ms:
+        problems.append(f"imports took {total_ms:.0f} ms, budget {budget_ms} ms")
+    for name in HEAVY:
+        if name in modules and name not in ALLOWED[page]:
+            problems.append(f"imported {name} ({modules[name][1] / 1e3:.0f} ms)")
+    return total_ms, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of every app page.")
+    parser.add_argument('--page', action='append', choices=list(ALLOWED), help="default: every page")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=0, help="also list the N slowest top-level imports")
+    parser.add_argument('--json', help="write the per-page totals and problems to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for page in args.page or ALLOWED:
+        modules = probe(page)
+        total_ms, problems = check(page, modules, args.budget_ms)
+        results[page] = {'import_ms': round(total_ms, 1), 'modules': len(modules), 'problems': problems}
+        print(f"{page:<26} {total_ms:7.0f} ms  {len(modules):5d} modules  {'; '.join(problems) or 'ok'}")
+        if args.top:
+            top = sorted(((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 0),
+                         reverse=True)[:args.top]
+            for cumulative, name in top:
+                print(f"    {cumulative / 1e3:7.1f} ms  {name}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if any(result['problems'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
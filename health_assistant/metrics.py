@@ -0,0 +1,276 @@
+"""In-process counters, latency histograms and a sampling profiler.
+
+Everything here is standard library only and cheap enough to leave on in
+production: a ``span`` costs two ``perf_counter`` calls and one locked
+histogram update. ``render_prometheus`` formats the default registry in
+the Prometheus text exposition format; ``start_http_server`` serves it on
+a local port for processes (like Streamlit) that have no HTTP app of
+their own.
+"""
+import bisect
+import collections
+import http.server
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{name}{_format_labels(key)} {value:g}" for name, key, value in self.samples()]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def summary(self):
+        """Return ``{labels: (count, sum, p50, p99)}`` with quantiles read off the buckets."""
+        with self._lock:
+            series = {key: (list(counts), total, n) for key, (counts, total, n) in self._series.items()}
+        result = {}
+        for key, (counts, total, n) in series.items():
+            result[key] = (n, total, self._quantile(counts, n, 0.5), self._quantile(counts, n, 0.99))
+        return result
+
+    def _quantile(self, counts, n, q):
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= q * n:
+                return bound
+        return float('inf')
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, n) for key, (counts, total, n) in self._series.items()]
+        for key, counts, total, n in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {n}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help):
+        with self._lock:
+            return self.metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def register_collector(self, name, collect):
+        """Add ``collect()`` returning ``(metric, type, help, [(labels, value)])`` tuples at scrape time."""
+        with self._lock:
+            self.collectors[name] = collect
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines += metric.render()
+        for collect in list(self.collectors.values()):
+            for name, kind, help, samples in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_format_labels(_label_key(labels))} {value:g}" for labels, value in samples]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PREDICTIONS = REGISTRY.counter('health_assistant_predictions_total', "Predictions served, by model.")
+POSITIVES = REGISTRY.counter('health_assistant_prediction_positives_total', "Positive predictions, by model.")
+ERRORS = REGISTRY.counter('health_assistant_prediction_errors_total', "Predictions that raised, by model.")
+STAGE_SECONDS = REGISTRY.histogram('health_assistant_stage_seconds', "Wall time of pipeline stages.")
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time the ``with`` block into ``health_assistant_stage_seconds{stage=...}``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, **labels)
+
+
+def render_prometheus():
+    return REGISTRY.render()
+
+
+def cache_collector(cache):
+    def collect():
+        stats = cache.stats.snapshot()
+        return [
+            (f'health_assistant_cache_{key}_total', 'counter', f"Prediction cache {key}.", [({}, stats[key])])
+            for key in ('hits', 'misses', 'evictions', 'invalidations')
+        ]
+    return collect
+
+
+def figure_cache_collector(cache):
+    def collect():
+        stats = cache.stats.snapshot()
+        return [
+            (f'health_assistant_figure_cache_{key}_total', 'counter', f"Dashboard figure cache {key}.",
+             [({}, stats[key])])
+            for key in ('hits', 'misses', 'evictions')
+        ]
+    return collect
+
+
+def batching_collector(batcher):
+    def collect():
+        stats = batcher.stats()
+        return [
+            ('health_assistant_batch_requests_total', 'counter', "Rows predicted through the micro-batcher.",
+             [({'model': name}, s['requests']) for name, s in stats.items()]),
+            ('health_assistant_batches_total', 'counter', "Micro-batches flushed to predict.",
+             [({'model': name}, s['batches']) for name, s in stats.items()]),
+            ('health_assistant_batch_queue_wait_ms', 'gauge', "Mean time rows waited for their batch.",
+             [({'model': name}, s['mean_queue_wait_ms']) for name, s in stats.items()]),
+        ]
+    return collect
+
+
+def registry_collector(registry):
+    def collect():
+        status = registry.status()
+        shadowed = {name: s['shadow'] for name, s in status.items() if s['shadow'] is not None}
+        return [
+            ('health_assistant_model_switches_total', 'counter', "Model versions switched in without a restart.",
+             [({}, registry.switches)]),
+            ('health_assistant_shadow_rows_total', 'counter', "Rows scored by a shadowed candidate model.",
+             [({'model': name}, s['rows']) for name, s in shadowed.items()]),
+            ('health_assistant_shadow_agreement', 'gauge', "Share of shadowed rows where the candidate agreed.",
+             [({'model': name}, s['agreement']) for name, s in shadowed.items() if s['agreement'] is not None]),
+        ]
+    return collect
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """Serve ``/metrics`` from a daemon thread; returns the server, or ``None`` if the port is taken."""
+    try:
+        server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+class SamplingProfiler:
+    """Sample one thread's Python stack at a fixed interval into folded stacks.
+
+    ``folded()`` returns ``frame;frame;frame count`` lines, the input format
+    of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
@@ -0,0 +1,146 @@
+"""Model locations, dataset layouts and loading helpers."""
+import hashlib
+import pickle
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+from health_assistant.metrics import span
+from health_assistant.schema import SCHEMAS
+
+ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = ROOT / "saved models"
+DATASETS_DIR = ROOT / "Datasets"
+
+# Pickled estimators shipped in saved models/
+MODEL_FILES = {
+    'diabetes': MODELS_DIR / "diabetes_model.sav",
+    'heart': MODELS_DIR / "heart_disease_model.sav",
+    'parkinsons': MODELS_DIR / "parkinsons_model.sav",
+}
+
+# Training data, one CSV per model
+DATASET_FILES = {
+    'diabetes': DATASETS_DIR / "diabetes.csv",
+    'heart': DATASETS_DIR / "heart_disease_data.csv",
+    'parkinsons': DATASETS_DIR / "parkinsons.csv",
+}
+
+# Label column of each dataset
+TARGET_COLUMNS = {
+    'diabetes': 'Outcome',
+    'heart': 'target',
+    'parkinsons': 'status',
+}
+
+# Feature columns in the order the models were fitted on
+FEATURE_COLUMNS = {name: schema.columns for name, schema in SCHEMAS.items()}
+
+# Display names used in the patient history
+DISEASE_NAMES = {
+    'diabetes': 'Diabetes',
+    'heart': 'Heart Disease',
+    'parkinsons': 'Parkinsons',
+}
+
+
+def read_model(name, path=None):
+    """Unpickle ``name`` from ``path`` (default: its serving file); returns the model and the SHA-256 of its bytes."""
+    path = MODEL_FILES[name] if path is None else path
+    with span('model_load', model=name, format='pickle'):
+        with open(path, 'rb') as f:
+            data = f.read()
+        return pickle.loads(data), hashlib.sha256(data).hexdigest()
+
+
+def load_model(name):
+    return read_model(name)[0]
+
+
+class LoadedDigests:
+    """``get(name)`` is the SHA-256 of what the model serving ``name`` was loaded from, loading it if needed.
+
+    ``PredictionCache`` is keyed on it. The file on disk may since have been
+    replaced, but the labels are still computed by the model in memory.
+    """
+
+    def __init__(self, models):
+        self.models = models
+
+    def get(self, name):
+        return self.models.digest(name)
+
+
+class ObjectDigests:
+    """``get(name)`` for a plain mapping of models that were not loaded through ``read_model``.
+
+    NumPy exports keep the hash of their arrays; other models are hashed as
+    they pickle now. Each model object is hashed once.
+    """
+
+    def __init__(self, models):
+        self.models = models
+        self._hashes = {}
+
+    def get(self, name):
+        model = self.models[name]
+        cached = self._hashes.get(name)
+        if cached is None or cached[0] is not model:
+            sha256 = getattr(model, 'sha256', None) or hashlib.sha256(pickle.dumps(model)).hexdigest()
+            cached = (model, sha256)
+            self._hashes[name] = cached
+        return cached[1]
+
+
+def digests_of(models):
+    """What keys caches for ``models``: its load-time ``digests`` if it has them, else ``ObjectDigests``."""
+    digests = getattr(models, 'digests', None)
+    return digests if digests is not None else ObjectDigests(models)
+
+
+class LazyModels(Mapping):
+    """Mapping of model name to model that loads each model on first access.
+
+    Pages and endpoints that never touch a model never pay for loading it.
+    ``loader`` is called with the model name, once per name, and returns
+    the model and the SHA-256 of what it was loaded from.
+    """
+
+    def __init__(self, loader=read_model, names=None):
+        self._loader = loader
+        self._names = list(names if names is not None else MODEL_FILES)
+        self._loaded = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.digests = LoadedDigests(self)
+
+    def __getitem__(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        if name not in self._names:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name], self._digests[name] = self._loader(name)
+        return self._loaded[name]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def digest(self, name):
+        self[name]
+        return self._digests[name]
+
+
+def load_models(lazy=True):
+    if lazy:
+        return LazyModels()
+    return {name: load_model(name) for name in MODEL_FILES}
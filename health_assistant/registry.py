@@ -0,0 +1,523 @@
+"""Model versions, hot reload and shadow scoring over ``saved models/``.
+
+``saved models/`` holds two kinds of file. ``MODEL_FILES`` are the files
+the models are served from. Versioned artifacts
+``<model>-<version>.sav`` are written next to them by
+``health_assistant.training`` and ``health_assistant.streaming`` and
+described in ``manifest.json``. ``ModelRegistry`` replaces
+``load_models()``. It is a mapping of model name to a ``ServedModel`` handle,
+and the handle's ``predict`` and ``decision_function`` go to whichever
+version is active when the call starts:
+
+* A watchdog observer on the directory notices when a serving file is
+  replaced, by ``training --promote``, ``promote`` below or a plain copy.
+  The new file is unpickled in a background thread and warmed on the first
+  rows of its dataset while the old version keeps serving. The switch is
+  then a single reference assignment. A call in flight finishes on the
+  version it started with, and no call sees a half-loaded model. Every
+  worker process watching the directory switches the same way, without a
+  restart.
+* In shadow mode, the newest versioned artifact written after the active
+  version was installed becomes the model's candidate. Older artifacts,
+  such as the one just promoted from, are never candidates. A sample of live
+  ``predict`` calls is run again on the candidate, on a background thread
+  and off the request path. ``ShadowStats`` compares its labels and
+  latency with the active version. ``promote`` copies the candidate over
+  the serving file. With ``auto_promote``, this happens once the candidate
+  has agreed on ``MIN_SHADOW_ROWS`` rows within the ``MIN_AGREEMENT`` and
+  ``MAX_LATENCY_RATIO`` gates.
+
+Usage::
+
+    python -m health_assistant.registry
+    python -m health_assistant.registry promote heart 20250101T120000Z
+"""
+import argparse
+import collections
+import csv
+import datetime
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from health_assistant.metrics import span
+from health_assistant.models import DATASET_FILES, MODEL_FILES, MODELS_DIR, LoadedDigests, read_model
+from health_assistant.schema import SCHEMAS
+
+MANIFEST_PATH = MODELS_DIR / "manifest.json"
+
+# Dataset rows each new version predicts before it takes traffic
+WARMUP_ROWS = 64
+# Writers replace files in several steps; wait for the directory to settle before reloading
+DEBOUNCE_SECONDS = 0.5
+
+DEFAULT_SHADOW_RATE = 0.1
+# Sampled calls waiting for the candidate beyond this are skipped, not queued
+MAX_SHADOW_BACKLOG = 32
+MIN_SHADOW_ROWS = 200
+MIN_AGREEMENT = 0.95
+MAX_LATENCY_RATIO = 2.0
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {'models': {}}
+
+
+def save_manifest(manifest):
+    tmp = MANIFEST_PATH.with_suffix('.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def versioned_path(name, version):
+    stem = MODEL_FILES[name].stem
+    return MODELS_DIR / f"{stem}-{version}.sav"
+
+
+def promote_version(name, path):
+    """Atomically replace the serving file of ``name`` with ``path`` and refresh its NumPy export."""
+    from health_assistant.fastpath import export
+
+    tmp = MODEL_FILES[name].with_suffix('.sav.tmp')
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, MODEL_FILES[name])
+    export(name)
+
+
+def artifacts(name):
+    """Versioned artifacts of ``name`` on disk, newest first."""
+    stem = MODEL_FILES[name].stem
+    return sorted(MODELS_DIR.glob(f"{stem}-*.sav"), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+
+
+def versions(name):
+    """Manifest entries and untracked artifacts of ``name``, newest first, each with its hash and status."""
+    entries = {entry['file']: dict(entry) for entry in load_manifest()['models'].get(name, {}).get('versions', [])}
+    serving = file_digest(MODEL_FILES[name]) if MODEL_FILES[name].exists() else None
+    listed = []
+    for path in artifacts(name):
+        entry = entries.pop(path.name, None) or {'version': path.stem.rsplit('-', 1)[-1], 'file': path.name}
+        entry['sha256'] = file_digest(path)
+        entry['serving'] = entry['sha256'] == serving
+        listed.append(entry)
+    # Manifest entries whose artifact was deleted
+    listed += [dict(entry, sha256=entry.get('sha256'), serving=False, missing=True) for entry in entries.values()]
+    return listed
+
+
+def _warmup_matrix(name, rows=WARMUP_ROWS):
+    schema = SCHEMAS[name]
+    # utf-8-sig strips the BOM that heart_disease_data.csv starts with
+    with open(DATASET_FILES[name], newline='', encoding='utf-8-sig') as f:
+        records = [{column: float(record[column]) for column in schema.columns}
+                   for _, record in zip(range(rows), csv.DictReader(f))]
+    return schema.assemble(records)
+
+
+class ModelVersion:
+    """One loaded and warmed artifact."""
+
+    def __init__(self, name, path, sha256, model, load_seconds, warmup_ms, mtime_ns=0):
+        self.name = name
+        self.path = path
+        self.sha256 = sha256
+        # When the file was written; candidates must be newer
+        self.mtime_ns = mtime_ns
+        self.model = model
+        self.load_seconds = load_seconds
+        self.warmup_ms = warmup_ms
+        self.loaded = datetime.datetime.now().isoformat(timespec='seconds')
+
+    @classmethod
+    def load(cls, name, path, loader=read_model):
+        """Load ``path`` and predict the first dataset rows with it; raises if it cannot serve ``name``."""
+        started = time.perf_counter()
+        mtime_ns = os.stat(path).st_mtime_ns
+        model, sha256 = loader(name, path)
+        load_seconds = time.perf_counter() - started
+        X = SCHEMAS[name].frame(_warmup_matrix(name))
+        # The first call pays one-off setup (validation caches, BLAS threads); time the second
+        model.predict(X)
+        started = time.perf_counter()
+        labels = np.asarray(model.predict(X))
+        warmup_ms = 1e3 * (time.perf_counter() - started)
+        if labels.shape != (len(X),) or not np.isin(labels, (0, 1)).all():
+            raise ValueError(f"{path.name} does not predict 0/1 labels for {name}")
+        return cls(name, path, sha256, model, load_seconds, warmup_ms, mtime_ns)
+
+    def describe(self):
+        return {'file': self.path.name, 'sha256': self.sha256, 'loaded': self.loaded,
+                'load_seconds': self.load_seconds, 'warmup_ms': self.warmup_ms}
+
+
+class ShadowStats:
+    """Agreement and latency of a candidate against the active version on the same calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows = 0
+        self.agreeing = 0
+        self.errors = 0
+        self.skipped = 0
+        self.active_seconds = 0.0
+        self.candidate_seconds = 0.0
+
+    def record(self, rows, agreeing, active_seconds, candidate_seconds):
+        with self._lock:
+            self.calls += 1
+            self.rows += rows
+            self.agreeing += agreeing
+            self.active_seconds += active_seconds
+            self.candidate_seconds += candidate_seconds
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'rows': self.rows,
+                'errors': self.errors,
+                'skipped': self.skipped,
+                'agreement': self.agreeing / self.rows if self.rows else None,
+                'active_ms': 1e3 * self.active_seconds / self.calls if self.calls else None,
+                'candidate_ms': 1e3 * self.candidate_seconds / self.calls if self.calls else None,
+                'latency_ratio': self.candidate_seconds / self.active_seconds if self.active_seconds else None,
+            }
+
+    def verdict(self, min_rows=MIN_SHADOW_ROWS, min_agreement=MIN_AGREEMENT, max_latency_ratio=MAX_LATENCY_RATIO):
+        """``(ready, reason)``: whether the candidate passed the promotion gates."""
+        stats = self.snapshot()
+        if stats['errors']:
+            return False, f"{stats['errors']} shadow calls raised"
+        if stats['rows'] < min_rows:
+            return False, f"{stats['rows']} of {min_rows} rows compared"
+        if stats['agreement'] < min_agreement:
+            return False, f"agreement {stats['agreement']:.1%} is below {min_agreement:.0%}"
+        if stats['latency_ratio'] > max_latency_ratio:
+            return False, f"{stats['latency_ratio']:.2f}x the active latency, limit {max_latency_ratio:.1f}x"
+        return True, f"agreement {stats['agreement']:.1%}, {stats['latency_ratio']:.2f}x the active latency"
+
+
+class ServedModel:
+    """Stable handle on one model; each call runs on the version active when it starts."""
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.active = None
+        self.candidate = None
+        self.shadow = ShadowStats()
+        self._lock = threading.Lock()
+
+    def current(self):
+        version = self.active
+        if version is None:
+            # Loaded on first use, so pages that never predict never unpickle the model
+            with self._lock:
+                if self.active is None:
+                    self.active = self.registry.load_version(self.name, self.registry.files[self.name])
+            version = self.active
+        return version
+
+    def predict(self, X):
+        version = self.current()
+        candidate = self.candidate
+        started = time.perf_counter()
+        labels = version.model.predict(X)
+        if candidate is not None:
+            self.registry.shadow(self, candidate, X, labels, time.perf_counter() - started)
+        return labels
+
+    def decision_function(self, X):
+        return self.current().model.decision_function(X)
+
+    def __getattr__(self, attr):
+        # Fitted attributes such as classes_ or coef_ come from the active version
+        if attr.startswith('_') or attr in ('active', 'candidate', 'registry'):
+            raise AttributeError(attr)
+        return getattr(self.current().model, attr)
+
+    def __repr__(self):
+        active = self.active.sha256[:12] if self.active is not None else 'not loaded'
+        return f"ServedModel({self.name!r}, {active})"
+
+
+class ModelRegistry(Mapping):
+    """Mapping of model name to ``ServedModel``, kept in step with ``saved models/``.
+
+    ``start()`` begins watching the directory; ``check()`` does the same
+    work once, synchronously. ``shadow`` sends ``shadow_rate`` of the
+    ``predict`` calls to a candidate as well. ``loader(name, path)`` returns
+    the model and the SHA-256 of the bytes it read.
+    """
+
+    def __init__(self, loader=read_model, shadow=False, shadow_rate=DEFAULT_SHADOW_RATE, auto_promote=False):
+        self.files = dict(MODEL_FILES)
+        self.loader = loader
+        self.shadow_enabled = shadow
+        self.shadow_rate = shadow_rate
+        self.auto_promote = auto_promote
+        self.switches = 0
+        self.events = collections.deque(maxlen=50)
+        self._served = {name: ServedModel(self, name) for name in self.files}
+        self.digests = LoadedDigests(self)
+        self._rejected = set()
+        self._check_lock = threading.Lock()
+        self._timer = None
+        self._observer = None
+        self._shadow_pool = ThreadPoolExecutor(1, thread_name_prefix='shadow')
+        self._backlog = 0
+        self._backlog_lock = threading.Lock()
+
+    def __getitem__(self, name):
+        return self._served[name]
+
+    def __iter__(self):
+        return iter(self._served)
+
+    def __len__(self):
+        return len(self._served)
+
+    def is_loaded(self, name):
+        return self._served[name].active is not None
+
+    def digest(self, name):
+        return self._served[name].current().sha256
+
+    def _log(self, name, message):
+        self.events.append((datetime.datetime.now().isoformat(timespec='seconds'), name, message))
+
+    def load_version(self, name, path):
+        with span('model_warmup', model=name):
+            return ModelVersion.load(name, path, self.loader)
+
+    def switch(self, name, version):
+        """Serve ``version`` from now on; calls already running finish on the old one."""
+        served = self._served[name]
+        previous = served.active
+        served.active = version
+        if served.candidate is not None and served.candidate.sha256 == version.sha256:
+            served.candidate = None
+        self.switches += 1
+        self._log(name, f"switched {previous.sha256[:12] if previous else 'nothing'} -> {version.sha256[:12]} "
+                        f"(load {version.load_seconds:.2f}s, warm-up {version.warmup_ms:.1f} ms)")
+
+    def check(self):
+        """Reload replaced serving files and, in shadow mode, pick up new candidates."""
+        with self._check_lock:
+            for name, served in self._served.items():
+                self._check_serving(name, served)
+                if self.shadow_enabled:
+                    self._check_candidate(name, served)
+
+    def _check_serving(self, name, served):
+        path = self.files[name]
+        # Not loaded yet: the first call will read whatever the file holds then
+        if served.active is None or not path.exists():
+            return
+        sha256 = file_digest(path)
+        if sha256 == served.active.sha256:
+            return
+        candidate = served.candidate
+        if candidate is not None and candidate.sha256 == sha256:
+            # The shadowed candidate was promoted; it is loaded and warm already
+            self.switch(name, candidate)
+            return
+        try:
+            version = self.load_version(name, path)
+        except Exception as e:
+            self._log(name, f"kept {served.active.sha256[:12]}: {path.name} failed to load ({e})")
+            return
+        self.switch(name, version)
+
+    def _check_candidate(self, name, served):
+        active = served.current()
+        # Newest first; stop at the active version, or at anything written before it was installed
+        for path in artifacts(name):
+            if path.stat().st_mtime_ns <= active.mtime_ns:
+                return
+            sha256 = file_digest(path)
+            if sha256 == active.sha256:
+                return
+            if sha256 in self._rejected:
+                continue
+            if served.candidate is not None and served.candidate.sha256 == sha256:
+                return
+            try:
+                candidate = self.load_version(name, path)
+            except Exception as e:
+                self._rejected.add(sha256)
+                self._log(name, f"ignored candidate {path.name}: {e}")
+                return
+            served.shadow = ShadowStats()
+            served.candidate = candidate
+            self._log(name, f"shadowing {path.name} ({sha256[:12]}) on {self.shadow_rate:.0%} of calls")
+            return
+
+    def shadow(self, served, candidate, X, labels, active_seconds):
+        """Queue a sampled call for the candidate; never blocks or fails the live call."""
+        if random.random() >= self.shadow_rate:
+            return
+        with self._backlog_lock:
+            if self._backlog >= MAX_SHADOW_BACKLOG:
+                served.shadow.add(skipped=1)
+                return
+            self._backlog += 1
+        self._shadow_pool.submit(self._run_shadow, served, candidate, X, np.asarray(labels), active_seconds)
+
+    def _run_shadow(self, served, candidate, X, labels, active_seconds):
+        try:
+            started = time.perf_counter()
+            shadow_labels = np.asarray(candidate.model.predict(X))
+            elapsed = time.perf_counter() - started
+            # A promotion or a newer candidate may have replaced it meanwhile
+            if served.candidate is candidate:
+                served.shadow.record(len(labels), int((shadow_labels == labels).sum()), active_seconds, elapsed)
+                if self.auto_promote and served.shadow.verdict()[0]:
+                    self.promote(served.name)
+        except Exception as e:
+            served.shadow.add(errors=1)
+            self._log(served.name, f"shadow call failed: {e}")
+        finally:
+            with self._backlog_lock:
+                self._backlog -= 1
+
+    def discard(self, name):
+        """Stop shadowing the current candidate and do not pick it up again."""
+        served = self._served[name]
+        candidate, served.candidate = served.candidate, None
+        if candidate is not None:
+            self._rejected.add(candidate.sha256)
+            self._log(name, f"discarded candidate {candidate.path.name}")
+
+    def promote(self, name, version=None):
+        """Make the shadowed candidate, or the artifact of ``version``, the serving file and switch to it.
+
+        Other processes watching the directory switch when they see the
+        replaced file.
+        """
+        served = self._served[name]
+        if version is None:
+            if served.candidate is None:
+                raise ValueError(f"{name} has no candidate to promote")
+            path = served.candidate.path
+            verdict = served.shadow.verdict()[1]
+        else:
+            path = versioned_path(name, version)
+            if not path.exists():
+                raise ValueError(f"no artifact {path.name}")
+            verdict = "promoted by hand"
+        promote_version(name, path)
+        manifest = load_manifest()
+        entry = manifest['models'].get(name)
+        if entry is not None and any(v['file'] == path.name for v in entry['versions']):
+            entry['active'] = next(v['version'] for v in entry['versions'] if v['file'] == path.name)
+            save_manifest(manifest)
+        self._log(name, f"promoted {path.name}: {verdict}")
+        with self._check_lock:
+            self._check_serving(name, served)
+
+    def status(self):
+        """Per model: the active version, the candidate and its shadow comparison."""
+        status = {}
+        for name, served in self._served.items():
+            status[name] = {
+                'active': served.active.describe() if served.active is not None else None,
+                'candidate': served.candidate.describe() if served.candidate is not None else None,
+                'shadow': served.shadow.snapshot() if served.candidate is not None else None,
+                'verdict': served.shadow.verdict()[1] if served.candidate is not None else None,
+            }
+        return status
+
+    def _schedule_check(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(DEBOUNCE_SECONDS, self.check)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def start(self):
+        """Watch the models directory in a background thread; returns ``self``."""
+        if self._observer is not None:
+            return self
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        registry = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')]
+                if any(str(path).endswith('.sav') for path in paths):
+                    registry._schedule_check()
+
+        directories = {str(path.parent) for path in self.files.values()}
+        self._observer = Observer()
+        self._observer.daemon = True
+        for directory in directories:
+            self._observer.schedule(Handler(), directory, recursive=False)
+        self._observer.start()
+        return self
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._timer is not None:
+            self._timer.cancel()
+        self._shadow_pool.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or promote versions of the saved models.")
+    commands = parser.add_subparsers(dest='command')
+    list_parser = commands.add_parser('list', help="versions on disk and which one is serving (default)")
+    list_parser.add_argument('models', nargs='*', default=list(MODEL_FILES))
+    promote_parser = commands.add_parser('promote', help="make a version the serving file")
+    promote_parser.add_argument('model', choices=list(MODEL_FILES))
+    promote_parser.add_argument('version', help="the <version> of saved models/<model>-<version>.sav")
+    args = parser.parse_args(argv)
+
+    if args.command == 'promote':
+        try:
+            ModelRegistry().promote(args.model, args.version)
+        except ValueError as e:
+            parser.exit(1, f"error: {e}\n")
+        print(f"{args.model}: serving {versioned_path(args.model, args.version).name}")
+        return
+    for name in getattr(args, 'models', list(MODEL_FILES)):
+        serving = file_digest(MODEL_FILES[name])
+        print(f"{name}: serving {MODEL_FILES[name].name} ({serving[:12]})")
+        for entry in versions(name):
+            accuracy = entry.get('metrics', {}).get('accuracy')
+            print(f"  {'*' if entry['serving'] else ' '} {entry['version']:<18} "
+                  f"{(entry['sha256'] or '')[:12]:<12} {'' if accuracy is None else f'accuracy {accuracy:.3f}'}"
+                  f"{' (missing)' if entry.get('missing') else ''}")
+
+
+if __name__ == '__main__':
+    main()
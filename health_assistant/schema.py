@@ -0,0 +1,219 @@
+"""Declarative feature schemas and a vectorized input assembler.
+
+Each model's inputs are described once, in ``Datasets/`` column order: name,
+form label, integer or float, allowed range and, for coded categorical
+inputs, the label of every code. ``Schema.assemble`` turns a dict, a list of
+dicts, positional rows or a DataFrame into one contiguous float64 matrix and
+validates it with whole-array comparisons, so the Streamlit forms, batch
+scoring and the HTTP API share one conversion instead of building lists row
+by row.
+"""
+import numpy as np
+
+
+class SchemaError(ValueError):
+    pass
+
+
+class Feature:
+    def __init__(self, name, label=None, dtype='float', min=None, max=None, categories=None):
+        self.name = name
+        self.label = label or name
+        self.dtype = dtype
+        # code -> display label, e.g. {0: 'Female', 1: 'Male'}
+        self.categories = dict(categories) if categories else None
+        codes = sorted(self.categories) if self.categories else [None]
+        self.min = codes[0] if min is None else min
+        self.max = codes[-1] if max is None else max
+
+    def format_option(self, code):
+        """Display text for a categorical code, as shown in the form selectboxes."""
+        return f"{code}: {self.categories[code]}"
+
+    def decode(self, value):
+        """Map ``'1: Male'``, ``'Male'`` or ``1`` to the numeric code."""
+        if isinstance(value, str) and self.categories:
+            text = value.strip()
+            head, sep, _ = text.partition(':')
+            if sep and head.strip().lstrip('-').isdigit():
+                return int(head)
+            for code, label in self.categories.items():
+                if label.lower() == text.lower():
+                    return code
+            raise SchemaError(f"{self.name}: unknown option '{value}'")
+        return value
+
+    def __repr__(self):
+        bounds = f"[{self.min}, {self.max}]" if self.min is not None or self.max is not None else ''
+        return f"Feature({self.name!r}, {self.dtype}{bounds})"
+
+
+class Schema:
+    def __init__(self, name, features):
+        self.name = name
+        self.features = list(features)
+        self.columns = [feature.name for feature in self.features]
+        self._by_name = {feature.name: feature for feature in self.features}
+        self._mins = np.array([-np.inf if f.min is None else f.min for f in self.features], dtype=np.float64)
+        self._maxs = np.array([np.inf if f.max is None else f.max for f in self.features], dtype=np.float64)
+        self._integer = np.array([f.dtype == 'int' for f in self.features])
+        self._categorical = [i for i, f in enumerate(self.features) if f.categories]
+
+    def __getitem__(self, column):
+        return self._by_name[column]
+
+    def __len__(self):
+        return len(self.features)
+
+    def assemble(self, data, validate=True):
+        """Return a C-contiguous ``(rows, features)`` float64 matrix for ``data``.
+
+        ``data`` may be one record (a dict keyed by column name, or a flat
+        sequence of values in column order), a list of such records, a 2-D
+        array or a DataFrame with at least the schema's columns. Categorical
+        values may be given as codes or as their option text.
+        """
+        if hasattr(data, 'columns'):
+            X, index = self._from_frame(data), data.index
+        elif isinstance(data, dict):
+            X, index = self._from_records([data]), None
+        else:
+            rows = data if isinstance(data, np.ndarray) else list(data)
+            if len(rows) and not isinstance(rows[0], (dict, list, tuple, np.ndarray)):
+                rows = [rows]
+            if len(rows) and isinstance(rows[0], dict):
+                if not all(isinstance(row, dict) for row in rows):
+                    raise SchemaError("rows must be all objects or all lists")
+                X = self._from_records(rows)
+            else:
+                X = self._to_float(rows, "positional rows")
+                if X.ndim != 2 or X.shape[1] != len(self):
+                    raise SchemaError(f"{self.name} rows must have {len(self)} values in the order "
+                                      f"{', '.join(self.columns)}")
+            index = None
+        if not len(X):
+            raise SchemaError(f"no {self.name} rows to assemble")
+        if validate:
+            self.validate(X, index)
+        return np.ascontiguousarray(X)
+
+    def _from_frame(self, frame):
+        from pandas.api.types import is_numeric_dtype
+
+        missing = [col for col in self.columns if col not in frame.columns]
+        if missing:
+            raise SchemaError(f"{self.name} input is missing columns: {', '.join(missing)}")
+        selected = frame[self.columns]
+        text = [i for i in self._categorical if not is_numeric_dtype(selected.dtypes.iloc[i])]
+        if text:
+            selected = selected.copy()
+            for i in text:
+                feature = self.features[i]
+                selected[feature.name] = selected[feature.name].map(feature.decode)
+        return self._to_float(selected, "columns")
+
+    def _from_records(self, records):
+        columns = []
+        for i, feature in enumerate(self.features):
+            try:
+                values = [record[feature.name] for record in records]
+            except KeyError:
+                row = next(r for r, record in enumerate(records) if feature.name not in record)
+                missing = [col for col in self.columns if col not in records[row]]
+                raise SchemaError(f"row {row} is missing columns: {', '.join(missing)}") from None
+            if i in self._categorical and any(isinstance(value, str) for value in values):
+                values = [feature.decode(value) for value in values]
+            columns.append(values)
+        return self._to_float(columns, "values").T
+
+    def _to_float(self, values, what):
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"non-numeric {self.name} {what}: {e}") from None
+
+    def validate(self, X, index=None):
+        """Check finiteness, ranges and integer codes on the whole matrix at once."""
+        problems = ~np.isfinite(X) | (X < self._mins) | (X > self._maxs)
+        problems[:, self._integer] |= X[:, self._integer] != np.round(X[:, self._integer])
+        if not problems.any():
+            return
+        row, col = np.argwhere(problems)[0]
+        feature, value = self.features[col], X[row, col]
+        if not np.isfinite(value):
+            reason = "is missing or not finite"
+        elif feature.dtype == 'int' and value != round(value):
+            reason = "must be a whole number"
+        elif feature.min is not None and value < feature.min:
+            reason = f"must be at least {feature.min}"
+        else:
+            reason = f"must be at most {feature.max}"
+        label = index[row] if index is not None else row
+        raise SchemaError(f"row {label}: {feature.name}={value:g} {reason} "
+                          f"({int(problems.any(axis=1).sum())} invalid rows)")
+
+    def frame(self, X):
+        """Wrap an assembled matrix in a DataFrame with the model's feature names."""
+        import pandas as pd
+
+        return pd.DataFrame(X, columns=self.columns, copy=False)
+
+
+YES_NO = {0: 'No', 1: 'Yes'}
+
+SCHEMAS = {
+    'diabetes': Schema('diabetes', [
+        Feature('Pregnancies', 'Number of Pregnancies', 'int', 0, 20),
+        Feature('Glucose', 'Glucose Level (mg/dL)', 'int', 0, 300),
+        Feature('BloodPressure', 'Blood Pressure (mm Hg)', 'int', 0, 200),
+        Feature('SkinThickness', 'Skin Thickness (mm)', 'int', 0, 100),
+        Feature('Insulin', 'Insulin Level (mu U/ml)', 'int', 0, 900),
+        Feature('BMI', 'BMI', 'float', 0.0, 70.0),
+        Feature('DiabetesPedigreeFunction', 'Diabetes Pedigree Function', 'float', 0.0, 3.0),
+        Feature('Age', 'Age', 'int', 0, 120),
+    ]),
+    'heart': Schema('heart', [
+        Feature('age', 'Age', 'int', 0, 120),
+        Feature('sex', 'Sex', 'int', categories={0: 'Female', 1: 'Male'}),
+        Feature('cp', 'Chest Pain Type', 'int', categories={
+            0: 'Typical Angina', 1: 'Atypical Angina', 2: 'Non-anginal Pain', 3: 'Asymptomatic'}),
+        Feature('trestbps', 'Resting Blood Pressure (mm Hg)', 'int', 0, 200),
+        Feature('chol', 'Serum Cholesterol (mg/dl)', 'int', 0, 600),
+        Feature('fbs', 'Fasting Blood Sugar > 120 mg/dl', 'int', categories=YES_NO),
+        Feature('restecg', 'Resting ECG Results', 'int', categories={
+            0: 'Normal', 1: 'ST-T Wave Abnormality', 2: 'Left Ventricular Hypertrophy'}),
+        Feature('thalach', 'Maximum Heart Rate', 'int', 0, 250),
+        Feature('exang', 'Exercise Induced Angina', 'int', categories=YES_NO),
+        Feature('oldpeak', 'ST Depression Induced by Exercise', 'float', 0.0, 10.0),
+        Feature('slope', 'Slope of Peak Exercise ST Segment', 'int', categories={
+            0: 'Upsloping', 1: 'Flat', 2: 'Downsloping'}),
+        Feature('ca', 'Number of Major Vessels', 'int', 0, 4),
+        # The dataset also uses code 3; the form only offers the first three
+        Feature('thal', 'Thalassemia', 'int', max=3, categories={
+            0: 'Normal', 1: 'Fixed Defect', 2: 'Reversible Defect'}),
+    ]),
+    'parkinsons': Schema('parkinsons', [
+        Feature('MDVP:Fo(Hz)', 'Average Vocal Fundamental Frequency (Hz)', min=0.0),
+        Feature('MDVP:Fhi(Hz)', 'Maximum Vocal Fundamental Frequency (Hz)', min=0.0),
+        Feature('MDVP:Flo(Hz)', 'Minimum Vocal Fundamental Frequency (Hz)', min=0.0),
+        Feature('MDVP:Jitter(%)', 'Jitter Percentage (%)', min=0.0),
+        Feature('MDVP:Jitter(Abs)', 'Absolute Jitter', min=0.0),
+        Feature('MDVP:RAP', 'Relative Amplitude Perturbation', min=0.0),
+        Feature('MDVP:PPQ', 'Period Perturbation Quotient', min=0.0),
+        Feature('Jitter:DDP', 'Average Absolute Difference', min=0.0),
+        Feature('MDVP:Shimmer', 'MDVP:Shimmer', min=0.0),
+        Feature('MDVP:Shimmer(dB)', 'MDVP:Shimmer(dB)', min=0.0),
+        Feature('Shimmer:APQ3', 'Shimmer:APQ3', min=0.0),
+        Feature('Shimmer:APQ5', 'Shimmer:APQ5', min=0.0),
+        Feature('MDVP:APQ', 'MDVP:APQ', min=0.0),
+        Feature('Shimmer:DDA', 'Shimmer:DDA', min=0.0),
+        Feature('NHR', 'Noise to Harmonic Ratio', min=0.0),
+        Feature('HNR', 'Harmonic to Noise Ratio'),
+        Feature('RPDE', 'RPDE', min=0.0, max=1.0),
+        Feature('DFA', 'DFA', min=0.0, max=1.0),
+        Feature('spread1', 'Spread1'),
+        Feature('spread2', 'Spread2', min=0.0),
+        Feature('D2', 'D2', min=0.0),
+        Feature('PPE', 'PPE', min=0.0, max=1.0),
+    ]),
+}
@@ -0,0 +1,352 @@
+"""Calibrated risk scores and threshold statistics for the three models.
+
+``predict`` only gives hard labels. ``ScoringEngine`` returns for each row:
+
+* the model's decision score, from ``decision_function``;
+* a probability. For logistic models, such as the heart
+  LogisticRegression, it is the model's own probability. For the linear
+  SVCs, which have no ``predict_proba``, it is a Platt sigmoid fitted to
+  the served model's decision scores on its bundled dataset;
+* a label, either the model's own or the probability against a threshold.
+
+``score_all`` runs several models on one record in one call. It assembles
+and validates the union of their columns once and hands each model its
+slice of the same matrix.
+
+Each model's ``ModelProfile`` holds the calibration and the sorted
+probabilities of the positive and negative cases in ``Datasets/``.
+Confusion counts at any threshold are therefore two binary searches, so the
+UI and batch jobs can re-threshold without scoring again. The models were
+trained on these datasets, so the statistics are in-sample.
+``health_assistant.training`` records cross-validated metrics in
+``saved models/manifest.json``. The served model is calibrated as it is, without refitting, because
+refitting the unscaled linear SVCs for cross-validation takes tens of
+seconds. Profiles are built from the model object that is serving, so the
+NumPy exports are profiled without importing scikit-learn and a registry
+profiles the version it has switched to. They are memoized on disk by
+``joblib.Memory``, keyed on the SHA-256 the model was loaded from and on
+that of the dataset.
+
+Usage::
+
+    python -m health_assistant.scoring
+    python -m health_assistant.scoring heart --step 0.05
+"""
+import argparse
+import functools
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+from joblib import Memory
+
+from health_assistant.models import DATASET_FILES, MODEL_FILES, ROOT, TARGET_COLUMNS, digests_of, load_models
+from health_assistant.schema import SCHEMAS, Schema
+
+CACHE_DIR = ROOT / ".cache" / "scoring"
+DEFAULT_THRESHOLD = 0.5
+
+
+def _sigmoid(scores, a, b):
+    # P(positive) = 1 / (1 + exp(a * score + b)), clipped so exp cannot overflow
+    return 1.0 / (1.0 + np.exp(np.clip(a * np.asarray(scores, dtype=np.float64) + b, -500, 500)))
+
+
+def fit_platt(scores, y, max_iter=100):
+    """Fit Platt's sigmoid to decision ``scores`` by Newton's method and return ``(a, b)``.
+
+    Targets are Platt's smoothed labels, ``(N+ + 1) / (N+ + 2)`` and
+    ``1 / (N- + 2)``, which keep a well-separated dataset from driving the
+    slope to infinity.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    y = np.asarray(y)
+    positives = int((y == 1).sum())
+    negatives = len(y) - positives
+    target = np.where(y == 1, (positives + 1) / (positives + 2), 1 / (negatives + 2))
+    a, b = 0.0, float(np.log((negatives + 1) / (positives + 1)))
+    for _ in range(max_iter):
+        p = _sigmoid(scores, a, b)
+        weight = np.maximum(p * (1 - p), 1e-12)
+        gradient = np.array([((target - p) * scores).sum(), (target - p).sum()])
+        hessian = np.array([[(weight * scores * scores).sum() + 1e-12, (weight * scores).sum()],
+                            [(weight * scores).sum(), weight.sum() + 1e-12]])
+        step = np.linalg.solve(hessian, gradient)
+        a, b = a - step[0], b - step[1]
+        if np.abs(step).max() < 1e-10:
+            break
+    return float(a), float(b)
+
+
+class ModelProfile:
+    """Calibration and threshold statistics of one model on its dataset."""
+
+    def __init__(self, name, method, a, b, positives, negatives, metrics):
+        self.name = name
+        # 'logistic': the model's own predict_proba; 'platt': sigmoid fitted on decision scores
+        self.method = method
+        self.a = a
+        self.b = b
+        self.positives = np.sort(positives)
+        self.negatives = np.sort(negatives)
+        self.metrics = metrics
+
+    def probability(self, scores):
+        return _sigmoid(scores, self.a, self.b)
+
+    def confusion(self, threshold):
+        """Counts and rates on the dataset when ``probability >= threshold`` is labelled positive.
+
+        ``threshold`` may be a scalar or an array; the values have the same shape.
+        """
+        threshold = np.asarray(threshold, dtype=np.float64)
+        tp = len(self.positives) - np.searchsorted(self.positives, threshold, side='left')
+        fp = len(self.negatives) - np.searchsorted(self.negatives, threshold, side='left')
+        fn = len(self.positives) - tp
+        tn = len(self.negatives) - fp
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+            recall = tp / max(len(self.positives), 1)
+            stats = {
+                'threshold': threshold,
+                'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn,
+                'precision': precision,
+                'recall': recall,
+                'specificity': tn / max(len(self.negatives), 1),
+                'f1': np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0),
+                'accuracy': (tp + tn) / max(len(self.positives) + len(self.negatives), 1),
+                'flagged': (tp + fp) / max(len(self.positives) + len(self.negatives), 1),
+            }
+        if threshold.ndim == 0:
+            return {key: value.item() for key, value in stats.items()}
+        return stats
+
+    def table(self, step=0.1):
+        """Confusion statistics on a grid of thresholds, one dict per threshold."""
+        grid = np.round(np.arange(0.0, 1.0 + step / 2, step), 10)
+        stats = self.confusion(grid)
+        return [{key: value[i].item() for key, value in stats.items()} for i in range(len(grid))]
+
+    def __repr__(self):
+        return (f"ModelProfile({self.name!r}, {self.method}, {len(self.positives)} positive / "
+                f"{len(self.negatives)} negative cases, brier {self.metrics['brier']:.3f})")
+
+
+class DatasetDigests:
+    """SHA-256 of each dataset in ``files``, rehashed only when its size or mtime changes.
+
+    Profiles are keyed on it, so an edited dataset is profiled again.
+    """
+
+    def __init__(self, files, check_interval=1.0):
+        self.files = dict(files)
+        self.check_interval = check_interval
+        self._hashes = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        now = time.monotonic()
+        if name in self._hashes and now - self._checked[name] < self.check_interval:
+            return self._hashes[name][1]
+        with self._lock:
+            stat = os.stat(self.files[name])
+            signature = (stat.st_size, stat.st_mtime_ns)
+            cached = self._hashes.get(name)
+            if cached is None or cached[0] != signature:
+                with open(self.files[name], 'rb') as f:
+                    cached = (signature, hashlib.sha256(f.read()).hexdigest())
+                self._hashes[name] = cached
+            self._checked[name] = now
+            return cached[1]
+
+
+def _load_dataset(name):
+    import pandas as pd
+
+    # utf-8-sig strips the BOM that heart_disease_data.csv starts with
+    data = pd.read_csv(DATASET_FILES[name], encoding='utf-8-sig')
+    X = SCHEMAS[name].frame(data[SCHEMAS[name].columns].to_numpy(dtype=np.float64))
+    return X, data[TARGET_COLUMNS[name]].to_numpy()
+
+
+def _is_logistic(model, X, scores):
+    if hasattr(model, 'predict_proba'):
+        return np.allclose(model.predict_proba(X)[:, 1], _sigmoid(scores, -1.0, 0.0))
+    # NumPy exports have no predict_proba but keep the estimator's kind
+    return getattr(model, 'kind', None) == 'LogisticRegression'
+
+
+def _build_profile(name, model, model_sha256, dataset_sha256):
+    """Profile ``model`` serving ``name``; the digests only key the disk cache, which ignores ``model``."""
+    X, y = _load_dataset(name)
+    scores = np.asarray(model.decision_function(X), dtype=np.float64)
+    if _is_logistic(model, X, scores):
+        method, (a, b) = 'logistic', (-1.0, 0.0)
+    else:
+        method, (a, b) = 'platt', fit_platt(scores, y)
+    probability = _sigmoid(scores, a, b)
+    clipped = np.clip(probability, 1e-15, 1 - 1e-15)
+    metrics = {
+        'brier': float(np.mean((probability - y) ** 2)),
+        'log_loss': float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+        'rows': int(len(y)),
+    }
+    return ModelProfile(name, method, a, b, probability[y == 1], probability[y == 0], metrics)
+
+
+@functools.lru_cache(maxsize=None)
+def combined_schema(names):
+    """Schema over the union of ``names``' columns and each model's column positions in it."""
+    features, seen = [], set()
+    for name in names:
+        for feature in SCHEMAS[name].features:
+            if feature.name not in seen:
+                seen.add(feature.name)
+                features.append(feature)
+    schema = Schema('+'.join(names), features)
+    positions = {name: np.array([schema.columns.index(col) for col in SCHEMAS[name].columns]) for name in names}
+    return schema, positions
+
+
+class Scores:
+    """Decision scores, probabilities and labels of one model for a batch of rows."""
+
+    def __init__(self, name, decision, probability, prediction, threshold):
+        self.name = name
+        self.decision = decision
+        self.probability = probability
+        self.prediction = prediction
+        self.threshold = threshold
+
+    def __len__(self):
+        return len(self.decision)
+
+    def rows(self):
+        return [
+            {'decision': float(d), 'probability': float(p), 'prediction': int(label),
+             'result': 'Positive' if label == 1 else 'Negative'}
+            for d, p, label in zip(self.decision, self.probability, self.prediction)
+        ]
+
+
+class ScoringEngine:
+    """Probability scoring over a mapping of model name to fitted model.
+
+    ``models`` is a ``LazyModels`` of the pickles or of the NumPy fast-path
+    predictors, a ``ModelRegistry``, or a plain dict of models, which are
+    then keyed by ``ObjectDigests``. Only ``decision_function`` is called
+    on the models.
+    """
+
+    def __init__(self, models=None, memory=None):
+        self.models = models if models is not None else load_models()
+        self.memory = memory if memory is not None else Memory(CACHE_DIR, verbose=0)
+        self._build = self.memory.cache(_build_profile, ignore=['model'])
+        self._digests = digests_of(self.models)
+        self._dataset_hashes = DatasetDigests(DATASET_FILES)
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def _served(self, name):
+        """The model object serving ``name`` now and the SHA-256 it was loaded from."""
+        model = self.models[name]
+        current = getattr(model, 'current', None)
+        if current is not None:
+            # A registry handle; pin one version, since a hot reload can switch it at any time
+            version = current()
+            return version.model, version.sha256
+        return model, self._digests.get(name)
+
+    def profile(self, name):
+        return self._profile(name, *self._served(name))
+
+    def snapshot(self, name):
+        """The model serving ``name`` now and its profile, taken together.
+
+        A hot reload cannot then pair one version's scores with another's calibration.
+        """
+        model, model_sha256 = self._served(name)
+        return model, self._profile(name, model, model_sha256)
+
+    def _profile(self, name, model, model_sha256):
+        key = (model_sha256, self._dataset_hashes.get(name))
+        cached = self._profiles.get(name)
+        if cached is None or cached[0] != key:
+            with self._lock:
+                cached = self._profiles.get(name)
+                if cached is None or cached[0] != key:
+                    cached = (key, self._build(name, model, *key))
+                    self._profiles[name] = cached
+        return cached[1]
+
+    def _score_matrix(self, name, X, threshold):
+        model, profile = self.snapshot(name)
+        decision = np.asarray(model.decision_function(SCHEMAS[name].frame(X)), dtype=np.float64)
+        probability = profile.probability(decision)
+        if threshold is None:
+            # The model's own labels, as predict returns them
+            prediction = (decision > 0).astype(np.int64)
+        else:
+            prediction = (probability >= threshold).astype(np.int64)
+        return Scores(name, decision, probability, prediction, threshold)
+
+    def score(self, name, data, threshold=None):
+        """Score ``data`` (anything ``Schema.assemble`` accepts) with model ``name``."""
+        return self._score_matrix(name, SCHEMAS[name].assemble(data), threshold)
+
+    def score_all(self, data, names=None, threshold=None):
+        """Score ``data`` with every model in ``names`` from one validated matrix.
+
+        By default the models are the ones whose columns all appear in
+        ``data``, which then has to be a dict, a list of dicts or a
+        DataFrame. ``threshold`` is one value or ``{name: value}``.
+        Returns ``{name: Scores}``.
+        """
+        if names is None:
+            names = self.models_for(data)
+            if not names:
+                raise ValueError("the record has every column of none of the models")
+        names = tuple(names)
+        schema, positions = combined_schema(names)
+        X = schema.assemble(data)
+        thresholds = threshold if isinstance(threshold, dict) else {name: threshold for name in names}
+        return {name: self._score_matrix(name, X[:, positions[name]], thresholds.get(name)) for name in names}
+
+    def models_for(self, data):
+        if hasattr(data, 'columns'):
+            columns = set(data.columns)
+        elif isinstance(data, dict):
+            columns = set(data)
+        else:
+            rows = list(data)
+            if not rows or not isinstance(rows[0], dict):
+                raise ValueError("positional rows need explicit model names")
+            columns = set.intersection(*(set(row) for row in rows))
+        return [name for name in SCHEMAS if name in self.models and columns.issuperset(SCHEMAS[name].columns)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show calibration and threshold statistics of the models.")
+    parser.add_argument('models', nargs='*', default=list(MODEL_FILES), help="default: all three")
+    parser.add_argument('--step', type=float, default=0.1, help="threshold grid step")
+    parser.add_argument('--clear-cache', action='store_true', help="drop the memoized profiles first")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine()
+    if args.clear_cache:
+        engine.memory.clear(warn=False)
+    for name in args.models:
+        profile = engine.profile(name)
+        print(f"{name}: {profile.method} calibration, brier {profile.metrics['brier']:.3f}, "
+              f"log loss {profile.metrics['log_loss']:.3f} on {profile.metrics['rows']} rows")
+        print("  threshold  precision  recall  specificity     f1  flagged")
+        for row in profile.table(args.step):
+            print(f"  {row['threshold']:9.2f}  {row['precision']:9.3f}  {row['recall']:6.3f}  "
+                  f"{row['specificity']:11.3f}  {row['f1']:5.3f}  {row['flagged']:7.3f}")
+
+
+if __name__ == '__main__':
+    main()
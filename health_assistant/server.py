@@ -0,0 +1,311 @@
+"""Headless HTTP inference service for the saved models.
+
+Every worker process loads each model once, on its first request, and
+answers ``POST /predict/<model>`` with JSON. The body is either one row (an object
+keyed by the dataset column names) or an array of such rows, validated
+against ``health_assistant.schema``. ``POST /score/<model>`` takes the same
+body and adds each row's decision score and calibrated probability;
+``POST /score`` scores a record with every model whose columns it has, from
+one validated matrix. Both accept ``?threshold=`` to label by probability.
+
+With ``--watch`` the models are served through a
+``health_assistant.registry.ModelRegistry``, so every worker switches to a
+replaced model file without a restart. ``--shadow-rate`` also runs that
+share of predict calls on the newest versioned artifact.
+
+Usage::
+
+    python -m health_assistant.server --port 8000 --workers 4
+    python -m health_assistant.server --watch --shadow-rate 0.1
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+from health_assistant.batching import DEFAULT_MAX_WAIT_MS, BatchingPredictor
+from health_assistant.cache import MemoryBackend, PredictionCache, SQLiteBackend
+from health_assistant import metrics
+from health_assistant.fastpath import load_fast_models
+from health_assistant.metrics import span
+from health_assistant.models import digests_of, load_models
+from health_assistant.registry import ModelRegistry
+from health_assistant.schema import SCHEMAS, SchemaError
+from health_assistant.scoring import ScoringEngine
+
+RESULT_LABELS = {1: 'Positive', 0: 'Negative'}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def rows_to_matrix(name, body):
+    if isinstance(body, list) and not body:
+        raise BadRequest("request body has no rows")
+    try:
+        return SCHEMAS[name].assemble(body)
+    except SchemaError as e:
+        raise BadRequest(str(e)) from None
+
+
+def threshold_arg(args):
+    """The ``?threshold=`` probability in ``args``, or ``None`` when it is not given."""
+    value = args.get('threshold')
+    if value is None:
+        return None
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise BadRequest(f"threshold must be a number, got '{value}'") from None
+    if not 0 <= threshold <= 1:
+        raise BadRequest(f"threshold must be between 0 and 1, got {value}")
+    return threshold
+
+
+def create_app(models=None, batch_size=1, batch_wait_ms=DEFAULT_MAX_WAIT_MS, fast=False, cache='none', watch=False,
+               shadow_rate=0.0):
+    """Build the Flask app.
+
+    With ``batch_size`` above 1, single-row requests from concurrent threads
+    are coalesced by a ``BatchingPredictor`` before reaching the model.
+    With ``fast`` the exported NumPy predictors are served instead of the
+    pickles, so scikit-learn is never imported and the memory-mapped arrays
+    are shared between workers. Either way each model loads on its first
+    request.
+    ``cache`` puts a ``PredictionCache`` in front of single-row requests:
+    ``memory`` for one per worker, ``sqlite`` for one shared by all workers.
+    ``watch`` serves the pickles through a ``ModelRegistry`` that reloads
+    replaced files, shadowing ``shadow_rate`` of predict calls when above 0.
+    """
+    if fast and watch:
+        raise ValueError("the NumPy exports are not watched; use fast or watch, not both")
+    app = Flask(__name__)
+    app.config['REGISTRY'] = None
+    if models is None:
+        if watch:
+            models = ModelRegistry(shadow=shadow_rate > 0, shadow_rate=shadow_rate).start()
+            app.config['REGISTRY'] = models
+            metrics.REGISTRY.register_collector('registry', metrics.registry_collector(models))
+        else:
+            models = load_fast_models(mmap=True) if fast else load_models()
+    app.config['MODELS'] = models
+    app.config['BATCHER'] = None
+    if batch_size > 1:
+        app.config['BATCHER'] = BatchingPredictor(app.config['MODELS'], batch_size, batch_wait_ms)
+    app.config['SCORER'] = ScoringEngine(app.config['MODELS'])
+    app.config['CACHE'] = None
+    if cache != 'none':
+        backend = SQLiteBackend() if cache == 'sqlite' else MemoryBackend()
+        # Keyed on the hash of the bytes this worker's models were loaded from, not the file on disk now
+        app.config['CACHE'] = PredictionCache(backend, digests_of(models))
+        metrics.REGISTRY.register_collector('cache', metrics.cache_collector(app.config['CACHE']))
+    if app.config['BATCHER'] is not None:
+        metrics.REGISTRY.register_collector('batching', metrics.batching_collector(app.config['BATCHER']))
+
+    @app.get('/health')
+    def health():
+        return jsonify(status='ok', models=sorted(app.config['MODELS']), pid=os.getpid())
+
+    @app.get('/metrics')
+    def prometheus():
+        # Per worker process: each scrape is answered by whichever worker accepts it
+        return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    @app.get('/stats/batching')
+    def batching_stats():
+        batcher = app.config['BATCHER']
+        return jsonify(batcher.stats() if batcher is not None else {})
+
+    @app.get('/stats/cache')
+    def cache_stats():
+        cache = app.config['CACHE']
+        return jsonify(cache.stats.snapshot() if cache is not None else {})
+
+    @app.get('/stats/registry')
+    def registry_stats():
+        registry = app.config['REGISTRY']
+        return jsonify(registry.status() if registry is not None else {})
+
+    @app.post('/predict/<name>')
+    def predict(name):
+        if name not in app.config['MODELS']:
+            return jsonify(error=f"unknown model '{name}'"), 404
+
+        body = request.get_json(silent=True)
+        if not isinstance(body, (dict, list)):
+            return jsonify(error="body must be a JSON object or array of rows"), 400
+        try:
+            with span('input_assembly', model=name):
+                X = rows_to_matrix(name, body)
+        except BadRequest as e:
+            metrics.ERRORS.inc(model=name)
+            return jsonify(error=str(e)), 400
+
+        batcher, cache = app.config['BATCHER'], app.config['CACHE']
+        try:
+            with span('predict', model=name):
+                if len(X) == 1 and (batcher is not None or cache is not None):
+                    row = X[0]
+                    if batcher is not None:
+                        compute = lambda: int(batcher.predict(name, row))
+                    else:
+                        compute = lambda: int(app.config['MODELS'][name].predict(SCHEMAS[name].frame(X))[0])
+                    predictions = [cache.get_or_compute(name, row, compute) if cache is not None else compute()]
+                else:
+                    predictions = [int(p) for p in app.config['MODELS'][name].predict(SCHEMAS[name].frame(X))]
+        except Exception:
+            metrics.ERRORS.inc(model=name)
+            raise
+        metrics.PREDICTIONS.inc(len(predictions), model=name)
+        metrics.POSITIVES.inc(sum(predictions), model=name)
+        results = [RESULT_LABELS[p] for p in predictions]
+        if isinstance(body, dict):
+            return jsonify(prediction=predictions[0], result=results[0])
+        return jsonify(predictions=predictions, results=results)
+
+    def scored_json(scores, single):
+        rows = scores.rows()
+        return rows[0] if single else rows
+
+    @app.post('/score/<name>')
+    def score(name):
+        if name not in app.config['MODELS']:
+            return jsonify(error=f"unknown model '{name}'"), 404
+        body = request.get_json(silent=True)
+        if not isinstance(body, (dict, list)):
+            return jsonify(error="body must be a JSON object or array of rows"), 400
+        try:
+            threshold = threshold_arg(request.args)
+            with span('input_assembly', model=name):
+                X = rows_to_matrix(name, body)
+            with span('score', model=name):
+                scores = app.config['SCORER'].score(name, X, threshold)
+        except BadRequest as e:
+            metrics.ERRORS.inc(model=name)
+            return jsonify(error=str(e)), 400
+        except Exception:
+            metrics.ERRORS.inc(model=name)
+            raise
+        metrics.PREDICTIONS.inc(len(scores), model=name)
+        metrics.POSITIVES.inc(int(scores.prediction.sum()), model=name)
+        return jsonify(scored_json(scores, isinstance(body, dict)))
+
+    @app.post('/score')
+    def score_all():
+        body = request.get_json(silent=True)
+        if not isinstance(body, (dict, list)) or (isinstance(body, list) and not body):
+            return jsonify(error="body must be a JSON object or non-empty array of rows"), 400
+        names = request.args.get('models')
+        names = names.split(',') if names else None
+        unknown = [name for name in names or () if name not in app.config['MODELS']]
+        if unknown:
+            return jsonify(error=f"unknown model '{unknown[0]}'"), 404
+        try:
+            threshold = threshold_arg(request.args)
+            with span('score', model='all'):
+                results = app.config['SCORER'].score_all(body, names, threshold)
+        except ValueError as e:
+            metrics.ERRORS.inc(model='all')
+            return jsonify(error=str(e)), 400
+        except Exception:
+            metrics.ERRORS.inc(model='all')
+            raise
+        for name, scores in results.items():
+            metrics.PREDICTIONS.inc(len(scores), model=name)
+            metrics.POSITIVES.inc(int(scores.prediction.sum()), model=name)
+        return jsonify({name: scored_json(scores, isinstance(body, dict)) for name, scores in results.items()})
+
+    return app
+
+
+def _serve_worker(sock, threaded, batch_size, batch_wait_ms, fast, cache, watch, shadow_rate):
+    # Each worker loads its own models after the fork and accepts on the shared socket
+    app = create_app(batch_size=batch_size, batch_wait_ms=batch_wait_ms, fast=fast, cache=cache, watch=watch,
+                     shadow_rate=shadow_rate)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server.serve_forever()
+
+
+def serve(host='127.0.0.1', port=8000, workers=1, threaded=False, batch_size=1,
+          batch_wait_ms=DEFAULT_MAX_WAIT_MS, fast=False, cache='none', watch=False, shadow_rate=0.0):
+    """Serve the API with ``workers`` pre-forked processes sharing one listening socket."""
+    # Coalescing only helps when requests can overlap inside a worker
+    threaded = threaded or batch_size > 1
+    if workers <= 1 or not hasattr(os, 'fork'):
+        app = create_app(batch_size=batch_size, batch_wait_ms=batch_wait_ms, fast=fast, cache=cache, watch=watch,
+                         shadow_rate=shadow_rate)
+        make_server(host, port, app, threaded=threaded).serve_forever()
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve_worker(sock, threaded, batch_size, batch_wait_ms, fast, cache, watch, shadow_rate)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(*_):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving on http://{host}:{port} with {workers} workers", file=sys.stderr)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop()
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the saved models over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of pre-forked worker processes")
+    parser.add_argument('--threaded', action='store_true',
+                        help="handle requests on threads inside each worker")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="coalesce up to this many concurrent single-row requests per predict call")
+    parser.add_argument('--batch-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="longest time a request waits for its batch to fill")
+    parser.add_argument('--fast', action='store_true',
+                        help="serve the memory-mapped NumPy exports instead of the scikit-learn pickles")
+    parser.add_argument('--cache', choices=['none', 'memory', 'sqlite'], default='none',
+                        help="cache single-row results per worker (memory) or across workers (sqlite)")
+    parser.add_argument('--watch', action='store_true',
+                        help="reload a replaced model file without restarting the workers")
+    parser.add_argument('--shadow-rate', type=float, default=0.0,
+                        help="with --watch, share of predict calls also run on the newest versioned artifact")
+    args = parser.parse_args(argv)
+    if args.fast and args.watch:
+        parser.error("--fast serves the NumPy exports, which are not watched; use one of --fast and --watch")
+    if args.shadow_rate and not args.watch:
+        parser.error("--shadow-rate needs --watch")
+    serve(args.host, args.port, args.workers, args.threaded, args.batch_size, args.batch_wait_ms, args.fast,
+          args.cache, args.watch, args.shadow_rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Start-up time and per-process memory of the different model loading modes.
+
+Each mode runs in a fresh interpreter so imports and page-cache sharing are
+measured the way a new worker sees them.
+
+Usage::
+
+    python -m health_assistant.startup_report
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from health_assistant.models import ROOT
+
+MODES = {
+    'eager-pickle': "Unpickle all three models up front (previous behaviour)",
+    'lazy-idle': "Lazy models, no prediction page visited",
+    'lazy-one': "Lazy models, only the heart model used",
+    'fast-mmap': "All three NumPy exports, memory-mapped",
+}
+
+
+def _memory():
+    # Linux only; other platforms report what resource can tell us
+    memory = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                    memory[key] = int(value.split()[0])
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key == 'Pss':
+                    memory['Pss'] = int(value.split()[0])
+    except OSError:
+        import resource
+        memory['VmRSS'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return memory
+
+
+def probe(mode):
+    started = time.perf_counter()
+    if mode == 'eager-pickle':
+        from health_assistant.models import load_models
+        load_models(lazy=False)
+    elif mode == 'lazy-idle':
+        from health_assistant.models import load_models
+        load_models()
+    elif mode == 'lazy-one':
+        from health_assistant.models import load_models
+        load_models()['heart']
+    elif mode == 'fast-mmap':
+        from health_assistant.fastpath import load_fast_models
+        load_fast_models(mmap=True, lazy=False)
+    else:
+        raise ValueError(f"unknown mode '{mode}'")
+    return {'mode': mode, 'seconds': time.perf_counter() - started, 'sklearn': 'sklearn' in sys.modules,
+            **_memory()}
+
+
+def run(modes=MODES, repeat=3):
+    results = []
+    for mode in modes:
+        samples = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-m', 'health_assistant.startup_report',
+                                  '--probe', mode], cwd=ROOT, capture_output=True, text=True, check=True)
+            samples.append(json.loads(out.stdout))
+        best = min(samples, key=lambda sample: sample['seconds'])
+        results.append(best)
+    return results
+
+
+def format_report(results):
+    lines = ["| mode | description | load time (ms) | RSS (MiB) | PSS (MiB) | sklearn imported |",
+             "|---|---|---:|---:|---:|---|"]
+    for r in results:
+        pss = f"{r['Pss'] / 1024:.1f}" if 'Pss' in r else "n/a"
+        lines.append(f"| {r['mode']} | {MODES[r['mode']]} | {1e3 * r['seconds']:.1f} | "
+                     f"{r['VmRSS'] / 1024:.1f} | {pss} | {'yes' if r['sklearn'] else 'no'} |")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report model start-up time and memory per loading mode.")
+    parser.add_argument('--probe', choices=sorted(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per mode; the fastest is reported")
+    parser.add_argument('--json', action='store_true', help="print raw results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe)))
+        return
+    results = run(repeat=args.repeat)
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Out-of-core training for datasets that do not fit in memory.
+
+The source CSV or Parquet file is read in fixed-size chunks. It is never
+loaded whole, so peak memory depends on ``--chunksize`` and not on the
+number of rows. The passes over the source are:
+
+1. ``StandardScaler.partial_fit`` learns the feature means and variances.
+2. For each of ``--epochs`` epochs, ``SGDClassifier.partial_fit`` fits a
+   linear SVM (hinge loss) or a logistic regression (log loss) on the
+   scaled, shuffled chunk. ``--rbf-components`` inserts an ``RBFSampler``
+   (random Fourier features) to approximate the RBF kernel of an exact SVC.
+3. A hash-selected holdout slice, which training never sees, is scored.
+
+The result is a scikit-learn ``Pipeline`` pickled next to the shipped
+models. It is a drop-in for ``load_models()`` and exports to the NumPy
+fast path. It is recorded in ``saved models/manifest.json`` like the
+models from ``health_assistant.training``.
+
+Usage::
+
+    python -m health_assistant.streaming diabetes ehr_export.parquet --chunksize 100000
+    python -m health_assistant.streaming parkinsons --rbf-components 500 --epochs 20 --promote
+"""
+import argparse
+import datetime
+import pickle
+import resource
+import sys
+import time
+
+import numpy as np
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from health_assistant.batch import read_chunks
+from health_assistant.models import DATASET_FILES, FEATURE_COLUMNS, TARGET_COLUMNS
+from health_assistant.registry import (file_digest, load_manifest, promote_version, save_manifest,
+                                       versioned_path)
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Loss standing in for each shipped model: hinge for the SVCs, log loss for the logistic regression
+DEFAULT_LOSS = {
+    'diabetes': 'hinge',
+    'heart': 'log_loss',
+    'parkinsons': 'hinge',
+}
+
+
+class StreamStats:
+    def __init__(self):
+        self.rows = 0
+        self.holdout_rows = 0
+        self.chunks = 0
+        self.epoch = 0
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def peak_rss_mib(self):
+        # ru_maxrss is KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def metrics(self):
+        (tn, fp), (fn, tp) = self.confusion.tolist()
+        total = tn + fp + fn + tp
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        return {
+            'accuracy': (tp + tn) / total if total else float('nan'),
+            'precision': precision,
+            'recall': recall,
+            'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        }
+
+    def __repr__(self):
+        return (f"epoch {self.epoch}: {self.rows:,} rows in {self.chunks} chunks, {self.seconds:.1f}s, "
+                f"peak RSS {self.peak_rss_mib:.0f} MiB")
+
+
+def holdout_mask(start, n, fraction):
+    """Pick about ``fraction`` of rows by a hash of their position, so every pass selects the same rows."""
+    positions = np.arange(start, start + n, dtype=np.uint64)
+    hashed = (positions * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed < np.uint64(fraction * 2 ** 32)
+
+
+def iter_labeled(name, source, chunksize=DEFAULT_CHUNKSIZE, holdout=0.1):
+    """Yield ``(features, labels, is_holdout)`` per chunk; only the model's columns are read."""
+    features, target = FEATURE_COLUMNS[name], TARGET_COLUMNS[name]
+    start = 0
+    for chunk in read_chunks(source, chunksize, columns=features + [target]):
+        missing = [col for col in features + [target] if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"{name} training data is missing columns: {', '.join(missing)}")
+        chunk = chunk.dropna()
+        test = holdout_mask(start, len(chunk), holdout)
+        yield chunk[features].astype(np.float64), chunk[target].to_numpy(dtype=np.int64), test
+        start += len(chunk)
+
+
+def stream_fit(name, source, epochs=5, chunksize=DEFAULT_CHUNKSIZE, loss=None, alpha=1e-4,
+               rbf_components=0, rbf_gamma=None, holdout=0.1, random_state=0, progress=None):
+    """Fit a scaler + SGD pipeline on ``source`` without holding it in memory.
+
+    Returns the fitted ``Pipeline`` and the ``StreamStats`` of the run.
+    ``progress`` is called with the stats after every chunk.
+    """
+    stats = StreamStats()
+    rng = np.random.default_rng(random_state)
+
+    scaler = StandardScaler()
+    for X, y, test in iter_labeled(name, source, chunksize, holdout):
+        if (~test).any():
+            scaler.partial_fit(X[~test])
+        stats.rows += len(X)
+        stats.holdout_rows += int(test.sum())
+    if stats.rows == stats.holdout_rows:
+        raise ValueError(f"no training rows in {source}")
+
+    steps = [('standardscaler', scaler)]
+    if rbf_components:
+        n_features = len(FEATURE_COLUMNS[name])
+        sampler = RBFSampler(gamma=rbf_gamma or 1.0 / n_features, n_components=rbf_components,
+                             random_state=random_state)
+        # Only the input width matters to RBFSampler.fit; the weights are random
+        steps.append(('rbfsampler', sampler.fit(np.zeros((1, n_features)))))
+    classifier = SGDClassifier(loss=loss or DEFAULT_LOSS[name], alpha=alpha, average=True,
+                               random_state=random_state)
+    steps.append(('sgdclassifier', classifier))
+    pipeline = Pipeline(steps)
+    transform = Pipeline(steps[:-1])
+
+    for epoch in range(1, epochs + 1):
+        stats.epoch = epoch
+        for X, y, test in iter_labeled(name, source, chunksize, holdout):
+            train = ~test
+            if not train.any():
+                continue
+            Z = transform.transform(X[train])
+            order = rng.permutation(len(Z))
+            classifier.partial_fit(Z[order], y[train][order], classes=np.array([0, 1]))
+            stats.chunks += 1
+            if progress is not None:
+                progress(stats)
+
+    for X, y, test in iter_labeled(name, source, chunksize, holdout):
+        if test.any():
+            predicted = pipeline.predict(X[test])
+            np.add.at(stats.confusion, (y[test], predicted), 1)
+    return pipeline, stats
+
+
+def train_streaming(name, source=None, promote=False, progress=None, **options):
+    """Fit ``name`` from ``source`` (default: its bundled dataset) and record a new version."""
+    source = source if source is not None else DATASET_FILES[name]
+    pipeline, stats = stream_fit(name, source, progress=progress, **options)
+
+    version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = versioned_path(name, version)
+    with open(path, 'wb') as f:
+        pickle.dump(pipeline, f)
+    classifier = pipeline[-1]
+    entry = {
+        'version': version,
+        'file': path.name,
+        'sha256': file_digest(path),
+        'dataset': str(getattr(source, 'name', source)),
+        'dataset_rows': stats.rows,
+        'estimator': type(classifier).__name__,
+        'params': {
+            'loss': classifier.loss,
+            'alpha': classifier.alpha,
+            'epochs': stats.epoch,
+            'rbf_components': pipeline['rbfsampler'].n_components if 'rbfsampler' in pipeline.named_steps else 0,
+        },
+        'holdout_rows': stats.holdout_rows,
+        'metrics': stats.metrics(),
+        'peak_rss_mib': round(stats.peak_rss_mib, 1),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+    manifest = load_manifest()
+    manifest['models'].setdefault(name, {'versions': []})['versions'].append(entry)
+    if promote:
+        promote_version(name, path)
+        manifest['models'][name]['active'] = version
+    save_manifest(manifest)
+    return path, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a model out of core from a CSV or Parquet file.")
+    parser.add_argument('model', choices=sorted(FEATURE_COLUMNS))
+    parser.add_argument('input', nargs='?', help="CSV or Parquet training data (default: the bundled dataset)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--loss', choices=['hinge', 'log_loss', 'modified_huber'],
+                        help="default: hinge for the SVC models, log_loss for heart")
+    parser.add_argument('--alpha', type=float, default=1e-4, help="L2 regularization strength")
+    parser.add_argument('--rbf-components', type=int, default=0,
+                        help="random Fourier features approximating an RBF kernel (0: linear)")
+    parser.add_argument('--rbf-gamma', type=float)
+    parser.add_argument('--holdout', type=float, default=0.1, help="fraction of rows held out for evaluation")
+    parser.add_argument('--promote', action='store_true',
+                        help="replace the .sav file load_models() reads with the new version")
+    args = parser.parse_args(argv)
+
+    def report(stats):
+        print(f"\r{stats!r}", end='', file=sys.stderr, flush=True)
+
+    path, stats = train_streaming(
+        args.model, args.input, promote=args.promote, progress=report, epochs=args.epochs,
+        chunksize=args.chunksize, loss=args.loss, alpha=args.alpha, rbf_components=args.rbf_components,
+        rbf_gamma=args.rbf_gamma, holdout=args.holdout,
+    )
+    print(f"\r{stats!r}", file=sys.stderr)
+    metrics = stats.metrics()
+    print(f"{args.model}: holdout accuracy {metrics['accuracy']:.3f} f1 {metrics['f1']:.3f} "
+          f"on {stats.holdout_rows:,} rows -> {path.name}")
+
+
+if __name__ == '__main__':
+    main()
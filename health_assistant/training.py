@@ -0,0 +1,193 @@
+"""Retrain the three models from ``Datasets/`` in parallel.
+
+For each model a small hyperparameter grid is scored with stratified
+k-fold cross-validation. Every (model, candidate, fold) fit is an
+independent joblib task, so the whole search for all three models spreads
+over every core at once. Fold fits are memoized with ``joblib.Memory``,
+keyed on the data, the parameters and the fold, so a rerun only fits what
+changed.
+
+The winning candidate is refitted on the full dataset and written to
+``saved models/<model>-<version>.sav``. Its cross-validated metrics are
+appended to ``saved models/manifest.json``. ``--promote`` also copies it
+over the ``.sav`` that ``load_models()`` reads and refreshes the NumPy
+export.
+
+Usage::
+
+    python -m health_assistant.training --jobs -1
+    python -m health_assistant.training heart --folds 10 --promote
+"""
+import argparse
+import datetime
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Memory, Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from health_assistant.models import DATASET_FILES, FEATURE_COLUMNS, MODEL_FILES, ROOT, TARGET_COLUMNS
+from health_assistant.registry import (file_digest, load_manifest, promote_version, save_manifest,
+                                       versioned_path)
+
+CACHE_DIR = ROOT / ".cache" / "training"
+RANDOM_STATE = 2
+
+
+def svc_grid():
+    grid = [{'kernel': 'linear', 'C': C} for C in (0.1, 1.0, 10.0)]
+    grid += [{'kernel': 'rbf', 'C': C, 'gamma': gamma} for C in (1.0, 10.0, 100.0) for gamma in ('scale', 0.01, 0.1)]
+    return grid
+
+
+def logistic_grid():
+    return [{'C': C} for C in (0.01, 0.1, 1.0, 10.0, 100.0)]
+
+
+# Estimator family and search space per model, matching the shipped pickles
+SEARCH_SPACES = {
+    'diabetes': (lambda params: SVC(**params), svc_grid),
+    'heart': (lambda params: LogisticRegression(max_iter=5000, **params), logistic_grid),
+    'parkinsons': (lambda params: SVC(**params), svc_grid),
+}
+
+
+def build_estimator(name, params):
+    # Scaling lives inside the pipeline so the artifact still takes raw form values
+    make, _ = SEARCH_SPACES[name]
+    return make_pipeline(StandardScaler(), make(params))
+
+
+def load_dataset(name):
+    data = pd.read_csv(DATASET_FILES[name], encoding='utf-8-sig')
+    return data[FEATURE_COLUMNS[name]], data[TARGET_COLUMNS[name]].to_numpy()
+
+
+def _scores(y_true, y_pred, y_score):
+    return {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred, zero_division=0),
+        'recall': recall_score(y_true, y_pred, zero_division=0),
+        'f1': f1_score(y_true, y_pred, zero_division=0),
+        'roc_auc': roc_auc_score(y_true, y_score) if len(np.unique(y_true)) == 2 else float('nan'),
+    }
+
+
+def fit_fold(name, params, X, y, train, test):
+    """Fit one candidate on one fold and return its held-out scores."""
+    estimator = build_estimator(name, params).fit(X.iloc[train], y[train])
+    return _scores(y[test], estimator.predict(X.iloc[test]), estimator.decision_function(X.iloc[test]))
+
+
+def fit_full(name, params, X, y):
+    return build_estimator(name, params).fit(X, y)
+
+
+def search(names, folds=5, n_jobs=-1, memory=None, verbose=0):
+    """Cross-validate every candidate of every model in one parallel pool.
+
+    Returns ``{name: {'params', 'cv', 'candidates'}}`` with the best
+    candidate by mean accuracy (ties broken by ROC AUC).
+    """
+    memory = memory if memory is not None else Memory(CACHE_DIR, verbose=0)
+    cached_fit_fold = memory.cache(fit_fold)
+
+    datasets = {name: load_dataset(name) for name in names}
+    tasks = []
+    for name in names:
+        X, y = datasets[name]
+        splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+        splits = list(splitter.split(X, y))
+        for candidate, params in enumerate(SEARCH_SPACES[name][1]()):
+            for train, test in splits:
+                tasks.append((name, candidate, params, X, y, train, test))
+
+    scores = Parallel(n_jobs=n_jobs, verbose=verbose)(
+        delayed(cached_fit_fold)(name, params, X, y, train, test)
+        for name, _, params, X, y, train, test in tasks
+    )
+
+    by_candidate = {}
+    for (name, candidate, params, *_), fold_scores in zip(tasks, scores):
+        entry = by_candidate.setdefault((name, candidate), {'params': params, 'folds': []})
+        entry['folds'].append(fold_scores)
+
+    results = {}
+    for (name, _), entry in by_candidate.items():
+        cv = {metric: float(np.mean([fold[metric] for fold in entry['folds']])) for metric in entry['folds'][0]}
+        cv['accuracy_std'] = float(np.std([fold['accuracy'] for fold in entry['folds']]))
+        summary = {'params': entry['params'], 'cv': cv}
+        results.setdefault(name, {'candidates': []})['candidates'].append(summary)
+    for name, result in results.items():
+        best = max(result['candidates'], key=lambda c: (c['cv']['accuracy'], c['cv']['roc_auc']))
+        result.update(best)
+    return results, datasets
+
+
+def train(names=tuple(MODEL_FILES), folds=5, n_jobs=-1, promote=False, verbose=0):
+    started = time.perf_counter()
+    version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    memory = Memory(CACHE_DIR, verbose=0)
+    results, datasets = search(names, folds, n_jobs, memory, verbose)
+
+    cached_fit_full = memory.cache(fit_full)
+    estimators = Parallel(n_jobs=n_jobs)(
+        delayed(cached_fit_full)(name, results[name]['params'], *datasets[name]) for name in names
+    )
+
+    manifest = load_manifest()
+    for name, estimator in zip(names, estimators):
+        path = versioned_path(name, version)
+        with open(path, 'wb') as f:
+            pickle.dump(estimator, f)
+        entry = {
+            'version': version,
+            'file': path.name,
+            'sha256': file_digest(path),
+            'dataset': DATASET_FILES[name].name,
+            'dataset_sha256': file_digest(DATASET_FILES[name]),
+            'estimator': type(estimator[-1]).__name__,
+            'params': results[name]['params'],
+            'cv_folds': folds,
+            'metrics': results[name]['cv'],
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        }
+        manifest['models'].setdefault(name, {'versions': []})['versions'].append(entry)
+        if promote:
+            promote_version(name, path)
+            manifest['models'][name]['active'] = version
+        results[name]['artifact'] = path
+    save_manifest(manifest)
+    return results, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the saved models from Datasets/.")
+    parser.add_argument('models', nargs='*', default=sorted(MODEL_FILES))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel fits (-1 uses every core)")
+    parser.add_argument('--promote', action='store_true',
+                        help="replace the .sav files load_models() reads with the new versions")
+    parser.add_argument('--clear-cache', action='store_true', help="forget memoized fold fits first")
+    parser.add_argument('-v', '--verbose', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.clear_cache:
+        Memory(CACHE_DIR, verbose=0).clear(warn=False)
+    results, seconds = train(args.models, args.folds, args.jobs, args.promote, args.verbose)
+    for name in args.models:
+        cv = results[name]['cv']
+        print(f"{name}: {results[name]['params']} accuracy {cv['accuracy']:.3f} ± {cv['accuracy_std']:.3f} "
+              f"roc_auc {cv['roc_auc']:.3f} -> {results[name]['artifact'].name}")
+    print(f"trained {len(args.models)} models in {seconds:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Streamlit pages of the dashboard, one module per page.
+
+``app.py`` registers each page with ``st.navigation`` through ``page``, and
+the page's module is imported the first time it is shown. A cold worker therefore only
+imports what the first page it serves needs. Plotly is imported when a chart
+is drawn, pandas when a table is shown, and scikit-learn when the first
+prediction unpickles a model. ``python -m health_assistant.import_budget``
+checks this.
+"""
+import importlib
+
+# Sidebar label -> module in this package
+PAGES = {
+    'Home': 'home',
+    'Diabetes Prediction': 'diabetes',
+    'Heart Disease Prediction': 'heart',
+    'Parkinsons Prediction': 'parkinsons',
+    'Patient History': 'patient_history',
+    'Admin': 'admin',
+}
+
+
+def render(page):
+    importlib.import_module(f"{__name__}.{PAGES[page]}").render()
+
+
+def page(title):
+    """Callable for ``st.Page`` that renders ``title``."""
+    def render_page():
+        render(title)
+
+    render_page.__name__ = PAGES[title]
+    return render_page
@@ -0,0 +1,127 @@
+"""Admin page: prediction counters, stage latencies, cache, threshold and model version statistics and the
+sampling profiler."""
+import streamlit as st
+
+from health_assistant import metrics
+from health_assistant.schema import SCHEMAS
+from health_assistant.views.common import load_admin_settings, load_models, load_predictor, load_scoring_engine
+
+
+def render():
+    admin_settings = load_admin_settings()
+
+    st.markdown('<h1 class="main-title">Performance and Diagnostics</h1>', unsafe_allow_html=True)
+    
+    # Prediction counters
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Predictions Served", f"{sum(v for _, _, v in metrics.PREDICTIONS.samples()):,.0f}")
+    with col2:
+        st.metric("Positive Predictions", f"{sum(v for _, _, v in metrics.POSITIVES.samples()):,.0f}")
+    with col3:
+        st.metric("Prediction Errors", f"{sum(v for _, _, v in metrics.ERRORS.samples()):,.0f}")
+    
+    # Stage latencies
+    st.subheader("Stage Latency")
+    stage_rows = [
+        {**dict(labels), 'count': count, 'mean_ms': 1e3 * total / count, 'p50_ms': 1e3 * p50, 'p99_ms': 1e3 * p99}
+        for labels, (count, total, p50, p99) in metrics.STAGE_SECONDS.summary().items()
+    ]
+    if stage_rows:
+        import pandas as pd
+
+        st.dataframe(pd.DataFrame(stage_rows).sort_values('mean_ms', ascending=False), use_container_width=True)
+    else:
+        st.info("No timings recorded yet")
+    
+    st.subheader("Prediction Cache")
+    st.json(load_predictor().stats())
+
+    # Re-thresholding reads the cached dataset statistics; nothing is scored again
+    st.subheader("Risk Thresholds")
+    if st.toggle("Show threshold statistics", key="admin_thresholds"):
+        model_name = st.selectbox("Model", list(SCHEMAS), key="admin_threshold_model")
+        threshold = st.slider("Positive when the estimated risk is at least", 0.0, 1.0, 0.5, 0.01,
+                              key="admin_threshold")
+        profile = load_scoring_engine().profile(model_name)
+        stats = profile.confusion(threshold)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Recall", f"{stats['recall']:.1%}")
+        with col2:
+            st.metric("Precision", f"{stats['precision']:.1%}")
+        with col3:
+            st.metric("Specificity", f"{stats['specificity']:.1%}")
+        with col4:
+            st.metric("Flagged", f"{stats['flagged']:.1%}")
+        st.caption(f"{profile.method.capitalize()} calibration, Brier score {profile.metrics['brier']:.3f} on "
+                   f"the {profile.metrics['rows']} rows the model was trained on; "
+                   f"{stats['tp']} true and {stats['fp']} false positives at this threshold.")
+
+    # The registry is shared by every session of this process; actions here affect all of them
+    st.subheader("Model Registry")
+    registry = load_models()
+    shadow = st.toggle("Shadow new model versions", value=registry.shadow_enabled, key="admin_shadow")
+    if shadow and not registry.shadow_enabled:
+        registry.shadow_enabled = True
+        registry.check()
+    registry.shadow_enabled = shadow
+    registry.shadow_rate = st.slider("Share of predictions shadowed", 0.0, 1.0, registry.shadow_rate, 0.05,
+                                     key="admin_shadow_rate")
+    if st.button("Check for new versions", key="admin_registry_check"):
+        registry.check()
+    for name, status in registry.status().items():
+        active, candidate = status['active'], status['candidate']
+        serving = f"`{active['file']}` {active['sha256'][:12]}" if active is not None else "not loaded yet"
+        st.markdown(f"**{name}**: serving {serving}")
+        if candidate is None:
+            continue
+        shadow = status['shadow']
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Rows Compared", f"{shadow['rows']:,}")
+        with col2:
+            st.metric("Agreement", f"{shadow['agreement']:.1%}" if shadow['agreement'] is not None else "-")
+        with col3:
+            st.metric("Latency Ratio", f"{shadow['latency_ratio']:.2f}x" if shadow['latency_ratio'] else "-")
+        st.caption(f"Candidate `{candidate['file']}` {candidate['sha256'][:12]}: {status['verdict']}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Promote", key=f"admin_promote_{name}"):
+                registry.promote(name)
+                st.rerun()
+        with col2:
+            if st.button("Discard", key=f"admin_discard_{name}"):
+                registry.discard(name)
+                st.rerun()
+    with st.expander(f"Registry Events ({registry.switches} switches)"):
+        if registry.events:
+            for timestamp, name, message in reversed(registry.events):
+                st.text(f"{timestamp} | {name} | {message}")
+        else:
+            st.info("No model versions switched yet")
+
+    # Prometheus endpoint
+    if admin_settings['metrics_server'] is not None:
+        st.markdown(f"Prometheus metrics: `http://127.0.0.1:{admin_settings['metrics_port']}/metrics`")
+    with st.expander("Prometheus Text"):
+        st.code(metrics.render_prometheus(), language='text')
+    
+    # Sampling profiler for slow reruns
+    st.subheader("Sampling Profiler")
+    admin_settings['profile'] = st.toggle("Profile slow reruns", value=admin_settings['profile'])
+    admin_settings['slow_rerun_seconds'] = st.number_input(
+        'Slow rerun threshold (seconds)', min_value=0.0, max_value=60.0,
+        value=admin_settings['slow_rerun_seconds'], step=0.1
+    )
+    if not admin_settings['profiles']:
+        st.info("No slow reruns captured yet")
+    for i, capture in enumerate(reversed(admin_settings['profiles'])):
+        st.download_button(
+            label=f"{capture['timestamp']} | {capture['page']} | {capture['seconds']:.2f}s",
+            data=capture['folded'],
+            file_name=f"rerun_{capture['timestamp'].replace(' ', '_').replace(':', '')}.folded",
+            mime="text/plain",
+            key=f"profile_{i}"
+        )
+    st.caption("Folded stacks open in speedscope or flamegraph.pl.")
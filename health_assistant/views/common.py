@@ -0,0 +1,175 @@
+"""Resources and widgets shared by the Streamlit pages.
+
+The loaders are ``st.cache_resource`` functions, so each resource is created
+once per process by whichever page needs it first. Nothing here imports
+pandas, Plotly or scikit-learn; models are unpickled on their first
+prediction.
+"""
+import collections
+import os
+import tempfile
+from pathlib import Path
+
+import streamlit as st
+
+from health_assistant import batch, metrics
+from health_assistant.batching import BatchingPredictor
+from health_assistant.cache import CachingPredictor, PredictionCache, SQLiteBackend
+from health_assistant.export import ExportManager
+from health_assistant.history import HistoryStore
+from health_assistant.metrics import span
+from health_assistant.registry import ModelRegistry
+from health_assistant.schema import SCHEMAS
+
+
+# Stage timings, prediction counters and the optional sampling profiler
+@st.cache_resource
+def load_admin_settings():
+    metrics_port = int(os.environ.get('HEALTH_ASSISTANT_METRICS_PORT', '9464'))
+    return {
+        'metrics_server': metrics.start_http_server(metrics_port) if metrics_port else None,
+        'metrics_port': metrics_port,
+        'profile': False,
+        'slow_rerun_seconds': 1.0,
+        'profiles': collections.deque(maxlen=10),
+    }
+
+
+# Persistent patient history shared by all sessions
+@st.cache_resource
+def load_history():
+    return HistoryStore()
+
+
+# Background history exports, shared by all sessions
+@st.cache_resource
+def load_exporter():
+    return ExportManager(load_history())
+
+
+# Models are unpickled on first access, so scikit-learn is imported by the first prediction.
+# The registry reloads a replaced model file in the background and switches to it without a restart.
+@st.cache_resource
+def load_models():
+    registry = ModelRegistry().start()
+    metrics.REGISTRY.register_collector('registry', metrics.registry_collector(registry))
+    return registry
+
+
+# Coalesce concurrent single-row predictions from all sessions into batched predict calls,
+# behind a result cache shared with the other worker processes on this host
+@st.cache_resource
+def load_predictor():
+    models = load_models()
+    predictor = CachingPredictor(BatchingPredictor(models), PredictionCache(SQLiteBackend(), models.digests))
+    metrics.REGISTRY.register_collector('cache', metrics.cache_collector(predictor.cache))
+    metrics.REGISTRY.register_collector('batching', metrics.batching_collector(predictor.predictor))
+    return predictor
+
+
+# Calibrated probabilities and cached threshold statistics; profiles are built once per model version
+@st.cache_resource
+def load_scoring_engine():
+    from health_assistant.scoring import ScoringEngine
+
+    return ScoringEngine(load_models())
+
+
+# Single-row prediction with counters and timing
+def run_prediction(model_name, input_data):
+    try:
+        with span('predict', model=model_name):
+            prediction = load_predictor().predict(model_name, input_data)
+    except Exception:
+        metrics.ERRORS.inc(model=model_name)
+        raise
+    metrics.PREDICTIONS.inc(model=model_name)
+    if prediction == 1:
+        metrics.POSITIVES.inc(model=model_name)
+    return prediction
+
+
+# Estimated risk of one assessed row, with what the default threshold catches on the model's dataset
+def render_risk(model_name, input_data):
+    from health_assistant.scoring import DEFAULT_THRESHOLD
+
+    engine = load_scoring_engine()
+    with span('score', model=model_name):
+        probability = float(engine.score(model_name, [input_data]).probability[0])
+        stats = engine.profile(model_name).confusion(DEFAULT_THRESHOLD)
+    st.metric("Estimated Risk", f"{probability:.0%}")
+    st.caption(f"At a {DEFAULT_THRESHOLD:.0%} cut-off this model flags {stats['recall']:.0%} of the positive cases "
+               f"in its dataset, and {stats['precision']:.0%} of the cases it flags are positive.")
+
+
+# Scored uploads are written here chunk by chunk and only read back when downloaded
+@st.cache_resource
+def load_batch_directory():
+    return tempfile.mkdtemp(prefix='health-assistant-batch-')
+
+
+# Form widget for one model input, with label, bounds and options taken from its feature schema
+def feature_input(model_name, column):
+    feature = SCHEMAS[model_name][column]
+    key = f"{model_name}_{column}"
+    if feature.categories:
+        return st.selectbox(feature.label, list(feature.categories), format_func=feature.format_option, key=key)
+    if feature.dtype == 'int':
+        return st.number_input(feature.label, min_value=feature.min, max_value=feature.max, key=key)
+    return st.number_input(
+        feature.label,
+        min_value=None if feature.min is None else float(feature.min),
+        max_value=None if feature.max is None else float(feature.max),
+        key=key
+    )
+
+
+# Bulk CSV scoring shared by every prediction page
+def render_batch_upload(model_name, dataset_file):
+    st.markdown(f"Upload a CSV with the same columns as `Datasets/{dataset_file}`. "
+                "Rows are scored in chunks and returned with `prediction` and `result` columns.")
+    uploaded = st.file_uploader("Patient CSV", type="csv", key=f"{model_name}_batch_file")
+    chunksize = st.number_input('Rows per chunk', min_value=100, max_value=1_000_000,
+                                value=batch.DEFAULT_CHUNKSIZE, step=1000, key=f"{model_name}_batch_chunksize")
+    threshold = None
+    if st.toggle("Label by estimated risk", key=f"{model_name}_batch_by_risk",
+                 help="Adds a probability column and labels rows positive from this risk upwards"):
+        threshold = st.slider("Risk threshold", 0.0, 1.0, 0.5, 0.01, key=f"{model_name}_batch_threshold")
+
+    if uploaded is not None and st.button("Score File", key=f"{model_name}_batch_run"):
+        progress = st.empty()
+        # This session's previous result is replaced
+        previous = st.session_state.pop(f"{model_name}_batch_output", None)
+        if previous is not None and os.path.exists(previous):
+            os.remove(previous)
+        output = tempfile.NamedTemporaryFile('w', newline='', encoding='utf-8', suffix='.csv',
+                                             dir=load_batch_directory(), delete=False)
+        try:
+            with output:
+                stats = batch.score_csv(
+                    model_name, uploaded, output, model=load_models()[model_name], chunksize=int(chunksize),
+                    progress=lambda stats: progress.text(repr(stats)), threshold=threshold
+                )
+        except ValueError as e:
+            os.remove(output.name)
+            st.error(str(e))
+            return
+        st.session_state[f"{model_name}_batch_output"] = output.name
+
+        progress.empty()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Rows Scored", f"{stats.rows:,}")
+        with col2:
+            st.metric("Positive Cases", f"{stats.positives:,}")
+        with col3:
+            st.metric("Rows per Second", f"{stats.rows_per_second:,.0f}")
+
+        st.download_button(
+            label="Download Scored CSV",
+            data=Path(output.name).read_bytes,
+            file_name=f"{model_name}_scored.csv",
+            mime="text/csv",
+            key=f"{model_name}_batch_download",
+            on_click="ignore"
+        )
@@ -0,0 +1,90 @@
+"""Diabetes risk assessment from the form or an uploaded CSV."""
+from datetime import datetime
+
+import streamlit as st
+
+from health_assistant.metrics import span
+from health_assistant.schema import SCHEMAS
+from health_assistant.views.common import (
+    feature_input, load_history, render_batch_upload, render_risk, run_prediction
+)
+
+
+def render():
+    history = load_history()
+
+    st.markdown('<h1 class="main-title">Diabetes Risk Assessment</h1>', unsafe_allow_html=True)
+    
+    # Add tabs for different input methods
+    tab1, tab2 = st.tabs(["Manual Input", "Batch Upload"])
+    
+    with tab1:
+        with st.form("diabetes_form"):
+            col1, col2 = st.columns(2)
+
+        
+        
+            inputs = {}
+            with col1:
+                for column in ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness']:
+                    inputs[column] = feature_input('diabetes', column)
+        
+            with col2:
+                for column in ['Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age']:
+                    inputs[column] = feature_input('diabetes', column)
+        
+            submitted = st.form_submit_button("Predict Diabetes Risk")
+        
+            if submitted:
+                with span('input_assembly', model='diabetes'):
+                    input_data = SCHEMAS['diabetes'].assemble(inputs)[0]
+                glucose, bmi, age = inputs['Glucose'], inputs['BMI'], inputs['Age']
+                blood_pressure = inputs['BloodPressure']
+                prediction = run_prediction('diabetes', input_data)
+            
+                # Store prediction in history
+                history.append({
+                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'disease': 'Diabetes',
+                    'result': 'Positive' if prediction == 1 else 'Negative',
+                    'details': {
+                        'glucose': glucose,
+                        'bmi': bmi,
+                        'age': age
+                    }
+                })
+            
+                # Display result with custom styling
+                render_risk('diabetes', input_data)
+                if prediction == 1:
+                    st.error("⚠️ High Risk: Diabetes indicators detected")
+                    st.markdown("""
+                        ### Recommended Actions:
+                        1. Schedule an appointment with an endocrinologist
+                        2. Monitor blood glucose levels regularly
+                        3. Review diet and exercise habits
+                        4. Consider diabetes screening tests
+                    """)
+                else:
+                    st.success("✅ Low Risk: No diabetes indicators detected")
+                    st.markdown("""
+                        ### Preventive Measures:
+                        1. Maintain a healthy diet
+                        2. Regular exercise
+                        3. Annual health check-ups
+                        4. Monitor blood sugar levels
+                    """)
+            
+                # Risk factors analysis
+                st.subheader("Risk Factor Analysis")
+                risk_factors = []
+                if glucose > 140: risk_factors.append(("High Glucose", glucose, "mg/dL"))
+                if bmi > 30: risk_factors.append(("High BMI", bmi, "kg/m²"))
+                if blood_pressure > 140: risk_factors.append(("High Blood Pressure", blood_pressure, "mm Hg"))
+            
+                if risk_factors:
+                    for factor, value, unit in risk_factors:
+                        st.warning(f"⚠️ {factor}: {value} {unit}")
+
+    with tab2:
+        render_batch_upload('diabetes', 'diabetes.csv')
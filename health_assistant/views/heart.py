@@ -0,0 +1,97 @@
+"""Heart disease risk assessment from the form or an uploaded CSV."""
+from datetime import datetime
+
+import streamlit as st
+
+from health_assistant.metrics import span
+from health_assistant.schema import SCHEMAS
+from health_assistant.views.common import (
+    feature_input, load_history, render_batch_upload, render_risk, run_prediction
+)
+
+
+def render():
+    history = load_history()
+
+    st.markdown('<h1 class="main-title">Heart Disease Risk Assessment</h1>', unsafe_allow_html=True)
+    
+    # Add tabs for different input methods
+    tab1, tab2 = st.tabs(["Manual Input", "Batch Upload"])
+    
+    with tab1:
+        with st.form("heart_disease_form"):
+            col1, col2, col3 = st.columns(3)
+        
+            inputs = {}
+            with col1:
+                for column in ['age', 'sex', 'cp', 'trestbps']:
+                    inputs[column] = feature_input('heart', column)
+        
+            with col2:
+                for column in ['chol', 'fbs', 'restecg', 'thalach']:
+                    inputs[column] = feature_input('heart', column)
+        
+            with col3:
+                for column in ['exang', 'oldpeak', 'slope', 'ca', 'thal']:
+                    inputs[column] = feature_input('heart', column)
+        
+            submitted = st.form_submit_button("Predict Heart Disease Risk")
+        
+            if submitted:
+                with span('input_assembly', model='heart'):
+                    input_data = SCHEMAS['heart'].assemble(inputs)[0]
+                age, trestbps, chol, thalach = inputs['age'], inputs['trestbps'], inputs['chol'], inputs['thalach']
+            
+                prediction = run_prediction('heart', input_data)
+            
+                # Store prediction in history
+                history.append({
+                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'disease': 'Heart Disease',
+                    'result': 'Positive' if prediction == 1 else 'Negative',
+                    'details': {
+                        'age': age,
+                        'blood_pressure': trestbps,
+                        'cholesterol': chol
+                    }
+                })
+            
+                render_risk('heart', input_data)
+                if prediction == 1:
+                    st.error("⚠️ High Risk: Heart disease indicators detected")
+                    st.markdown("""
+                        ### Recommended Actions:
+                        1. Consult a cardiologist immediately
+                        2. Regular blood pressure monitoring
+                        3. Cholesterol management
+                        4. Lifestyle modifications
+                    """)
+                else:
+                    st.success("✅ Low Risk: No heart disease indicators detected")
+                    st.markdown("""
+                        ### Preventive Measures:
+                        1. Regular exercise
+                        2. Heart-healthy diet
+                        3. Stress management
+                        4. Regular check-ups
+                    """)
+            
+                # Risk visualization
+                st.subheader("Key Metrics Visualization")
+            
+                # Create radar chart for key metrics
+                categories = ['Blood Pressure', 'Cholesterol', 'Heart Rate']
+                values = [trestbps, chol, thalach]
+            
+                # Normalize values for visualization
+                max_values = [200, 600, 250]  # Maximum expected values
+                normalized_values = [v/m for v, m in zip(values, max_values)]
+            
+                from health_assistant import figures
+
+                radar = figures.RADARS['heart_radar']
+                with span('figure', chart='heart_radar'):
+                    st.plotly_chart(radar.figure(categories, normalized_values), use_container_width=True)
+
+    with tab2:
+        render_batch_upload('heart', 'heart_disease_data.csv')
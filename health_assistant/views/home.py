@@ -0,0 +1,44 @@
+"""Home page: headline counts, recent activity and the disease distribution."""
+import streamlit as st
+
+from health_assistant.metrics import span
+from health_assistant.views.common import load_history
+
+
+def render():
+    history = load_history()
+
+    st.markdown('<h1 class="main-title">Advanced Health Assistant</h1>', unsafe_allow_html=True)
+
+     # Add banner image
+    st.image("images/health_banner.jpg", use_container_width=True)
+    
+    # Dashboard Overview
+    col1, col2, col3 = st.columns(3)
+    
+    total_predictions = history.count()
+    with col1:
+        st.metric("Total Predictions", total_predictions)
+    with col2:
+        if total_predictions:
+            positive_cases = history.count(result='Positive')
+            st.metric("Positive Cases", positive_cases)
+    with col3:
+        st.metric("Models Available", "3")
+    
+    # Recent Activity
+    st.subheader("Recent Activity")
+    if total_predictions:
+        recent_df = history.frame(limit=5)
+        st.dataframe(recent_df, use_container_width=True)
+    else:
+        st.info("No recent activity to display")
+    
+    # Basic Statistics
+    if total_predictions:
+        st.subheader("Disease Distribution")
+        from health_assistant import figures
+
+        with span('figure', chart='home_pie'):
+            fig = figures.history_pie('home_pie', history)
+        st.plotly_chart(fig, use_container_width=True)
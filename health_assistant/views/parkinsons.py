@@ -0,0 +1,140 @@
+"""Parkinson's assessment from voice measurements, a voice recording or an uploaded CSV."""
+import io
+from datetime import datetime
+
+import streamlit as st
+
+from health_assistant.metrics import span
+from health_assistant.schema import SCHEMAS
+from health_assistant.views.common import (
+    feature_input, load_history, render_batch_upload, render_risk, run_prediction
+)
+
+
+def show_assessment(history, inputs, input_data):
+    """Predict, record and explain one assessment from the 22 voice measurements."""
+    fo, Jitter_percent, Shimmer = inputs['MDVP:Fo(Hz)'], inputs['MDVP:Jitter(%)'], inputs['MDVP:Shimmer']
+    HNR, RPDE, DFA = inputs['HNR'], inputs['RPDE'], inputs['DFA']
+
+    prediction = run_prediction('parkinsons', input_data)
+
+    # Store prediction in history
+    history.append({
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'disease': 'Parkinsons',
+        'result': 'Positive' if prediction == 1 else 'Negative',
+        'details': {
+            'fundamental_frequency': fo,
+            'jitter_percent': Jitter_percent,
+            'shimmer': Shimmer
+        }
+    })
+
+    render_risk('parkinsons', input_data)
+    if prediction == 1:
+        st.error("⚠️ Warning: Parkinson's disease indicators detected")
+        st.markdown("""
+            ### Recommended Actions:
+            1. Consult a neurologist
+            2. Schedule a comprehensive neurological examination
+            3. Consider additional diagnostic tests
+            4. Begin monitoring symptoms systematically
+        """)
+
+        # Display voice analysis metrics
+        st.subheader("Voice Analysis Metrics")
+        # Add voice metrics visualization
+        categories = ['Jitter', 'Shimmer', 'HNR', 'RPDE', 'DFA']
+        values = [Jitter_percent, Shimmer, HNR, RPDE, DFA]
+        from health_assistant import figures
+
+        radar = figures.RADARS['parkinsons_radar']
+        with span('figure', chart='parkinsons_radar'):
+            st.plotly_chart(radar.figure(categories, values, [0, max(values)]), use_container_width=True)
+
+    else:
+        st.success("✅ No significant Parkinson's disease indicators detected")
+        st.markdown("""
+            ### Preventive Measures:
+            1. Regular exercise
+            2. Balanced diet
+            3. Regular check-ups
+            4. Monitor for any changes in movement or speech
+        """)
+
+
+def render():
+    history = load_history()
+
+    st.markdown('<h1 class="main-title">Parkinson\'s Disease Assessment</h1>', unsafe_allow_html=True)
+    
+    # Add tabs for different input methods
+    tab1, tab2, tab3 = st.tabs(["Manual Input", "Audio Analysis", "Batch Upload"])
+    
+    with tab1:
+        with st.form("parkinsons_form"):
+            col1, col2, col3 = st.columns(3)
+            
+            # Organize inputs into meaningful groups
+            inputs = {}
+            with col1:
+                st.subheader("Frequency Measurements")
+                for column in ['MDVP:Fo(Hz)', 'MDVP:Fhi(Hz)', 'MDVP:Flo(Hz)']:
+                    inputs[column] = feature_input('parkinsons', column)
+            
+            with col2:
+                st.subheader("Variation Measurements")
+                for column in ['MDVP:Jitter(%)', 'MDVP:Jitter(Abs)', 'MDVP:RAP', 'MDVP:PPQ', 'Jitter:DDP']:
+                    inputs[column] = feature_input('parkinsons', column)
+            
+            with col3:
+                st.subheader("Additional Measurements")
+                for column in ['spread1', 'spread2', 'D2', 'PPE']:
+                    inputs[column] = feature_input('parkinsons', column)
+                
+            col4, col5 = st.columns(2)
+            
+            with col4:
+                st.subheader("Shimmer Measurements")
+                for column in ['MDVP:Shimmer', 'MDVP:Shimmer(dB)', 'Shimmer:APQ3', 'Shimmer:APQ5', 'MDVP:APQ',
+                               'Shimmer:DDA']:
+                    inputs[column] = feature_input('parkinsons', column)
+            
+            with col5:
+                st.subheader("Voice Measurements")
+                for column in ['NHR', 'HNR', 'RPDE', 'DFA']:
+                    inputs[column] = feature_input('parkinsons', column)
+            
+            submitted = st.form_submit_button("Analyze Voice Parameters")
+            
+            if submitted:
+                with span('input_assembly', model='parkinsons'):
+                    input_data = SCHEMAS['parkinsons'].assemble(inputs)[0]
+                show_assessment(history, inputs, input_data)
+    
+    with tab2:
+        st.markdown("Upload a WAV recording of a sustained vowel, such as a steady \"aaah\" held for a few "
+                    "seconds. The 22 voice measurements are computed from the recording and assessed like "
+                    "the manual form.")
+        recording = st.file_uploader("Voice recording", type="wav", key="parkinsons_audio_file")
+        if recording is not None:
+            st.audio(recording)
+            if st.button("Analyze Recording", key="parkinsons_audio_run"):
+                from health_assistant import voice
+
+                try:
+                    with st.spinner("Extracting voice measurements..."), span('voice_extract', model='parkinsons'):
+                        features, stats = voice.extract(io.BytesIO(recording.getvalue()))
+                    with span('input_assembly', model='parkinsons'):
+                        input_data = SCHEMAS['parkinsons'].assemble(features)[0]
+                except ValueError as e:
+                    st.error(f"Could not analyze the recording: {e}")
+                else:
+                    st.caption(repr(stats))
+                    with st.expander("Extracted Measurements"):
+                        st.dataframe({'measurement': list(features), 'value': list(features.values())},
+                                     hide_index=True, use_container_width=True)
+                    show_assessment(history, features, input_data)
+    
+    with tab3:
+        render_batch_upload('parkinsons', 'parkinsons.csv')
@@ -0,0 +1,138 @@
+"""Patient History page: summary counts, timeline, distribution, paginated table and export."""
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from health_assistant.export import FORMATS as EXPORT_FORMATS
+from health_assistant.metrics import span
+from health_assistant.views.common import load_exporter, load_history
+
+
+# Timeline windows, points per disease line, and table page sizes
+TIMELINE_WINDOWS = {
+    "All time": None,
+    "Last 30 days": timedelta(days=30),
+    "Last 7 days": timedelta(days=7),
+    "Last 24 hours": timedelta(hours=24),
+    "Last hour": timedelta(hours=1),
+}
+TIMELINE_POINTS = 500
+HISTORY_PAGE_SIZES = [25, 50, 100, 250]
+
+
+# Progress of this session's history export; only the fragment reruns while the export is in flight
+def render_export_status():
+    job = load_exporter().get(st.session_state.get('export_job'))
+    if job is None:
+        return
+    if job.active:
+        poll_export_status()
+    elif job.state == 'done':
+        st.success(f"Exported {job.rows:,} records.")
+        st.download_button(
+            label=f"Download {job.file_name}",
+            data=job.read,
+            file_name=job.file_name,
+            mime=job.mime,
+            on_click="ignore"
+        )
+    elif job.state == 'failed':
+        st.error(f"Export failed: {job.error}")
+
+
+@st.fragment(run_every=1)
+def poll_export_status():
+    job = load_exporter().get(st.session_state.get('export_job'))
+    if job is None or not job.active:
+        st.rerun()
+    st.progress(job.progress, text=repr(job))
+    if st.button("Cancel Export"):
+        job.cancel()
+
+
+def render():
+    history = load_history()
+
+    st.markdown('<h1 class="main-title">Patient History and Analytics</h1>', unsafe_allow_html=True)
+    
+    total_assessments = history.count()
+    if not total_assessments:
+        st.info("No patient history available yet. Make some predictions to see them here!")
+    else:
+        from health_assistant import figures
+
+        disease_counts = history.count_by('disease')
+        
+        # Summary metrics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Assessments", total_assessments)
+        with col2:
+            st.metric("Unique Diseases", len(disease_counts))
+        with col3:
+            positive_rate = history.count(result='Positive') / total_assessments * 100
+            st.metric("Positive Rate", f"{positive_rate:.1f}%")
+        
+        # Time series analysis
+        st.subheader("Prediction Timeline")
+        window = st.selectbox("Window", list(TIMELINE_WINDOWS), key="timeline_window")
+        timeline_start = None
+        if TIMELINE_WINDOWS[window] is not None:
+            # Relative to the newest record, so a narrower window zooms into finer buckets
+            last_minute = datetime.fromisoformat(history.time_range()[1])
+            timeline_start = (last_minute - TIMELINE_WINDOWS[window]).strftime("%Y-%m-%d %H:%M:%S")
+        # Rebuilt from the rollups only when the history has changed since the last draw
+        with span('figure', chart='history_timeline'):
+            timeline_fig = figures.history_timeline(history, TIMELINE_POINTS, start=timeline_start)
+        st.plotly_chart(timeline_fig, use_container_width=True)
+        
+        # Disease distribution
+        st.subheader("Disease Distribution")
+        with span('figure', chart='history_pie'):
+            disease_dist = figures.history_pie('history_pie', history)
+        st.plotly_chart(disease_dist, use_container_width=True)
+        
+        # Detailed history table
+        st.subheader("Detailed History")
+        col1, col2 = st.columns(2)
+        with col1:
+            page_size = st.selectbox("Rows per page", HISTORY_PAGE_SIZES, key="history_page_size")
+        page_count = -(-total_assessments // page_size)
+        # A larger page size or a cleared history can leave the stored page past the last one
+        if st.session_state.get("history_page", 1) > page_count:
+            st.session_state.history_page = page_count
+        with col2:
+            page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="history_page")
+        # Only the visible page is queried and sent to the browser
+        with span('history_query', query='table'):
+            history_df = history.frame(limit=page_size, offset=(page - 1) * page_size)
+        st.dataframe(
+            history_df,
+            use_container_width=True
+        )
+        first_row = (page - 1) * page_size + 1
+        st.caption(f"Rows {first_row:,}–{first_row + len(history_df) - 1:,} of {total_assessments:,}, newest first")
+        
+        # Export functionality: written in chunks on a background thread, filters applied in SQL
+        st.subheader("Export History")
+        with st.form("history_export"):
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                export_dates = st.date_input("Date Range", value=())
+            with col2:
+                export_disease = st.selectbox("Disease", ["All"] + list(disease_counts))
+            with col3:
+                export_result = st.selectbox("Result", ["All", "Positive", "Negative"])
+            with col4:
+                export_format = st.selectbox("Format", list(EXPORT_FORMATS))
+            start_export = st.form_submit_button("Start Export")
+        if start_export:
+            job = load_exporter().submit(
+                export_format,
+                start=str(export_dates[0]) if len(export_dates) > 0 else None,
+                end=str(export_dates[-1]) if len(export_dates) > 0 else None,
+                disease=None if export_disease == "All" else export_disease,
+                result=None if export_result == "All" else export_result,
+            )
+            st.session_state.export_job = job.id
+        render_export_status()
@@ -0,0 +1,514 @@
+"""Voice measurements for the Parkinson's model from a WAV recording.
+
+``extract`` computes the 22 columns of ``Datasets/parkinsons.csv`` from a
+sustained vowel, so its result can be passed straight to
+``models['parkinsons']``:
+
+* Pitch is tracked frame by frame with Boersma's windowed autocorrelation.
+  All frames of a block go through one batched FFT. The voiced frames give
+  MDVP:Fo/Fhi/Flo, and their autocorrelation peaks give HNR and NHR.
+* Glottal periods are taken between successive waveform peaks in voiced
+  frames. The jitter columns come from the period lengths and the shimmer
+  columns from each period's peak-to-peak amplitude. These use the MDVP
+  definitions: local, RAP (3 periods), PPQ (5), APQ3, APQ5 and MDVP:APQ
+  (11), with DDP = 3 RAP and DDA = 3 APQ3.
+* RPDE, DFA and D2 follow Little et al. (2007) on the time-delay embedding
+  of the waveform.
+* PPE, spread1 and spread2 describe the variation of the pitch track in
+  semitones. PPE is the entropy of the residual after whitening with a
+  second-order linear predictor. The source papers give no exact formula
+  for spread1 and spread2. Here spread1 is the log of the relative pitch
+  deviation and spread2 the spread of frame-to-frame semitone steps. Both
+  land in the dataset's ranges.
+
+The voice clinic that recorded ``Datasets/`` used its own MDVP and Praat
+settings, so values from other microphones and rooms will not match its
+numbers exactly.
+
+The recording is processed in blocks of ``BLOCK_SECONDS`` and file paths are
+memory-mapped, so only one block of samples is in memory at a time. RPDE and
+DFA are accumulated into fixed-size totals. The pitch track, the period
+lengths and amplitudes and the D2 sample points are kept for the whole
+recording, because the jitter, shimmer, PPE and D2 columns need all of them
+at the end. Memory therefore grows linearly with the number of frames and
+periods: under 20 kB per second of audio, against 88 kB for the 16-bit
+samples themselves. ``extract_many`` analyzes a batch of files in a joblib
+process pool.
+
+Usage::
+
+    python -m health_assistant.voice recording.wav --predict
+    python -m health_assistant.voice recordings/*.wav --jobs -1 -o features.csv
+    python -m health_assistant.voice --bench 60
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.io import wavfile
+from scipy.signal import find_peaks, lfilter, medfilt
+from scipy.spatial.distance import pdist
+
+from health_assistant.schema import SCHEMAS
+
+BLOCK_SECONDS = 10.0
+
+# Pitch tracking, with Praat's defaults where it has one
+F0_MIN = 65.0
+F0_MAX = 625.0
+HOP_SECONDS = 0.01
+VOICING_THRESHOLD = 0.45
+SILENCE_THRESHOLD = 0.03
+OCTAVE_COST = 0.01
+OCTAVE_TOLERANCE = 0.05
+MAX_PERIOD_FACTOR = 1.3
+
+# Nonlinear measures on the waveform scaled to a peak of 1
+EMBEDDING_DELAY_SECONDS = 0.0008
+RPDE_DIMENSION = 4
+RPDE_RADIUS = 0.12
+RPDE_MAX_SECONDS = 0.02
+RPDE_REFERENCES_PER_SECOND = 100
+# Little et al.'s boxes of 50 to 100 samples at the dataset's 44.1 kHz
+DFA_BOX_SECONDS = (50 / 44100, 100 / 44100)
+DFA_SCALES = 6
+D2_DIMENSION = 6
+D2_POINTS_PER_SECOND = 50
+D2_MAX_POINTS = 2000
+PPE_BINS = 30
+PPE_RANGE = 3.0
+
+
+class VoiceStats:
+    """What ``extract`` analyzed and how long it took."""
+
+    def __init__(self, rate, seconds, voiced_seconds, periods, elapsed):
+        self.rate = rate
+        self.seconds = seconds
+        self.voiced_seconds = voiced_seconds
+        self.periods = periods
+        self.elapsed = elapsed
+
+    @property
+    def audio_seconds_per_second(self):
+        return self.seconds / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"{self.seconds:.1f}s of audio at {self.rate} Hz ({self.voiced_seconds:.1f}s voiced, "
+                f"{self.periods:,} periods) in {self.elapsed:.2f}s ({self.audio_seconds_per_second:,.0f}x real time)")
+
+
+def read_wav(source):
+    """Return ``(rate, samples)`` for a path or file object; paths are memory-mapped."""
+    if isinstance(source, (str, os.PathLike)):
+        try:
+            return wavfile.read(source, mmap=True)
+        except ValueError:
+            # 24-bit and some extensible formats cannot be memory-mapped
+            pass
+    return wavfile.read(source)
+
+
+def _to_float(samples):
+    # Mono float64 in [-1, 1]
+    if samples.dtype.kind == 'u':
+        x = (samples.astype(np.float64) - 128.0) / 128.0
+    elif samples.dtype.kind == 'i':
+        x = samples.astype(np.float64) / float(np.iinfo(samples.dtype).max + 1)
+    else:
+        x = samples.astype(np.float64)
+    return x.mean(axis=1) if x.ndim == 2 else x
+
+
+def _perturbation(values, linked, k):
+    """Mean absolute difference between each value and the mean of the ``k`` consecutive values around it.
+
+    ``linked[i]`` says whether values ``i`` and ``i + 1`` are consecutive
+    periods; windows that cross a break are skipped.
+    """
+    if len(values) < k:
+        return np.nan
+    links = np.concatenate([[0], np.cumsum(linked)])
+    starts = np.arange(len(values) - k + 1)
+    complete = links[starts + k - 1] - links[starts] == k - 1
+    if not complete.any():
+        return np.nan
+    windows = sliding_window_view(values, k)[complete]
+    return float(np.mean(np.abs(windows[:, k // 2] - windows.mean(axis=1))))
+
+
+class _Analysis:
+    """Per-frame and per-period values and running totals of one recording, fed block by block."""
+
+    def __init__(self, rate, peak):
+        self.rate = rate
+        self.peak = peak
+        self.hop = max(int(round(HOP_SECONDS * rate)), 1)
+        self.frame = int(round(3 * rate / F0_MIN))
+        self.nfft = next_fast_len(2 * self.frame)
+        self.min_lag = max(int(rate / F0_MAX), 2)
+        self.max_lag = min(int(np.ceil(rate / F0_MIN)), self.frame - 2)
+        self.window = np.hanning(self.frame)
+        window_ac = irfft(np.abs(rfft(self.window, self.nfft)) ** 2, self.nfft)[:self.max_lag + 2]
+        self.window_ac = window_ac / window_ac[0]
+        self.delay = max(int(round(EMBEDDING_DELAY_SECONDS * rate)), 1)
+        self.rpde_max = int(round(RPDE_MAX_SECONDS * rate))
+        self.dfa_boxes = np.unique(np.geomspace(*(s * rate for s in DFA_BOX_SECONDS), DFA_SCALES).astype(int))
+        self.dfa_boxes = self.dfa_boxes[self.dfa_boxes >= 4]
+        # Longest lookahead past a block's own samples
+        self.extra = max(self.frame, (RPDE_DIMENSION - 1) * self.delay + self.rpde_max + 1,
+                         (D2_DIMENSION - 1) * self.delay + 1, int(2 * rate / F0_MIN))
+
+        self.f0, self.strength, self.voiced = [], [], []
+        self.pulses, self.periods, self.amplitudes = [], [], []
+        self.recurrences = np.zeros(self.rpde_max + 1, dtype=np.int64)
+        self.dfa_sse = np.zeros(len(self.dfa_boxes))
+        self.dfa_count = np.zeros(len(self.dfa_boxes))
+        self.d2_points = []
+
+    def _pitch(self, x, n_frames):
+        frames = sliding_window_view(x, self.frame)[:n_frames * self.hop:self.hop]
+        centered = frames - frames.mean(axis=1, keepdims=True)
+        ac = irfft(np.abs(rfft(centered * self.window, self.nfft, axis=1)) ** 2, self.nfft, axis=1)
+        ac = ac[:, :self.max_lag + 2]
+        energy = ac[:, :1]
+        r = np.divide(ac, energy, out=np.zeros_like(ac), where=energy > 0) / self.window_ac
+
+        lags = np.arange(self.min_lag, self.max_lag + 1)
+        mid, left, right = r[:, lags], r[:, lags - 1], r[:, lags + 1]
+        # Parabolic interpolation around every local maximum of the autocorrelation
+        curvature = left - 2 * mid + right
+        delta = np.divide(0.5 * (left - right), curvature, out=np.zeros_like(mid), where=curvature < 0)
+        delta = np.clip(delta, -0.5, 0.5)
+        height = np.minimum(mid - 0.25 * (left - right) * delta, 0.9999)
+        freq = self.rate / (lags + delta)
+        score = np.where((mid > left) & (mid >= right), height + OCTAVE_COST * np.log2(freq / F0_MIN), -np.inf)
+        # The shortest lag that scores nearly as well as the best; a multiple of the period scores about the same
+        top = score.max(axis=1, keepdims=True)
+        best = np.argmax(score >= top - OCTAVE_TOLERANCE, axis=1)
+        rows = np.arange(len(frames))
+        strength = height[rows, best]
+        voiced = (np.isfinite(top[:, 0]) & (strength > VOICING_THRESHOLD)
+                  & (np.abs(frames).max(axis=1) > SILENCE_THRESHOLD * self.peak))
+        return freq[rows, best], strength, voiced
+
+    def _periods(self, x, start, own, f0, voiced):
+        # Glottal pulses are the highest waveform peak in each period of the block's typical pitch
+        distance = max(int(0.7 * self.rate / np.median(f0[voiced])), 1)
+        peaks, _ = find_peaks(x, distance=distance)
+        if len(peaks) < 2:
+            return
+        amplitudes = np.maximum.reduceat(x, peaks)[:-1] - np.minimum.reduceat(x, peaks)[:-1]
+        periods = np.diff(peaks)
+        keep = peaks[:-1] < own
+        frame_index = np.clip((peaks[:-1] - self.frame // 2 + self.hop // 2) // self.hop, 0, len(voiced) - 1)
+        keep &= voiced[frame_index]
+        keep &= (periods >= self.rate / F0_MAX) & (periods <= self.rate / F0_MIN)
+        self.pulses.append(start + peaks[:-1][keep])
+        self.periods.append(periods[keep])
+        self.amplitudes.append(amplitudes[keep])
+
+    def _recurrence(self, xn, own, voiced_samples):
+        span = (RPDE_DIMENSION - 1) * self.delay + 1
+        embedded = sliding_window_view(xn, span)[:, ::self.delay]
+        stride = max(self.rate // RPDE_REFERENCES_PER_SECOND, 1)
+        refs = np.arange(0, min(own, len(embedded) - self.rpde_max - 1), stride)
+        refs = refs[voiced_samples[refs]]
+        offsets = np.arange(1, self.rpde_max + 1)
+        for chunk in np.array_split(refs, max(len(refs) // 256, 1)):
+            if not len(chunk):
+                continue
+            distance = ((embedded[chunk[:, None] + offsets] - embedded[chunk][:, None, :]) ** 2).sum(axis=2)
+            outside = distance >= RPDE_RADIUS ** 2
+            returned = ~outside & np.logical_or.accumulate(outside, axis=1)
+            found = returned.any(axis=1)
+            self.recurrences += np.bincount(returned[found].argmax(axis=1) + 1, minlength=self.rpde_max + 1)
+
+    def _fluctuation(self, xn, own, voiced_samples):
+        # Per-box linear detrending also removes the profile's offset and the signal's mean
+        profile = np.cumsum(xn[:own])
+        for i, box in enumerate(self.dfa_boxes):
+            n_boxes = own // box
+            if not n_boxes:
+                continue
+            boxes = profile[:n_boxes * box].reshape(n_boxes, box)
+            boxes = boxes[voiced_samples[np.arange(n_boxes) * box + box // 2]]
+            t = np.arange(box) - (box - 1) / 2
+            slope = boxes @ t / (t @ t)
+            residual = boxes - boxes.mean(axis=1, keepdims=True) - slope[:, None] * t
+            self.dfa_sse[i] += (residual ** 2).sum()
+            self.dfa_count[i] += residual.size
+
+    def _attractor(self, xn, own, voiced_samples):
+        span = (D2_DIMENSION - 1) * self.delay + 1
+        candidates = np.arange(0, min(own, len(xn) - span + 1), max(int(self.rate // D2_POINTS_PER_SECOND), 1))
+        candidates = candidates[voiced_samples[candidates]]
+        if len(candidates):
+            self.d2_points.append(sliding_window_view(xn, span)[candidates, ::self.delay])
+
+    def feed(self, start, x, own):
+        """Analyze a block whose first ``own`` samples belong to it; the rest is lookahead."""
+        n_frames = max((own + self.hop - 1) // self.hop, 0)
+        n_frames = min(n_frames, (len(x) - self.frame) // self.hop + 1)
+        if n_frames <= 0:
+            return
+        f0, strength, voiced = self._pitch(x, n_frames)
+        self.f0.append(f0)
+        self.strength.append(strength)
+        self.voiced.append(voiced)
+        if not voiced.any():
+            return
+        self._periods(x, start, own, f0, voiced)
+
+        # Per-sample voicing of the block from its frames
+        sample_frame = np.clip((np.arange(len(x)) - self.frame // 2 + self.hop // 2) // self.hop, 0, n_frames - 1)
+        voiced_samples = voiced[sample_frame]
+        xn = x / self.peak
+        self._recurrence(xn, own, voiced_samples)
+        self._fluctuation(xn, own, voiced_samples)
+        self._attractor(xn, own, voiced_samples)
+
+    def features(self):
+        f0 = np.concatenate(self.f0)
+        strength = np.concatenate(self.strength)
+        voiced = np.concatenate(self.voiced)
+        if voiced.sum() < 3:
+            raise ValueError("no sustained voicing found in the recording")
+        pulses = np.concatenate(self.pulses)
+        periods = np.concatenate(self.periods) / self.rate
+        amplitudes = np.concatenate(self.amplitudes)
+        if len(periods) < 12:
+            raise ValueError("too few voice periods in the recording to measure jitter and shimmer")
+
+        # Successive periods: the next pulse starts where this period ends and the lengths are similar
+        ratio = periods[1:] / periods[:-1]
+        linked = ((pulses[1:] - pulses[:-1] == np.round(periods[:-1] * self.rate))
+                  & (ratio <= MAX_PERIOD_FACTOR) & (ratio >= 1 / MAX_PERIOD_FACTOR)).astype(np.int64)
+        if not linked.any():
+            raise ValueError("no consecutive voice periods found in the recording")
+        mean_period = periods.mean()
+        mean_amplitude = amplitudes.mean()
+        pairs = linked.astype(bool)
+        period_steps = np.abs(np.diff(periods))[pairs]
+        amplitude_steps = np.abs(np.diff(amplitudes))[pairs]
+        with np.errstate(divide='ignore'):
+            db_steps = np.abs(20 * np.log10(amplitudes[1:] / amplitudes[:-1]))[pairs]
+        rap = _perturbation(periods, linked, 3) / mean_period
+        apq3 = _perturbation(amplitudes, linked, 3) / mean_amplitude
+
+        track = medfilt(f0[voiced], 5) if voiced.sum() >= 5 else f0[voiced]
+        r = np.clip(strength[voiced], 1e-6, 1 - 1e-6)
+        semitones = 12 * np.log2(track / np.median(track))
+        # Frame-to-frame steps only between frames that are adjacent in time
+        steps = np.diff(semitones)[np.diff(np.flatnonzero(voiced)) == 1]
+
+        values = {
+            'MDVP:Fo(Hz)': track.mean(),
+            'MDVP:Fhi(Hz)': track.max(),
+            'MDVP:Flo(Hz)': track.min(),
+            'MDVP:Jitter(%)': period_steps.mean() / mean_period,
+            'MDVP:Jitter(Abs)': period_steps.mean(),
+            'MDVP:RAP': rap,
+            'MDVP:PPQ': _perturbation(periods, linked, 5) / mean_period,
+            'Jitter:DDP': 3 * rap,
+            'MDVP:Shimmer': amplitude_steps.mean() / mean_amplitude,
+            'MDVP:Shimmer(dB)': db_steps[np.isfinite(db_steps)].mean(),
+            'Shimmer:APQ3': apq3,
+            'Shimmer:APQ5': _perturbation(amplitudes, linked, 5) / mean_amplitude,
+            'MDVP:APQ': _perturbation(amplitudes, linked, 11) / mean_amplitude,
+            'Shimmer:DDA': 3 * apq3,
+            'NHR': np.mean((1 - r) / r),
+            'HNR': np.mean(10 * np.log10(r / (1 - r))),
+            'RPDE': self._rpde(),
+            'DFA': self._dfa(),
+            'spread1': np.log(max(np.std(track / track.mean()), 1e-12)),
+            'spread2': np.std(steps) if len(steps) > 1 else 0.0,
+            'D2': self._d2(),
+            'PPE': _pitch_entropy(semitones),
+        }
+        # Measures that need longer runs than the recording has fall back to the shorter ones
+        fallbacks = {'MDVP:PPQ': 'MDVP:RAP', 'Shimmer:APQ5': 'Shimmer:APQ3', 'MDVP:APQ': 'Shimmer:APQ5'}
+        for column, fallback in fallbacks.items():
+            if not np.isfinite(values[column]):
+                values[column] = values[fallback]
+        features = {column: float(values[column]) for column in SCHEMAS['parkinsons'].columns}
+        missing = [column for column, value in features.items() if not np.isfinite(value)]
+        if missing:
+            raise ValueError(f"the recording is too short or unvoiced to measure {', '.join(missing)}")
+        return features, int(voiced.sum()), len(periods)
+
+    def _rpde(self):
+        total = self.recurrences[1:].sum()
+        if not total:
+            return np.nan
+        p = self.recurrences[1:][self.recurrences[1:] > 0] / total
+        return float(-(p * np.log(p)).sum() / np.log(self.rpde_max))
+
+    def _dfa(self):
+        used = self.dfa_count > 0
+        if used.sum() < 2:
+            return np.nan
+        fluctuation = np.sqrt(self.dfa_sse[used] / self.dfa_count[used])
+        alpha = np.polyfit(np.log(self.dfa_boxes[used]), np.log(fluctuation), 1)[0]
+        return float(1 / (1 + np.exp(-alpha)))
+
+    def _d2(self):
+        if not self.d2_points:
+            return np.nan
+        points = np.concatenate(self.d2_points)
+        if len(points) > D2_MAX_POINTS:
+            points = points[np.linspace(0, len(points) - 1, D2_MAX_POINTS).astype(int)]
+        if len(points) < 50:
+            return np.nan
+        distances = np.sort(pdist(points))
+        distances = distances[distances > 0]
+        # Grassberger-Procaccia slope of log C(r) against log r over the small-radius scaling region
+        radii = np.geomspace(*np.quantile(distances, [0.005, 0.05]), 8)
+        correlation = np.searchsorted(distances, radii) / len(distances)
+        return float(np.polyfit(np.log(radii), np.log(correlation), 1)[0])
+
+
+def _pitch_entropy(semitones):
+    """PPE: normalized entropy of the semitone pitch after second-order linear prediction."""
+    if len(semitones) < 4:
+        return np.nan
+    past = np.column_stack([semitones[1:-1], semitones[:-2], np.ones(len(semitones) - 2)])
+    coefficients = np.linalg.lstsq(past, semitones[2:], rcond=None)[0]
+    residual = semitones[2:] - past @ coefficients
+    counts, _ = np.histogram(np.clip(residual, -PPE_RANGE, PPE_RANGE), bins=PPE_BINS, range=(-PPE_RANGE, PPE_RANGE))
+    p = counts[counts > 0] / counts.sum()
+    return float(-(p * np.log(p)).sum() / np.log(PPE_BINS))
+
+
+def extract(source, block_seconds=BLOCK_SECONDS):
+    """Return ``(features, VoiceStats)`` for a WAV path or file object.
+
+    ``features`` maps every column of ``SCHEMAS['parkinsons']`` to its
+    value, in column order. Raises ``ValueError`` for recordings without
+    enough sustained voicing.
+    """
+    started = time.perf_counter()
+    rate, samples = read_wav(source)
+    if rate < 2 * F0_MAX:
+        raise ValueError(f"sample rate {rate} Hz is too low for voice analysis")
+    n = len(samples)
+    block = max(int(block_seconds * rate), 1)
+    # First pass for the recording's peak, which sets the silence floor and the waveform scale
+    peak = max((np.abs(_to_float(samples[s:s + block])).max() for s in range(0, n, block)), default=0.0)
+    if peak == 0:
+        raise ValueError("the recording is silent")
+    analysis = _Analysis(rate, peak)
+    # Blocks start on frame boundaries, so the frames continue across blocks
+    block = max(block // analysis.hop, 1) * analysis.hop
+    for start in range(0, n, block):
+        own = min(block, n - start)
+        analysis.feed(start, _to_float(samples[start:start + own + analysis.extra]), own)
+    features, voiced_frames, periods = analysis.features()
+    stats = VoiceStats(rate, n / rate, voiced_frames * analysis.hop / rate, periods,
+                       time.perf_counter() - started)
+    return features, stats
+
+
+def _extract_path(path, block_seconds):
+    try:
+        return extract(path, block_seconds)
+    except ValueError as e:
+        return e
+
+
+def extract_many(paths, n_jobs=-1, block_seconds=BLOCK_SECONDS):
+    """Analyze several files in a process pool; returns ``(features, stats)`` or the ``ValueError`` per file."""
+    from joblib import Parallel, delayed
+
+    return Parallel(n_jobs=n_jobs)(delayed(_extract_path)(path, block_seconds) for path in paths)
+
+
+def synthetic_voice(seconds, rate=44100, f0=150.0, jitter=0.005, shimmer=0.04, noise=0.01, seed=0):
+    """A sustained vowel: a jittered, shimmering pulse train through two formant resonators, plus noise."""
+    rng = np.random.default_rng(seed)
+    n_periods = int(seconds * f0 * 1.1) + 1
+    periods = np.clip(1 / f0 * (1 + jitter * rng.standard_normal(n_periods)), 0.5 / f0, 2 / f0)
+    onsets = np.round(np.cumsum(periods) * rate).astype(np.int64)
+    onsets = onsets[onsets < int(seconds * rate)]
+    excitation = np.zeros(int(seconds * rate))
+    excitation[onsets] = 1 + shimmer * rng.standard_normal(len(onsets))
+    signal = excitation
+    for formant, bandwidth in ((700.0, 130.0), (1220.0, 70.0)):
+        radius = np.exp(-np.pi * bandwidth / rate)
+        signal = lfilter([1.0], [1.0, -2 * radius * np.cos(2 * np.pi * formant / rate), radius ** 2], signal)
+    signal /= np.abs(signal).max()
+    return 0.8 * signal + noise * rng.standard_normal(len(signal))
+
+
+def write_wav(path, signal, rate):
+    wavfile.write(path, rate, (np.clip(signal, -1, 1) * 32767).astype(np.int16))
+
+
+def bench(seconds, n_jobs=-1, files=4):
+    """Print audio seconds analyzed per wall-clock second, for one file and for ``files`` in the pool."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(files):
+            paths.append(os.path.join(tmp, f"voice_{i}.wav"))
+            write_wav(paths[-1], synthetic_voice(seconds, seed=i), 44100)
+        features, stats = extract(paths[0])
+        print(f"single file: {stats!r}")
+        started = time.perf_counter()
+        extract_many(paths, n_jobs)
+        elapsed = time.perf_counter() - started
+        print(f"{files} files, n_jobs={n_jobs}: {files * seconds / elapsed:,.0f} audio seconds per second")
+    return features
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the Parkinson's voice measurements from WAV files.")
+    parser.add_argument('files', nargs='*', help="WAV recordings of a sustained vowel")
+    parser.add_argument('-o', '--output', help="write one CSV row per file here (default: stdout)")
+    parser.add_argument('--predict', action='store_true', help="add the Parkinson's model's prediction")
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel files (-1 uses every core)")
+    parser.add_argument('--bench', type=float, metavar='SECONDS',
+                        help="time the extraction on synthetic recordings of this length instead")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench, args.jobs)
+        return
+    if not args.files:
+        parser.error("no WAV files given")
+
+    results = extract_many(args.files, args.jobs)
+    ok = [(path, result) for path, result in zip(args.files, results) if not isinstance(result, Exception)]
+    for path, result in zip(args.files, results):
+        if isinstance(result, Exception):
+            print(f"{path}: {result}", file=sys.stderr)
+    columns = list(SCHEMAS['parkinsons'].columns)
+    predictions = []
+    if args.predict and ok:
+        from health_assistant.models import load_model
+
+        X = SCHEMAS['parkinsons'].assemble([features for _, (features, _) in ok])
+        predictions = load_model('parkinsons').predict(SCHEMAS['parkinsons'].frame(X))
+
+    dest = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(dest)
+        writer.writerow(['name'] + columns + (['prediction'] if args.predict else []))
+        for i, (path, (features, stats)) in enumerate(ok):
+            extra = [int(predictions[i])] if args.predict else []
+            writer.writerow([os.path.basename(path)] + [f"{features[c]:.6g}" for c in columns] + extra)
+            print(f"{path}: {stats!r}", file=sys.stderr)
+    finally:
+        if dest is not sys.stdout:
+            dest.close()
+    if len(ok) < len(args.files):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
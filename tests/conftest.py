@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Keep the history and prediction cache databases out of the checkout; set before health_assistant is imported
+_TMP = tempfile.mkdtemp(prefix='health_assistant_tests-')
+os.environ.setdefault('HEALTH_ASSISTANT_HISTORY', os.path.join(_TMP, 'patient_history.db'))
+os.environ.setdefault('HEALTH_ASSISTANT_CACHE', os.path.join(_TMP, 'prediction_cache.db'))
+os.environ.setdefault('HEALTH_ASSISTANT_METRICS_PORT', '0')
@@ -0,0 +1,40 @@
+import io
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from health_assistant import batch
+from health_assistant.models import DATASET_FILES, ROOT, load_model
+from health_assistant.registry import ModelRegistry
+
+
+def test_threshold_cli(tmp_path):
+    output = tmp_path / 'scored.csv'
+    subprocess.run([sys.executable, '-W', 'ignore', '-m', 'health_assistant.batch', 'heart',
+                    str(DATASET_FILES['heart']), '--threshold', '0.3', '-o', str(output)],
+                   cwd=ROOT, check=True, capture_output=True)
+    scored = pd.read_csv(output)
+    assert len(scored) == 303
+    assert ((scored['probability'] >= 0.3) == (scored['prediction'] == 1)).all()
+
+
+@pytest.mark.parametrize('source', ['none', 'plain', 'registry'])
+def test_threshold_with_any_model(source):
+    model = {'none': None, 'plain': lambda: load_model('diabetes'),
+             'registry': lambda: ModelRegistry()['diabetes']}[source]
+    output = io.StringIO()
+    stats = batch.score_csv('diabetes', DATASET_FILES['diabetes'], output,
+                            model=model() if model else None, chunksize=200, threshold=0.5)
+    scored = pd.read_csv(io.StringIO(output.getvalue()))
+    assert stats.rows == len(scored) == 768
+    assert scored['probability'].between(0, 1).all()
+    assert ((scored['probability'] >= 0.5) == (scored['prediction'] == 1)).all()
+
+
+def test_labels_without_threshold_match_predict():
+    scored = pd.concat(batch.iter_scored('diabetes', DATASET_FILES['diabetes'], chunksize=300))
+    expected = load_model('diabetes').predict(scored[batch.FEATURE_COLUMNS['diabetes']])
+    assert (scored['prediction'].to_numpy() == expected).all()
+    assert 'probability' not in scored
@@ -0,0 +1,87 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.dummy import DummyClassifier
+
+from health_assistant.cache import MemoryBackend, PredictionCache, SQLiteBackend, canonical_key
+from health_assistant.models import LazyModels, read_model
+from health_assistant.schema import SCHEMAS
+
+ROW = [6, 148, 72, 35, 0, 33.6, 0.627, 50]
+
+
+def write_constant_model(path, label):
+    X = SCHEMAS['diabetes'].frame(np.array([ROW, ROW], dtype=np.float64))
+    model = DummyClassifier(strategy='constant', constant=label).fit(X, [0, 1])
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+
+
+def worker(path, backend):
+    """What one server worker holds: models loaded from ``path`` and a cache keyed on them."""
+    models = LazyModels(lambda name: read_model(name, path))
+    cache = PredictionCache(backend, models.digests)
+
+    def predict(row):
+        compute = lambda: int(models['diabetes'].predict(SCHEMAS['diabetes'].frame(np.array([row], dtype=float)))[0])
+        return cache.get_or_compute('diabetes', row, compute)
+    return predict, cache
+
+
+def test_canonical_key_ignores_numeric_type():
+    assert canonical_key('diabetes', 'a' * 64, [5, 0.0]) == canonical_key('diabetes', 'a' * 64, [5.0, -0.0])
+    assert canonical_key('diabetes', 'a' * 64, [5, 0]) != canonical_key('diabetes', 'b' * 64, [5, 0])
+
+
+def test_digest_is_of_the_loaded_bytes(tmp_path):
+    path = tmp_path / 'model.sav'
+    write_constant_model(path, 1)
+    models = LazyModels(lambda name: read_model(name, path))
+    before = models.digest('diabetes')
+    write_constant_model(path, 0)
+    # The model in memory did not change, so neither does its digest
+    assert models.digest('diabetes') == before
+    assert LazyModels(lambda name: read_model(name, path)).digest('diabetes') != before
+
+
+@pytest.mark.parametrize('shared', [True, False], ids=['sqlite', 'memory'])
+def test_replaced_model_never_serves_stale_labels(tmp_path, shared):
+    path = tmp_path / 'model.sav'
+    write_constant_model(path, 1)
+    backend = SQLiteBackend(tmp_path / 'cache.db') if shared else MemoryBackend()
+    old_predict, old_cache = worker(path, backend)
+    assert old_predict(ROW) == 1
+
+    write_constant_model(path, 0)
+    # A worker that has not reloaded keeps answering with the old model, under the old model's hash
+    other_row = [1, 85, 66, 29, 0, 26.6, 0.351, 31]
+    assert old_predict(other_row) == 1
+
+    new_predict, new_cache = worker(path, backend)
+    assert new_predict(ROW) == 0
+    assert new_predict(other_row) == 0
+    assert new_cache.stats.snapshot()['hits'] == 0
+
+    # A shared cache keeps the old version's entries for workers that have not reloaded yet
+    hits = old_cache.stats.snapshot()['hits']
+    assert old_predict(ROW) == 1
+    assert old_cache.stats.snapshot()['hits'] == hits + shared
+
+
+def test_hits_and_lru_eviction():
+    backend = MemoryBackend(maxsize=2)
+    cache = PredictionCache(backend, {'diabetes': 'a' * 64})
+    calls = []
+    for row in ([1], [2], [1], [3], [2]):
+        cache.get_or_compute('diabetes', row, lambda: calls.append(1) or 1)
+    stats = cache.stats.snapshot()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 4, 2)
+    assert len(backend) == 2
+
+
+def test_expired_entries_are_recomputed():
+    cache = PredictionCache(MemoryBackend(ttl=-1), {'diabetes': 'a' * 64})
+    assert cache.get_or_compute('diabetes', ROW, lambda: 1) == 1
+    assert cache.get_or_compute('diabetes', ROW, lambda: 0) == 0
+    assert cache.stats.snapshot()['hits'] == 0
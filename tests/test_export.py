@@ -0,0 +1,76 @@
+import gzip
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from health_assistant.export import FORMATS, ExportCancelled, ExportManager, export_history
+from health_assistant.history import COLUMNS, HistoryStore
+
+
+def record(i):
+    return {'timestamp': f'2024-01-{i % 28 + 1:02d} 10:{i % 60:02d}:00', 'disease': ['Diabetes', 'Heart Disease'][i % 2],
+            'result': ['Positive', 'Negative'][i % 3 == 0], 'details': {'Glucose': i, 'BMI': i / 4}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.extend(record(i) for i in range(250))
+    return store
+
+
+@pytest.fixture
+def out(tmp_path):
+    out = tmp_path / 'out'
+    out.mkdir()
+    return out
+
+
+def read_export(path, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(path)
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    return pd.DataFrame([dict(row, details=json.dumps(row['details'])) for row in rows], columns=COLUMNS)
+
+
+@pytest.mark.parametrize('fmt', list(FORMATS))
+def test_export_round_trips(store, out, fmt):
+    path = out / f'history{FORMATS[fmt][0]}'
+    progress = []
+    filters = dict(end='2024-01-14', disease='Diabetes')
+    assert export_history(store, path, fmt, chunksize=40, progress=progress.append, **filters) == store.count(**filters)
+
+    exported = read_export(path, fmt)
+    expected = store.frame(newest_first=False, **filters)
+    assert list(exported.columns) == COLUMNS
+    assert exported[['timestamp', 'disease', 'result']].values.tolist() == \
+        expected[['timestamp', 'disease', 'result']].values.tolist()
+    assert [json.loads(d) for d in exported['details']] == [json.loads(d) for d in expected['details']]
+    assert progress[-1] == len(expected) and progress == sorted(progress)
+    assert [p.name for p in out.iterdir()] == [path.name]
+
+
+def test_cancelled_export_leaves_no_file(store, out):
+    path = out / 'history.csv'
+    with pytest.raises(ExportCancelled):
+        export_history(store, path, chunksize=10, cancelled=lambda: True)
+    assert list(out.iterdir()) == []
+
+
+def test_manager_runs_jobs_in_the_background(store):
+    manager = ExportManager(store)
+    try:
+        job = manager.submit('jsonl.gz', result='Positive')
+        deadline = time.monotonic() + 30
+        while job.active and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert (job.state, job.rows, job.progress) == ('done', store.count(result='Positive'), 1.0)
+        assert len(read_export(job.path, 'jsonl.gz')) == job.rows
+        assert manager.get(job.id) is job
+    finally:
+        manager.close()
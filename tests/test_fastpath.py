@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from health_assistant import fastpath
+from health_assistant.models import DATASET_FILES, FEATURE_COLUMNS, MODEL_FILES, load_model
+
+
+@pytest.mark.parametrize('name', sorted(MODEL_FILES))
+def test_verify_has_no_mismatches(name):
+    rows, mismatches = fastpath.verify(name)
+    assert rows > 0
+    assert mismatches == 0
+
+
+@pytest.mark.parametrize('name', sorted(MODEL_FILES))
+def test_decision_function_matches_sklearn(name):
+    X = pd.read_csv(DATASET_FILES[name], encoding='utf-8-sig')[FEATURE_COLUMNS[name]]
+    expected = load_model(name).decision_function(X)
+    assert np.allclose(fastpath.load_fast_model(name).decision_function(X.to_numpy()), expected, atol=1e-8)
+
+
+@pytest.mark.parametrize('name', sorted(MODEL_FILES))
+def test_memory_mapped_export_matches(name, tmp_path):
+    predictor = fastpath.NumpyPredictor.load(fastpath.artifact_path(name))
+    predictor.save_dir(tmp_path / name)
+    mapped = fastpath.NumpyPredictor.load_dir(tmp_path / name)
+    X = pd.read_csv(DATASET_FILES[name], encoding='utf-8-sig')[FEATURE_COLUMNS[name]].to_numpy()
+    assert (mapped.predict(X) == predictor.predict(X)).all()
+    assert mapped.sha256 == predictor.sha256
+
+
+def test_exported_pipeline_matches(tmp_path):
+    from sklearn.kernel_approximation import RBFSampler
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    data = pd.read_csv(DATASET_FILES['diabetes'])
+    X, y = data[FEATURE_COLUMNS['diabetes']], data['Outcome']
+    model = make_pipeline(StandardScaler(), RBFSampler(n_components=50, random_state=0),
+                          SGDClassifier(random_state=0)).fit(X, y)
+    predictor = fastpath.NumpyPredictor.from_model(model)
+    assert (predictor.predict(X.to_numpy()) == model.predict(X)).all()
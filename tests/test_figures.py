@@ -0,0 +1,61 @@
+import json
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.tools
+import pytest
+
+from health_assistant import figures
+from health_assistant.history import HistoryStore
+
+
+def record(timestamp, disease, result):
+    return {'timestamp': timestamp, 'disease': disease, 'result': result}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.extend([record('2024-01-01 10:00:00', 'heart', 'Positive'),
+                  record('2024-01-02 11:30:00', 'diabetes', 'Negative')])
+    return store
+
+
+def drawn(fig):
+    """The spec as ``st.plotly_chart`` serializes it, checked against the plotly schema."""
+    spec = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+    go.Figure(spec)
+    return json.loads(pio.to_json(spec, validate=False))
+
+
+def test_history_charts_are_reused_until_the_history_changes(store):
+    pie = figures.history_pie('history_pie', store)
+    timeline = figures.history_timeline(store)
+    assert figures.history_pie('history_pie', store) is pie
+    assert figures.history_timeline(store) is timeline
+
+    store.append(record('2024-01-02 12:00:00', 'heart', 'Negative'))
+    updated = figures.history_pie('history_pie', store)
+    assert updated is not pie
+    assert drawn(updated)['data'][0]['values'] == [2, 1]
+    # Only the trace data changes; the serialized layout is shared
+    assert updated.spec['layout'] is pie.spec['layout']
+    assert drawn(pie)['data'][0]['values'] == [1, 1]
+
+
+def test_timeline_spec_matches_the_rollup(store):
+    fig = drawn(figures.history_timeline(store))
+    assert [trace['name'] for trace in fig['data']] == ['heart', 'diabetes']
+    assert fig['data'][0]['y'] == [1.0]
+    assert fig['data'][0]['customdata'] == [[1, 1]]
+    assert fig['layout']['title']['text'] == 'Positive Rate Over Time (per minute)'
+
+
+def test_radar_figures_do_not_share_data():
+    radar = figures.RADARS['parkinsons_radar']
+    first = radar.figure(['Jitter', 'Shimmer'], (0.1, 0.2), (0, 0.2))
+    second = radar.figure(['Jitter', 'Shimmer'], (0.3, 0.4))
+    assert drawn(first)['data'][0]['r'] == [0.1, 0.2]
+    assert drawn(first)['layout']['polar']['radialaxis']['range'] == [0, 0.2]
+    assert drawn(second)['data'][0]['r'] == [0.3, 0.4]
+    assert drawn(second)['layout']['polar']['radialaxis']['range'] == [0, 1]
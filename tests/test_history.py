@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from health_assistant.history import GRANULARITIES, HistoryStore
+
+RECORDS = [
+    ('2023-12-31 23:59:59', 'Diabetes', 'Negative'),
+    ('2024-01-01 00:00:00', 'Heart Disease', 'Positive'),
+    ('2024-01-01 12:30:00', 'Diabetes', 'Positive'),
+    ('2024-01-01 23:59:59.500000', 'Parkinsons', 'Negative'),
+    ('2024-01-02 00:00:00', 'Heart Disease', 'Negative'),
+]
+
+
+def record(timestamp, disease, result):
+    return {'timestamp': timestamp, 'disease': disease, 'result': result, 'details': {'score': 1.5}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.extend(record(*r) for r in RECORDS)
+    return store
+
+
+@pytest.mark.parametrize('end', ['2024-01-01', '2024-01-01 23', '2024-01-01 23:59:59'])
+def test_end_includes_everything_it_names(store, end):
+    day = [r[0] for r in RECORDS if r[0].startswith('2024-01-01')]
+    assert store.count(start='2024-01-01', end=end) == 3
+    assert [row[0] for row in store.rows(['timestamp'], newest_first=False, start='2024-01-01', end=end)] == day
+    assert store.count_by('result', start='2024-01-01', end=end) == {'Positive': 2, 'Negative': 1}
+    assert sum(len(chunk) for chunk in store.iter_rows(chunksize=2, end=end)) == 4
+
+
+def test_filters_combine(store):
+    assert store.count(end='2023-12-31') == 1
+    assert store.count(start='2024-01-01 12:30:00', end='2024-01-01 12:30:00') == 1
+    assert store.count(end='2024-01-01', disease='Diabetes', result='Positive') == 1
+    assert store.count(start='2024-01-03') == 0
+
+
+def test_running_aggregates_match_a_full_recount(tmp_path):
+    rng = random.Random(0)
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    records = [record(f'2024-01-{rng.randint(1, 3):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00',
+                      rng.choice(['Diabetes', 'Heart Disease', 'Parkinsons']), rng.choice(['Positive', 'Negative']))
+               for _ in range(300)]
+    for r in records[:100]:
+        store.append(r)
+    store.extend(records[100:])
+
+    running = {
+        'count': store.count(),
+        'diseases': store.count_by('disease'),
+        'positives': store.count(result='Positive'),
+        'rollups': {g: store.rollup(g) for g in GRANULARITIES},
+    }
+    assert running['count'] == store.count(start='2024-01-01') == 300
+    assert running['positives'] == sum(r['result'] == 'Positive' for r in records)
+
+    store.rebuild_aggregates()
+    assert running == {
+        'count': store.count(),
+        'diseases': store.count_by('disease'),
+        'positives': store.count(result='Positive'),
+        'rollups': {g: store.rollup(g) for g in GRANULARITIES},
+    }
+    # The finest rollup adds up to the raw records
+    assert sum(total for *_, total in running['rollups']['minute']) == 300
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from health_assistant import import_budget
+from health_assistant.models import ROOT
+
+BARE_APP = """
+from streamlit.testing.v1 import AppTest
+AppTest.from_string("import streamlit as st\\nst.write('ok')").run()
+"""
+
+
+@pytest.fixture(scope='module')
+def streamlit_baseline(tmp_path_factory):
+    """Modules a bare Streamlit script imports under AppTest; Streamlit loads plotly's base package itself."""
+    tmp = tmp_path_factory.mktemp('baseline')
+    env = dict(os.environ, HEALTH_ASSISTANT_HISTORY=str(tmp / 'history.db'),
+               HEALTH_ASSISTANT_CACHE=str(tmp / 'cache.db'), HEALTH_ASSISTANT_METRICS_PORT='0')
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', BARE_APP],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return set(import_budget.parse_importtime(out.stderr))
+
+
+@pytest.mark.parametrize('page', list(import_budget.ALLOWED))
+def test_page_within_import_budget(page, streamlit_baseline):
+    modules = import_budget.probe(page)
+    total_ms, problems = import_budget.check(page, modules)
+    assert not problems, f"{page}: {total_ms:.0f} ms; {'; '.join(problems)}"
+
+    allowed = import_budget.ALLOWED[page]
+    for package in ('sklearn', 'pandas', 'plotly'):
+        if package in allowed:
+            continue
+        extra = sorted(name for name in modules
+                       if name.split('.')[0] == package and name not in streamlit_baseline)
+        assert not extra, f"{page} imported {', '.join(extra[:5])}"
@@ -0,0 +1,144 @@
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from health_assistant import registry
+from health_assistant.models import MODEL_FILES
+from health_assistant.scoring import _load_dataset
+
+
+@pytest.fixture
+def heart_dir(tmp_path, monkeypatch):
+    """A saved models/ directory holding only the heart model; the other models stay where they are."""
+    serving = tmp_path / MODEL_FILES['heart'].name
+    shutil.copyfile(MODEL_FILES['heart'], serving)
+    # Installed an hour ago, before any artifact a test writes
+    stamp = time.time() - 3600
+    os.utime(serving, (stamp, stamp))
+    monkeypatch.setitem(MODEL_FILES, 'heart', serving)
+    monkeypatch.setattr(registry, 'MODELS_DIR', tmp_path)
+    monkeypatch.setattr(registry, 'MANIFEST_PATH', tmp_path / 'manifest.json')
+    return tmp_path
+
+
+@pytest.fixture(scope='module')
+def heart_data():
+    return _load_dataset('heart')
+
+
+def write_model(path, heart_data, C):
+    X, y = heart_data
+    with open(path, 'wb') as f:
+        pickle.dump(LogisticRegression(C=C, max_iter=1000).fit(X, y), f)
+
+
+def test_replaced_file_is_loaded_and_switched(heart_dir, heart_data):
+    models = registry.ModelRegistry()
+    X, _ = heart_data
+    served = models['heart']
+    before = models.digest('heart')
+    served.predict(X)
+
+    write_model(MODEL_FILES['heart'], heart_data, C=1e-4)
+    models.check()
+    assert models.digest('heart') == registry.file_digest(MODEL_FILES['heart']) != before
+    assert models.switches == 1
+    assert served.current().model.C == 1e-4
+
+    MODEL_FILES['heart'].write_bytes(b'not a pickle')
+    models.check()
+    # A file that cannot load is logged and the last good version keeps serving
+    assert models.switches == 1
+    assert served.predict(X).shape == (len(X),)
+    assert 'failed to load' in models.events[-1][2]
+
+
+def test_shadowed_candidate_is_promoted(heart_dir, heart_data):
+    models = registry.ModelRegistry(shadow=True, shadow_rate=1.0)
+    X, _ = heart_data
+    models['heart'].current()
+    artifact = registry.versioned_path('heart', 'v2')
+    write_model(artifact, heart_data, C=1.0)
+    models.check()
+    assert models.status()['heart']['candidate']['file'] == artifact.name
+
+    for start in range(0, 300, 60):
+        models['heart'].predict(X[start:start + 60])
+    models.stop()
+    shadow = models.status()['heart']['shadow']
+    assert shadow['calls'] == 5 and shadow['errors'] == 0
+    assert 0.5 < shadow['agreement'] <= 1.0
+
+    models.promote('heart')
+    assert registry.file_digest(MODEL_FILES['heart']) == registry.file_digest(artifact)
+    assert models.digest('heart') == registry.file_digest(artifact)
+    assert models.status()['heart']['candidate'] is None
+    assert MODEL_FILES['heart'].with_suffix('.npz').exists()
+
+
+def test_discarded_candidate_is_not_picked_up_again(heart_dir, heart_data):
+    models = registry.ModelRegistry(shadow=True)
+    models['heart'].current()
+    write_model(registry.versioned_path('heart', 'v2'), heart_data, C=1.0)
+    models.check()
+    models.discard('heart')
+    models.check()
+    assert models.status()['heart']['candidate'] is None
+    models.stop()
+
+
+def write_artifact(version, heart_data, C, age_seconds):
+    path = registry.versioned_path('heart', version)
+    write_model(path, heart_data, C)
+    stamp = time.time() - age_seconds
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+@pytest.mark.parametrize('auto_promote', [False, True])
+def test_older_artifacts_are_not_candidates_after_a_promotion(heart_dir, heart_data, auto_promote):
+    models = registry.ModelRegistry(shadow=True, shadow_rate=1.0, auto_promote=auto_promote)
+    X, _ = heart_data
+    models['heart'].current()
+    write_artifact('v1', heart_data, C=0.01, age_seconds=20)
+    v2 = write_artifact('v2', heart_data, C=1.0, age_seconds=10)
+    models.check()
+    assert models.status()['heart']['candidate']['file'] == v2.name
+
+    models.promote('heart')
+    models.check()
+    # v1 is older than the version now serving, so it is never shadowed or promoted back
+    assert models.status()['heart']['candidate'] is None
+    for start in range(0, 300, 60):
+        models['heart'].predict(X[start:start + 60])
+    models.stop()
+    assert models.digest('heart') == registry.file_digest(v2)
+    assert registry.file_digest(MODEL_FILES['heart']) == registry.file_digest(v2)
+
+
+def test_rolled_back_file_does_not_shadow_the_newer_artifact(heart_dir, heart_data):
+    original = MODEL_FILES['heart'].read_bytes()
+    models = registry.ModelRegistry(shadow=True)
+    models['heart'].current()
+    write_artifact('v2', heart_data, C=1.0, age_seconds=10)
+    models.promote('heart', 'v2')
+    # Rolling back by hand installs the old bytes after v2 was written
+    MODEL_FILES['heart'].write_bytes(original)
+    models.check()
+    assert models.status()['heart']['candidate'] is None
+    models.stop()
+
+
+def test_verdict_gates():
+    stats = registry.ShadowStats()
+    assert not stats.verdict()[0]
+    stats.record(registry.MIN_SHADOW_ROWS, registry.MIN_SHADOW_ROWS, 1.0, 1.5)
+    assert stats.verdict()[0]
+    stats.record(100, 0, 1.0, 1.0)
+    assert 'agreement' in stats.verdict()[1]
+    assert np.isclose(stats.snapshot()['latency_ratio'], 2.5 / 2.0)
@@ -0,0 +1,103 @@
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from joblib import Memory
+
+from health_assistant.fastpath import load_fast_models
+from health_assistant.models import ROOT, LazyModels, load_models, read_model
+from health_assistant.scoring import ScoringEngine, _sigmoid, fit_platt
+
+NAMES = ['diabetes', 'heart', 'parkinsons']
+
+
+@pytest.fixture
+def memory(tmp_path):
+    return Memory(tmp_path / 'scoring', verbose=0)
+
+
+def test_platt_probabilities_are_bounded_and_increasing():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 500)
+    scores = 2.0 * y - 1 + rng.normal(0, 1.5, 500)
+    a, b = fit_platt(scores, y)
+    assert a < 0
+    grid = np.linspace(-1e4, 1e4, 2001)
+    probability = _sigmoid(grid, a, b)
+    assert np.all((probability >= 0) & (probability <= 1))
+    assert np.all(np.diff(probability) >= 0)
+    assert np.isfinite(probability).all()
+
+
+def test_platt_on_separable_data_stays_finite():
+    # Platt's smoothed targets keep the slope finite when the classes do not overlap
+    a, b = fit_platt(np.array([-3.0, -2.0, -1.0, 1.0, 2.0, 3.0]), np.array([0, 0, 0, 1, 1, 1]))
+    assert np.isfinite(a) and np.isfinite(b)
+    assert 0 < _sigmoid(0.0, a, b) < 1
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_profile_rates_are_monotonic(name, memory):
+    profile = ScoringEngine(memory=memory).profile(name)
+    table = profile.table(0.05)
+    recall = [row['recall'] for row in table]
+    flagged = [row['flagged'] for row in table]
+    assert np.all(np.diff(recall) <= 0) and np.all(np.diff(flagged) <= 0)
+    assert all(0 <= row['precision'] <= 1 and 0 <= row['specificity'] <= 1 for row in table)
+    assert np.all((profile.positives >= 0) & (profile.positives <= 1))
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_fast_models_profile_like_the_pickles(name, memory):
+    pickled = ScoringEngine(load_models(), memory).profile(name)
+    fast = ScoringEngine(load_fast_models(), memory).profile(name)
+    assert fast.method == pickled.method
+    assert (fast.a, fast.b) == pytest.approx((pickled.a, pickled.b), rel=1e-6)
+    assert fast.confusion(0.5) == pytest.approx(pickled.confusion(0.5))
+
+
+def test_profile_follows_the_served_model(tmp_path, memory):
+    from sklearn.linear_model import LogisticRegression
+
+    from health_assistant.scoring import _load_dataset
+
+    X, y = _load_dataset('heart')
+    path = tmp_path / 'heart.sav'
+    with open(path, 'wb') as f:
+        pickle.dump(LogisticRegression(C=1e-4, max_iter=1000).fit(X, y), f)
+    shipped = ScoringEngine(load_models(), memory).profile('heart')
+    served = ScoringEngine(LazyModels(lambda name: read_model(name, path)), memory).profile('heart')
+    assert served.metrics['brier'] != pytest.approx(shipped.metrics['brier'])
+
+
+def test_fast_scoring_does_not_import_sklearn(tmp_path):
+    code = (
+        "import sys\n"
+        "from joblib import Memory\n"
+        "from health_assistant.fastpath import load_fast_models\n"
+        "from health_assistant.scoring import ScoringEngine\n"
+        f"engine = ScoringEngine(load_fast_models(), Memory({str(tmp_path)!r}, verbose=0))\n"
+        "engine.score_all({'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1, 'restecg': 0,\n"
+        "                  'thalach': 150, 'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1})\n"
+        "assert 'sklearn' not in sys.modules, 'sklearn was imported'\n"
+    )
+    subprocess.run([sys.executable, '-W', 'ignore', '-c', code], cwd=ROOT, check=True)
+
+
+def test_plain_dict_of_models(memory):
+    engine = ScoringEngine({'heart': load_models()['heart']}, memory)
+    assert engine.profile('heart').method == 'logistic'
+    scores = engine.score('heart', [[63, 1, 3, 145, 233, 1, 0, 150, 0, 2.3, 0, 0, 1]], threshold=0.5)
+    assert 0 <= scores.probability[0] <= 1
+
+
+def test_snapshot_pairs_model_and_profile(memory):
+    from health_assistant.registry import ModelRegistry
+
+    registry = ModelRegistry()
+    engine = ScoringEngine(registry, memory)
+    model, profile = engine.snapshot('heart')
+    assert model is registry['heart'].current().model
+    assert profile is engine.profile('heart')
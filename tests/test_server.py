@@ -0,0 +1,89 @@
+import pytest
+
+from health_assistant import metrics
+from health_assistant.models import load_models
+from health_assistant.server import create_app
+
+HEART_ROW = {'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1, 'restecg': 0, 'thalach': 150,
+             'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1}
+
+MALFORMED = {
+    'missing column': ({k: v for k, v in HEART_ROW.items() if k != 'chol'}, 'chol'),
+    'non-numeric': (dict(HEART_ROW, chol='high'), 'non-numeric'),
+    'null value': (dict(HEART_ROW, chol=None), 'chol'),
+    'out of range': (dict(HEART_ROW, age=400), 'age'),
+    'not a whole number': (dict(HEART_ROW, age=63.5), 'age'),
+    'unknown option': (dict(HEART_ROW, sex='Unknown'), 'Unknown'),
+    'bad row in a batch': ([HEART_ROW, dict(HEART_ROW, thalach=-1)], 'row 1'),
+    'mixed rows': ([HEART_ROW, list(HEART_ROW.values())], 'all objects'),
+    'short positional row': ([[63, 1, 3]], '13 values'),
+    'empty batch': ([], 'no rows'),
+    'scalar body': (5, 'JSON object or'),
+}
+
+
+@pytest.fixture(scope='module', params=['plain', 'batched+cached', 'fast'])
+def client(request):
+    options = {'plain': {}, 'batched+cached': {'batch_size': 4, 'cache': 'memory'}, 'fast': {'fast': True}}
+    return create_app(**options[request.param]).test_client()
+
+
+def test_health(client):
+    assert client.get('/health').json['models'] == ['diabetes', 'heart', 'parkinsons']
+
+
+def test_predict_one_and_many(client):
+    assert client.post('/predict/heart', json=HEART_ROW).json == {'prediction': 1, 'result': 'Positive'}
+    response = client.post('/predict/heart', json=[HEART_ROW, dict(HEART_ROW, sex='0: Female')])
+    assert response.status_code == 200
+    assert len(response.json['predictions']) == 2
+
+
+@pytest.mark.parametrize('endpoint', ['/predict/heart', '/score/heart'])
+@pytest.mark.parametrize('case', list(MALFORMED))
+def test_malformed_rows_are_rejected(client, endpoint, case):
+    body, message = MALFORMED[case]
+    response = client.post(endpoint, json=body)
+    assert response.status_code == 400
+    assert message in response.json['error']
+
+
+def test_malformed_record_for_score_all(client):
+    response = client.post('/score', json=dict(HEART_ROW, age='old'))
+    assert response.status_code == 400
+    assert client.post('/score', json={'Glucose': 120}).status_code == 400
+
+
+def test_unknown_model(client):
+    assert client.post('/predict/liver', json=HEART_ROW).status_code == 404
+    assert client.post('/score?models=heart,liver', json=HEART_ROW).status_code == 404
+
+
+def test_score_threshold(client):
+    strict = client.post('/score/heart?threshold=0.99', json=HEART_ROW).json
+    lenient = client.post('/score/heart?threshold=0.01', json=HEART_ROW).json
+    assert 0 <= strict['probability'] <= 1
+    assert (strict['prediction'], lenient['prediction']) == (0, 1)
+
+
+@pytest.mark.parametrize('query', ['threshold=abc', 'threshold=', 'threshold=1.5', 'threshold=nan'])
+@pytest.mark.parametrize('endpoint', ['/score/heart', '/score'])
+def test_malformed_threshold_is_rejected(client, endpoint, query):
+    response = client.post(f'{endpoint}?{query}', json=HEART_ROW)
+    assert response.status_code == 400
+    assert 'threshold' in response.json['error']
+
+
+def test_rejected_score_all_is_counted(client):
+    before = metrics.ERRORS.value(model='all')
+    assert client.post('/score', json={'Glucose': 120}).status_code == 400
+    assert client.post('/score?threshold=abc', json=HEART_ROW).status_code == 400
+    assert metrics.ERRORS.value(model='all') == before + 2
+
+
+@pytest.mark.parametrize('cache', ['memory', 'sqlite'])
+def test_cache_in_front_of_a_plain_dict_of_models(cache):
+    client = create_app(models={'heart': load_models()['heart']}, cache=cache).test_client()
+    for _ in range(2):
+        assert client.post('/predict/heart', json=HEART_ROW).json == {'prediction': 1, 'result': 'Positive'}
+    assert client.get('/stats/cache').json['hits'] >= 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from health_assistant import voice
+from health_assistant.models import DATASET_FILES, FEATURE_COLUMNS
+
+VOICES = [
+    {},
+    {'f0': 110.0},
+    {'f0': 220.0, 'noise': 0.05},
+    {'jitter': 0.01, 'shimmer': 0.08},
+]
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return pd.read_csv(DATASET_FILES['parkinsons'])[FEATURE_COLUMNS['parkinsons']]
+
+
+@pytest.mark.parametrize('kwargs', VOICES, ids=lambda kwargs: ','.join(f'{k}={v}' for k, v in kwargs.items()) or 'default')
+def test_features_within_dataset_ranges(tmp_path, dataset, kwargs):
+    path = tmp_path / 'voice.wav'
+    voice.write_wav(path, voice.synthetic_voice(3, **kwargs), 44100)
+    features, _ = voice.extract(path)
+    assert list(features) == FEATURE_COLUMNS['parkinsons']
+    outside = {
+        column: (value, dataset[column].min(), dataset[column].max())
+        for column, value in features.items()
+        if not dataset[column].min() <= value <= dataset[column].max()
+    }
+    assert not outside
+
+
+def test_jitter_percent_is_a_fraction(tmp_path, dataset):
+    # The dataset stores Jitter(%) as Jitter(Abs) over the mean period, not times 100
+    assert np.allclose(dataset['MDVP:Jitter(%)'], dataset['MDVP:Jitter(Abs)'] * dataset['MDVP:Fo(Hz)'], rtol=0.6)
+    path = tmp_path / 'voice.wav'
+    voice.write_wav(path, voice.synthetic_voice(3), 44100)
+    features, _ = voice.extract(path)
+    assert features['MDVP:Jitter(%)'] == pytest.approx(features['MDVP:Jitter(Abs)'] * features['MDVP:Fo(Hz)'],
+                                                       rel=0.05)
+
+
+def test_extract_predicts(tmp_path):
+    from health_assistant.models import load_model
+    from health_assistant.schema import SCHEMAS
+
+    path = tmp_path / 'voice.wav'
+    voice.write_wav(path, voice.synthetic_voice(3), 44100)
+    features, _ = voice.extract(path)
+    prediction = load_model('parkinsons').predict(SCHEMAS['parkinsons'].frame(SCHEMAS['parkinsons'].assemble(features)))
+    assert prediction.tolist() in ([0], [1])